@@ -1,61 +1,2910 @@
+import time
+# --startup-time ölçümünün başlangıcı (modül yükleme dahil)
+STARTUP_T0 = time.perf_counter()
 import sys
-import cv2
+import csv
 import json
 import os
+import glob
+import math
+import mmap
+import struct
+import hashlib
+import queue
+import shutil
+import argparse
+import importlib
+import importlib.util
+import threading
+import weakref
+from collections import Counter, deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LazyModule:
+    """İlk öznitelik erişiminde içe aktarılan modül.
+    
+    numpy + cv2 yüklemesi açılışın yarısından fazlasını alır; pencere önce
+    çizilsin, bunlar ilk gerektiğinde (ya da preload_modules ile arka planda)
+    yüklensin. Yüklenince modüldeki global ad gerçek modüle bağlanır, sonraki
+    erişimlerde vekil aradan çıkar.
+    """
+    def __init__(self, name, alias):
+        self._name = name
+        self._alias = alias
+    
+    def load(self):
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return module
+    
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+np = LazyModule("numpy", "np")
+cv2 = LazyModule("cv2", "cv2")
+
+
+def preload_modules():
+    """Ertelenen modülleri arka planda yükle; ilk pet açılışı beklemesin"""
+    def run():
+        for module in (np, cv2):
+            if isinstance(module, LazyModule):
+                module.load()
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def loaded_heavy_modules():
+    """Şu an yüklü olan ağır modüller (açılış ölçümü için)"""
+    return [name for name in ("numpy", "cv2", "av") if name in sys.modules]
+
+try:
+    import psutil
+except ImportError:  # isteğe bağlı: yoksa Linux'ta /sys'ten okunur
+    psutil = None
+
+# İsteğe bağlı PyAV çözücüsü: kuruluysa ilk PyAVSource'ta yüklenir (içe aktarması
+# ağır, açılışı yavaşlatmasın); kurulu değilse None
+av = LazyModule("av", "av") if importlib.util.find_spec("av") is not None else None
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QWidget, 
                             QVBoxLayout, QHBoxLayout, QPushButton, QTabWidget,
-                            QSlider, QFileDialog, QScrollArea, QGridLayout,
-                            QLineEdit, QMessageBox)
-from PyQt5.QtGui import QImage, QPixmap, QFont
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QPoint
+                            QSlider, QFileDialog,
+                            QLineEdit, QMessageBox, QCheckBox, QSpinBox, QComboBox,
+                            QListWidget, QListWidgetItem, QListView, QStyledItemDelegate, QStyle)
+from PyQt5.QtGui import QImage, QPixmap, QFont, QPainter, QCursor, QColor, QPen, QFontMetrics
+from PyQt5.QtCore import (Qt, QCoreApplication, QObject, QEvent, QTimer, QThread, pyqtSignal, QPoint, QRect, QSize,
+                          QAbstractListModel, QSortFilterProxyModel, QModelIndex)
+
+PRESETS_FILE = "color_presets.json"
+# Preset üst verisi (küçük resim, klip yolu, LUT hash'i) ayrı dosyada; preset'in
+# kendisi ve dolayısıyla preset_hash/sprite geçerliliği etkilenmez
+PRESET_META_FILE = "color_presets.meta.json"
+PRESET_THUMB_DIR = "thumbnails"
+PRESET_THUMB_SIZE = 128
+# Galeride bellekte tutulan küçük resim sayısı (görünür kartlar yeterli)
+GALLERY_THUMB_CACHE = 256
+# Ardışık değişiklikler bu süre içinde tek yazmada birleştirilir (ms)
+PRESET_FLUSH_MS = 500
+# Dosyanın dışarıdan değişip değişmediğine bakma aralığı (ms)
+PRESET_POLL_MS = 2000
+FRAME_BUFFER_SIZE = 4
+# Süreç modu: paylaşılan bellekteki kare yuvası sayısı (tampon + ekrandaki +
+# bir yedek), durdurmada sürecin kapanması için beklenen süre ve pencere
+# içinde izin verilen yeniden başlatma sayısı
+PROCESS_SLOTS = FRAME_BUFFER_SIZE + 2
+PROCESS_JOIN_SECONDS = 2.0
+PROCESS_MAX_RESTARTS = 3
+PROCESS_RESTART_WINDOW = 30.0
+# Key'lenmiş karelerin formatı: önceden çarpılmış alfa, Qt çizerken dönüştürmez
+FRAME_FORMAT = QImage.Format_RGBA8888_Premultiplied
+# Tüm pet'lerin çözme/keying işlerini paylaşan havuzun boyutu
+DECODE_WORKERS = os.cpu_count() or 2
+DEFAULT_FPS = 30.0
+MAX_FPS_CHOICES = [0, 60, 30, 24, 15]
+# "Düşük çözünürlüklü maske" seçeneğinde maskenin hedef boyuta oranı
+LOW_RES_MASK_SCALE = 0.5
+FRAME_CACHE_LIMIT_MB = 256
+# Kare değişim tespiti: kare CHANGE_GRID x CHANGE_GRID karoya, her karo 8x8
+# alan ortalamalı hücreye bölünür; hiçbir hücresi CHANGE_THRESHOLD'dan fazla
+# oynamayan karo değişmemiş sayılır. Kaçan bir değişiklik sonsuza dek ekranda
+# eksik kalmasın diye en geç CHANGE_MAX_SKIP karede bir tüm kare key'lenir
+CHANGE_GRID = 16
+CHANGE_CELLS = 8
+CHANGE_THRESHOLD = 3
+CHANGE_MAX_SKIP = 30
+# Çözücü: arka uçlar, önden çözülen kare sayısı ve kare klasörü/animasyon uzantıları
+DECODER_BACKENDS = ["auto", "opencv", "pyav"]
+PREFETCH_FRAMES = 8
+# Boşluksuz döngü: bellekte tutulan baştaki kare sayısı ve bunun bellek sınırı
+LOOP_HEAD_FRAMES = 6
+LOOP_HEAD_LIMIT_MB = 24
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+ANIMATION_EXTENSIONS = (".gif", ".apng", ".png", ".webp")
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+VIDEO_FILE_FILTER = "Video / Animasyon (*.mp4 *.avi *.mov *.mkv *.webm *.gif *.apng *.png *.webp)"
+# Maske iyileştirme: preset anahtarları, aşamalar, kare aralığından payı ve
+# bütçe kararından önce ölçülen kare sayısı
+REFINE_KEYS = ("erode", "dilate", "feather", "despill")
+REFINE_STAGES = ("morph", "feather", "despill")
+REFINE_BUDGET_SHARE = 0.15
+REFINE_BUDGET_MS = 6.0
+REFINE_WARMUP = 10
+# Bant keying'i: en çok thread sayısı ve bant başına en az satır (daha ince
+# bantlarda thread'e dağıtma maliyeti kazancı yer)
+KEY_THREADS_MAX = 16
+KEY_BAND_MIN_ROWS = 64
+# Arka plan tahmini: örneklenen kare sayısı, analiz genişliği, kenar bandı oranı,
+# bu adımdan seyrek örneklemede seek, aralık sayısı/payı ve renk tonu penceresi
+BG_SAMPLE_FRAMES = 24
+BG_ANALYSIS_WIDTH = 160
+BG_BORDER = 0.05
+BG_SEEK_STRIDE = 30
+BG_MAX_RANGES = 3
+BG_MIN_RANGE_SHARE = 0.1
+BG_HUE_WINDOW = 20
+# Güç tasarrufu: görünürlük/etkinlik kontrol aralığı ve varsayılan ayarlar
+POWER_POLL_MS = 250
+POWER_THROTTLE_FPS = 5
+POWER_IDLE_SECONDS = 60
+BATTERY_CHECK_SECONDS = 30
+# Profilde aşama başına tutulan son ölçüm sayısı
+PROFILE_SAMPLES = 512
+# LUT modunda kanal başına bit sayısı (64^3 girişlik tablo)
+LUT_BITS = 6
+# Kanal -> LUT_BITS bit tablosu; numpy yüklenmeden oluşturulamadığı için lut_shift() ile
+LUT_SHIFT = None
+LUT_CACHE = {}
+SPRITE_DIR = "sprites"
+SPRITE_MAGIC = b"WFSPRITE"
+SPRITE_VERSION = 3
+# magic, versiyon, genişlik, yükseklik, kare sayısı, fps, ölçek,
+# kaynak mtime, kaynak boyutu, preset hash'i
+SPRITE_HEADER = struct.Struct("<8sIIIIdddQ40s")
+SPRITE_DATA_OFFSET = 4096
+
+
+def lut_shift():
+    global LUT_SHIFT
+    if LUT_SHIFT is None:
+        LUT_SHIFT = (np.arange(256) >> (8 - LUT_BITS)).astype(np.uint8)
+    return LUT_SHIFT
+
+
+def preset_ranges(values):
+    """Preset'teki HSV aralıklarını [(lower, upper), ...] olarak döndür.
+    
+    Eski preset'lerde tek 'lower'/'upper' kutusu, yenilerinde 'ranges' listesi
+    bulunur. lower hue > upper hue ise aralık 179/0 sınırından dolanır.
+    """
+    if values.get('ranges'):
+        return [(tuple(r['lower']), tuple(r['upper'])) for r in values['ranges']]
+    return [(tuple(values['lower']), tuple(values['upper']))]
+
+
+def preset_needs_lut(values):
+    """Tek inRange ile key'lenemeyen preset'ler LUT moduna geçer"""
+    ranges = preset_ranges(values)
+    return (len(ranges) > 1 or values.get('softness', 0) > 0
+            or any(lower[0] > upper[0] for lower, upper in ranges))
+
+
+def preset_refine(values):
+    """Preset'in maske iyileştirme ayarları; erode/dilate/feather piksel, despill 0-1"""
+    return {'erode': int(values.get('erode', 0)), 'dilate': int(values.get('dilate', 0)),
+            'feather': int(values.get('feather', 0)), 'despill': float(values.get('despill', 0))}
+
+
+def spill_channel(ranges):
+    """Arka plan renginin baskın BGR kanalı; renksiz (siyah/beyaz/gri) zeminde None"""
+    lower, upper = ranges[0]
+    if lower[1] < 40:
+        return None
+    if lower[0] <= upper[0]:
+        hue = (lower[0] + upper[0]) // 2
+    else:
+        hue = (lower[0] + upper[0] + 180) // 2 % 180
+    bgr = cv2.cvtColor(np.uint8([[[hue, 255, 255]]]), cv2.COLOR_HSV2BGR)[0, 0]
+    return int(np.argmax(bgr))
+
+
+def compile_alpha_lut(ranges, softness=0):
+    """HSV aralıklarını nicemlenmiş BGR -> alfa tablosuna derle.
+    
+    Her kanal LUT_BITS bite indirgenir; tablo indeksi (b << 2*LUT_BITS) |
+    (g << LUT_BITS) | r. Alfa, en yakın aralığa HSV birimi cinsinden uzaklığın
+    softness'a oranıdır (softness 0 ise sert kenar).
+    """
+    levels = 1 << LUT_BITS
+    step = 256 // levels
+    centers = np.arange(levels, dtype=np.uint8) * step + step // 2
+    b, g, r = np.meshgrid(centers, centers, centers, indexing='ij')
+    bgr = np.stack([b, g, r], axis=-1).reshape(-1, 1, 3)
+    hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV).reshape(-1, 3).astype(np.int16)
+    h, s, v = hsv[:, 0], hsv[:, 1], hsv[:, 2]
+    
+    distance = np.full(len(hsv), 255, dtype=np.int16)
+    for lower, upper in ranges:
+        if lower[0] <= upper[0]:
+            inside_h = (h >= lower[0]) & (h <= upper[0])
+        else:
+            inside_h = (h >= lower[0]) | (h <= upper[0])
+        # Hue dairesel: 179'dan sonra 0 gelir
+        to_lower = np.abs(h - lower[0])
+        to_upper = np.abs(h - upper[0])
+        d_h = np.minimum(np.minimum(to_lower, 180 - to_lower), np.minimum(to_upper, 180 - to_upper))
+        d_h[inside_h] = 0
+        d_s = np.maximum(np.maximum(lower[1] - s, s - upper[1]), 0)
+        d_v = np.maximum(np.maximum(lower[2] - v, v - upper[2]), 0)
+        distance = np.minimum(distance, np.maximum(np.maximum(d_h, d_s), d_v))
+    
+    if softness > 0:
+        alpha = np.clip(distance * (255.0 / softness), 0, 255)
+    else:
+        alpha = np.where(distance > 0, 255, 0)
+    return alpha.astype(np.uint8)
+
+
+def preset_lut(values):
+    """Preset'in alfa tablosunu döndür; her preset için bir kez derlenir"""
+    ranges = preset_ranges(values)
+    softness = values.get('softness', 0)
+    key = (tuple(ranges), softness)
+    lut = LUT_CACHE.get(key)
+    if lut is None:
+        lut = compile_alpha_lut(ranges, softness)
+        LUT_CACHE[key] = lut
+    return lut
+
+
+class KeyBandPool:
+    """Bant keying'inin kalıcı thread havuzu; tüm keyer'lar paylaşır.
+    
+    İlk bantlı karede kurulur, daha çok thread istenince büyütülür. Bantlardan
+    biri her zaman çağıran thread'de koşar; havuz yalnız geri kalanları alır.
+    OpenCV ve numpy işlem sırasında GIL'i bıraktığından bantlar gerçekten
+    paralel çalışır.
+    """
+    def __init__(self):
+        self._executor = None
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def executor(self, workers):
+        with self._lock:
+            if self._executor is None or self._size < workers:
+                old = self._executor
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="key-band")
+                self._size = workers
+                if old is not None:
+                    # Eski havuzdaki bantlar bitince thread'leri kapanır
+                    old.shutdown(wait=False)
+            return self._executor
+    
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+                self._size = 0
+
+
+KEY_POOL = KeyBandPool()
+
+
+class ChromaKeyer:
+    """Tamponlarını kareler arasında yeniden kullanan chroma key motoru.
+    
+    Isınmadan sonra kare başına numpy ayırması yapmaz: ara sonuçlar (ölçekli
+    kare, HSV, maske) sabit tamponlara yazılır, alfa maskeden tek geçişte
+    uygulanır. lut verilirse HSV dönüşümü yapılmaz, alfa tablodan okunur.
+    Çıktı önceden çarpılmış RGBA'dır (FRAME_FORMAT).
+    
+    refine ile alfa çıktı çözünürlüğünde aşındırılıp/genişletilip yumuşatılır
+    ve arka plan rengi kenarlardan temizlenir (despill). Aşama süreleri
+    izlenir; toplamı refine_budget_ms'i aşarsa en pahalı aşama kapatılır.
+    
+    key_threads > 1 ise ölçeklenmiş kare yatay bantlara bölünür, her bant
+    kendi tamponlu alt keyer'ıyla KEY_POOL'da key'lenir. İyileştirme
+    komşu satırlara baktığından bantlar erode + dilate + feather satır payıyla
+    key'lenir; sonuç tek thread'li yolla birebir aynıdır. Düşük çözünürlüklü
+    maskede (mask_scale < 1) bant sınırları maskenin ölçekleme ızgarasına
+    denk gelmediğinden bantlara bölünmez.
+    """
+    def __init__(self, lower, upper, mask_scale=1.0, lut=None, refine=None):
+        self.set_range(lower, upper)
+        self.mask_scale = mask_scale
+        self.lut = lut
+        # Profildeki aşama adlarının öneki ("pet.resize", "preview.mask", ...)
+        self.profile_name = "pet"
+        self._buffers = {}
+        self.refine_budget_ms = REFINE_BUDGET_MS
+        self.set_refine(refine or {})
+        self.key_threads = 1
+        self._band_keyers = []
+    
+    @classmethod
+    def for_preset(cls, values, mask_scale=1.0):
+        ranges = preset_ranges(values)
+        lut = preset_lut(values) if preset_needs_lut(values) else None
+        keyer = cls(ranges[0][0], ranges[0][1], mask_scale, lut, preset_refine(values))
+        keyer.spill_channel = spill_channel(ranges)
+        return keyer
+    
+    def set_range(self, lower, upper):
+        self.lower = tuple(int(v) for v in lower)
+        self.upper = tuple(int(v) for v in upper)
+        self.spill_channel = spill_channel([(self.lower, self.upper)])
+    
+    def set_refine(self, refine):
+        """İyileştirme ayarlarını uygula; bütçe yüzünden kapatılan aşamalar yeniden açılır"""
+        self.refine = dict(preset_refine({}), **refine)
+        self.refine_stages = [stage for stage, on in (
+            ("morph", self.refine['erode'] > 0 or self.refine['dilate'] > 0),
+            ("feather", self.refine['feather'] > 0),
+            ("despill", self.refine['despill'] > 0)) if on]
+        # Aşama başına üstel ortalama süre (ms) ve bütçe yüzünden kapatılanlar
+        self.refine_cost = {}
+        self.refine_disabled = []
+        self._refine_frames = 0
+        self._kernels = {}
+    
+    @property
+    def refining(self):
+        return bool(self.refine_stages)
+    
+    def kernel(self, radius):
+        kernel = self._kernels.get(radius)
+        if kernel is None:
+            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * radius + 1, 2 * radius + 1))
+            self._kernels[radius] = kernel
+        return kernel
+    
+    def refine_alpha(self, color, alpha):
+        """Alfayı yerinde iyileştir; despill varsa temizlenmiş renk tamponunu döndür"""
+        refine = self.refine
+        profiling = PROFILER.enabled
+        t = start = time.perf_counter()
+        costs = {}
+        if "morph" in self.refine_stages:
+            if refine['erode'] > 0:
+                cv2.erode(alpha, self.kernel(refine['erode']), dst=alpha)
+            if refine['dilate'] > 0:
+                cv2.dilate(alpha, self.kernel(refine['dilate']), dst=alpha)
+            now = time.perf_counter()
+            costs["morph"], t = now - t, now
+        if "feather" in self.refine_stages:
+            size = 2 * refine['feather'] + 1
+            cv2.GaussianBlur(alpha, (size, size), 0, dst=alpha)
+            now = time.perf_counter()
+            costs["feather"], t = now - t, now
+        if "despill" in self.refine_stages and self.spill_channel is not None:
+            color = self.despill(color, refine['despill'])
+            now = time.perf_counter()
+            costs["despill"], t = now - t, now
+        for stage, seconds in costs.items():
+            if profiling:
+                PROFILER.record(f"{self.profile_name}.{stage}", seconds)
+            previous = self.refine_cost.get(stage)
+            ms = seconds * 1000
+            self.refine_cost[stage] = ms if previous is None else previous * 0.9 + ms * 0.1
+        self.check_refine_budget()
+        return color
+    
+    def check_refine_budget(self):
+        """Isınmadan sonra ortalama toplam bütçeyi aşıyorsa en pahalı aşamayı kapat"""
+        self._refine_frames += 1
+        if self._refine_frames < REFINE_WARMUP:
+            return
+        active = {stage: self.refine_cost.get(stage, 0.0) for stage in self.refine_stages}
+        if sum(active.values()) <= self.refine_budget_ms:
+            return
+        stage = max(active, key=active.get)
+        self.refine_stages.remove(stage)
+        self.refine_disabled.append(stage)
+        # Kalan aşamalar kendi süreleriyle yeniden değerlendirilsin
+        self._refine_frames = 0
+    
+    def despill(self, color, strength):
+        """Baskın kanalı diğer ikisinin büyüğüne doğru çek (yeşil zeminde G <= max(R, B))"""
+        h, w = color.shape[:2]
+        out = self.buffer('despill', (h, w, 3))
+        np.copyto(out, color)
+        channel = self.spill_channel
+        a, b = [c for c in range(3) if c != channel]
+        limit = np.maximum(color[:, :, a], color[:, :, b], out=self.buffer('spill_limit', (h, w)))
+        if strength >= 1.0:
+            np.minimum(color[:, :, channel], limit, out=out[:, :, channel])
+            return out
+        np.minimum(color[:, :, channel], limit, out=limit)
+        excess = np.subtract(color[:, :, channel], limit, out=self.buffer('spill_excess', (h, w)))
+        scaled = np.multiply(excess, int(strength * 256), out=self.buffer('spill_scaled', (h, w), np.uint16),
+                             dtype=np.uint16)
+        np.right_shift(scaled, 8, out=scaled)
+        np.subtract(color[:, :, channel], scaled, out=out[:, :, channel], casting='unsafe')
+        return out
+    
+    def compose_alpha(self, color, alpha, out):
+        """Renk + alfa -> önceden çarpılmış RGBA (iyileştirme varsa önce uygulanır)"""
+        if self.refine_stages:
+            color = self.refine_alpha(color, alpha)
+        cv2.cvtColor(color, cv2.COLOR_BGR2RGBA, dst=out)
+        out[:, :, 3] = alpha
+        # Yumuşak kenarlarda renkleri alfayla çarp
+        cv2.cvtColor(out, cv2.COLOR_RGBA2mRGBA, dst=out)
+        return out
+    
+    def buffer(self, name, shape, dtype=None):
+        if dtype is None:
+            dtype = np.uint8
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buf
+        return buf
+    
+    def release_buffers(self):
+        """Ara tamponları bırak; sonraki key ilk karede yeniden ayırır"""
+        self._buffers.clear()
+        self._band_keyers = []
+    
+    def band_count(self, rows):
+        return max(1, min(self.key_threads, rows // KEY_BAND_MIN_ROWS))
+    
+    def refine_halo(self):
+        """İyileştirmenin bir satırı etkileyebildiği komşu satır sayısı"""
+        refine = self.refine
+        halo = 0
+        if "morph" in self.refine_stages:
+            halo += refine['erode'] + refine['dilate']
+        if "feather" in self.refine_stages:
+            halo += refine['feather']
+        return halo
+    
+    def band_keyers(self, count):
+        """Bant başına alt keyer'lar; ayarlar her karede bu keyer'dan kopyalanır"""
+        while len(self._band_keyers) < count:
+            self._band_keyers.append(ChromaKeyer(self.lower, self.upper))
+        del self._band_keyers[count:]
+        for band in self._band_keyers:
+            band.lower, band.upper = self.lower, self.upper
+            band.lut = self.lut
+            band.mask_scale = self.mask_scale
+            band.spill_channel = self.spill_channel
+            band.profile_name = self.profile_name
+            band.refine = self.refine
+            band._kernels = self._kernels
+            band.refine_stages = list(self.refine_stages)
+            # Bütçe kararı bu keyer'da, bantların duvar saati süresiyle verilir
+            band.refine_budget_ms = float('inf')
+        return self._band_keyers
+    
+    def key_bands(self, color, out):
+        """Ölçeklenmiş kareyi bantlar halinde paralel key'le (out'a yazılır)"""
+        h = color.shape[0]
+        bands = self.band_keyers(self.band_count(h))
+        halo = self.refine_halo() if self.refine_stages else 0
+        executor = KEY_POOL.executor(len(bands) - 1)
+        futures = []
+        for i, band in enumerate(bands):
+            y0, y1 = h * i // len(bands), h * (i + 1) // len(bands)
+            top, bottom = max(0, y0 - halo), min(h, y1 + halo)
+            args = (color[top:bottom], out[y0:y1], y0 - top)
+            if i == 0:
+                first = args
+            else:
+                futures.append(executor.submit(band.key_band, *args))
+        bands[0].key_band(*first)
+        for future in futures:
+            future.result()
+        if self.refine_stages:
+            # Bantlar eşzamanlı koştuğundan bir bandın süresi karenin duvar saati süresidir
+            self.refine_cost = dict(bands[0].refine_cost)
+            self.check_refine_budget()
+        return out
+    
+    def key_band(self, color, out, top):
+        """Satır paylı bandı key'le; payı atıp yalnız kendi satırlarını out'a yaz"""
+        if top == 0 and color.shape[0] == out.shape[0]:
+            self.key(color, 1.0, out)
+            return
+        keyed = self.key(color, 1.0)
+        np.copyto(out, keyed[top:top + out.shape[0]])
+    
+    def lut_alpha(self, source):
+        """Alfa kanalını tek tablo okumasıyla hesapla (HSV dönüşümü yok)"""
+        h, w = source.shape[:2]
+        quantized = cv2.LUT(source, lut_shift(), dst=self.buffer('lut_quantized', (h, w, 3)))
+        # np.take intp indeks ister; başka tipte her karede kopya çıkarır
+        index = self.buffer('lut_index', (h, w), np.intp)
+        part = self.buffer('lut_part', (h, w), np.intp)
+        np.left_shift(quantized[:, :, 0], 2 * LUT_BITS, out=index, dtype=np.intp)
+        np.left_shift(quantized[:, :, 1], LUT_BITS, out=part, dtype=np.intp)
+        np.bitwise_or(index, part, out=index)
+        np.bitwise_or(index, quantized[:, :, 2], out=index)
+        return np.take(self.lut, index, out=self.buffer('alpha', (h, w)), mode='clip')
+    
+    @staticmethod
+    def output_size(frame, scale):
+        h, w = frame.shape[:2]
+        return max(1, int(w * scale)), max(1, int(h * scale))
+    
+    def key(self, frame, scale=1.0, out=None):
+        """BGR kareyi ölçekleyip key'le; out verilirse sonuç oraya yazılır.
+        
+        Keying hiçbir zaman kaynak çözünürlükten büyük yapılmaz: küçültmede önce
+        ölçeklenir, büyütmede key'lenmiş sonuç büyütülür. mask_scale < 1 ise
+        maske daha da küçük hesaplanıp hedef boyuta büyütülür.
+        """
+        profiling = PROFILER.enabled
+        out_w, out_h = self.output_size(frame, scale)
+        if out is None:
+            out = self.buffer('out', (out_h, out_w, 4))
+        if scale > 1.0:
+            keyed = self.key(frame, 1.0, self.buffer('source_out', frame.shape[:2] + (4,)))
+            if profiling:
+                t = time.perf_counter()
+            cv2.resize(keyed, (out_w, out_h), dst=out, interpolation=cv2.INTER_LINEAR)
+            if profiling:
+                PROFILER.lap(self.profile_name + ".resize", t)
+            return out
+        
+        if profiling:
+            t = time.perf_counter()
+        # Scale uygula (keying'den önce: atılacak piksellerle uğraşma)
+        if (out_w, out_h) != (frame.shape[1], frame.shape[0]):
+            color = cv2.resize(frame, (out_w, out_h), dst=self.buffer('color', (out_h, out_w, 3)),
+                               interpolation=cv2.INTER_AREA)
+        else:
+            color = frame
+        
+        if self.key_threads > 1 and self.mask_scale == 1.0 and self.band_count(out_h) > 1:
+            if profiling:
+                t = PROFILER.lap(self.profile_name + ".resize", t)
+            self.key_bands(color, out)
+            if profiling:
+                PROFILER.lap(self.profile_name + ".bands", t)
+            return out
+        
+        mask_w, mask_h = max(1, int(out_w * self.mask_scale)), max(1, int(out_h * self.mask_scale))
+        if (mask_w, mask_h) != (out_w, out_h):
+            mask_source = cv2.resize(color, (mask_w, mask_h), dst=self.buffer('mask_source', (mask_h, mask_w, 3)),
+                                     interpolation=cv2.INTER_AREA)
+        else:
+            mask_source = color
+        if profiling:
+            t = PROFILER.lap(self.profile_name + ".resize", t)
+        
+        if self.lut is not None:
+            alpha = self.lut_alpha(mask_source)
+            if (mask_w, mask_h) != (out_w, out_h):
+                alpha = cv2.resize(alpha, (out_w, out_h), dst=self.buffer('alpha_full', (out_h, out_w)),
+                                   interpolation=cv2.INTER_LINEAR)
+            if profiling:
+                t = PROFILER.lap(self.profile_name + ".mask", t)
+            self.compose_alpha(color, alpha, out)
+            if profiling:
+                PROFILER.lap(self.profile_name + ".compose", t)
+            return out
+        
+        # HSV ile chroma key
+        hsv = cv2.cvtColor(mask_source, cv2.COLOR_BGR2HSV, dst=self.buffer('hsv', (mask_h, mask_w, 3)))
+        if profiling:
+            t = PROFILER.lap(self.profile_name + ".convert", t)
+        mask = cv2.inRange(hsv, self.lower, self.upper, dst=self.buffer('mask', (mask_h, mask_w)))
+        if (mask_w, mask_h) != (out_w, out_h):
+            mask = cv2.resize(mask, (out_w, out_h), dst=self.buffer('mask_full', (out_h, out_w)),
+                              interpolation=cv2.INTER_NEAREST)
+        if profiling:
+            t = PROFILER.lap(self.profile_name + ".mask", t)
+        
+        if self.refine_stages:
+            # Maske arka planı işaretler; iyileştirme ön plan alfası üzerinde yapılır
+            alpha = cv2.bitwise_not(mask, dst=self.buffer('refine_alpha', (out_h, out_w)))
+            self.compose_alpha(color, alpha, out)
+            if profiling:
+                PROFILER.lap(self.profile_name + ".compose", t)
+            return out
+        
+        # BGR -> RGBA, sonra maskelenen piksellerin dört kanalı da tek geçişte sıfırlanır
+        # (alfa 0 ya da 255 olduğundan sonuç zaten önceden çarpılmış sayılır)
+        cv2.cvtColor(color, cv2.COLOR_BGR2RGBA, dst=out)
+        cv2.subtract(out, (255, 255, 255, 255), dst=out, mask=mask)
+        if profiling:
+            PROFILER.lap(self.profile_name + ".compose", t)
+        return out
+    
+    def key_hsv(self, rgba, hsv, out):
+        """Hazır HSV ve RGBA kopyasından yalnız maske + birleştirme (canlı ayar için)"""
+        profiling = PROFILER.enabled
+        if profiling:
+            t = time.perf_counter()
+        mask = cv2.inRange(hsv, self.lower, self.upper, dst=self.buffer('mask', hsv.shape[:2]))
+        if profiling:
+            t = PROFILER.lap(self.profile_name + ".mask", t)
+        np.copyto(out, rgba)
+        cv2.subtract(out, (255, 255, 255, 255), dst=out, mask=mask)
+        if profiling:
+            PROFILER.lap(self.profile_name + ".compose", t)
+        return out
+
+
+def qimage_to_array(image):
+    """QImage piksellerini kopyalamadan (h, w, 4) numpy görünümü olarak döndür"""
+    ptr = image.bits()
+    ptr.setsize(image.sizeInBytes())
+    return np.frombuffer(ptr, dtype=np.uint8).reshape(image.height(), image.width(), 4)
+
+
+def frame_to_qimage(frame):
+    """numpy kareyi kopyalamadan QImage olarak sar (kare yaşadığı sürece geçerli)"""
+    h, w, ch = frame.shape
+    return QImage(frame.data, w, h, frame.strides[0], FRAME_FORMAT)
+
+
+def preset_hash(hsv_values):
+    return hashlib.sha1(json.dumps(hsv_values, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def sprite_path_for(video_path, hsv_values, scale=1.0):
+    """Klip + preset + ölçek için sprite yolu; aynı klibin başka preset/ölçekteki sprite'ı ezilmez"""
+    key = f"{os.path.abspath(video_path)}\0{preset_hash(hsv_values)}\0{round(scale, 3):g}"
+    return os.path.join(SPRITE_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".wfsprite")
+
+
+def lut_hash(values):
+    """Preset'in derlenen alfa tablosunu belirleyen kısa hash; LUT gerekmiyorsa None"""
+    if not preset_needs_lut(values):
+        return None
+    key = [[list(lower), list(upper)] for lower, upper in preset_ranges(values)] + [values.get('softness', 0)]
+    return hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()[:16]
+
+
+def write_json_atomic(path, data):
+    """Geçici dosyaya yazıp yerine taşı; yarım yazılmış dosya hiç görünmez"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class PresetStore(QObject):
+    """color_presets.json'un tek sahibi; widget'lar dosyaya değil buna bağlanır.
+    
+    Preset'ler bellekte ada göre indekslenir; değişiklikler PRESET_FLUSH_MS
+    içinde birleştirilip atomik olarak (geçici dosya + rename) yazılır. Dosya
+    dışarıdan değişirse (elle düzenleme, CLI) mtime'dan fark edilip yeniden
+    okunur; henüz yazılmamış yerel değişiklikler korunur. Üst veri (küçük
+    resim, klip yolu, LUT hash'i) PRESET_META_FILE'da tutulur.
+    
+    Her yazışta dosyanın tamamı yeniden yazılır: JSON'a yerinde ekleme
+    yapılamaz, atomik rename zaten tam bir dosya ister ve dosya birkaç KB'lık
+    birkaç düzine preset'ten ibarettir. Yazmalar PRESET_FLUSH_MS içinde
+    birleştirildiğinden sürgü sürüklemek de tek bir yazışa iner.
+    """
+    preset_changed = pyqtSignal(str)
+    preset_removed = pyqtSignal(str)
+    # Dosya dışarıdan değişip baştan okundu
+    reloaded = pyqtSignal()
+    # Bekleyen değişiklikler yazılamadı (hata metni); hata sürdükçe bir kez
+    save_failed = pyqtSignal(str)
+    
+    def __init__(self, path=PRESETS_FILE, meta_path=PRESET_META_FILE, parent=None, watch=True):
+        super().__init__(parent)
+        self.path = path
+        self.meta_path = meta_path
+        self._presets = {}
+        self._meta = {}
+        # Yazılmamış değişiklikler: ad -> True (eklendi/değişti) ya da False (silindi)
+        self._dirty = {}
+        # Silinen preset'lerin küçük resimleri; yazış başarılı olunca silinir
+        self._orphans = set()
+        self._stamp = None
+        self.error = None
+        self.writes = 0
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.reload_if_changed)
+        self.load()
+        if watch:
+            self.poll_timer.start(PRESET_POLL_MS)
+    
+    def __len__(self):
+        return len(self._presets)
+    
+    def __contains__(self, name):
+        return name in self._presets
+    
+    def names(self):
+        return list(self._presets)
+    
+    def items(self):
+        return list(self._presets.items())
+    
+    def get(self, name, default=None):
+        return self._presets.get(name, default)
+    
+    def meta(self, name):
+        return self._meta.get(name, {})
+    
+    def file_stamp(self):
+        stamps = []
+        for path in (self.path, self.meta_path):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stamps.append(None)
+            else:
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(stamps)
+    
+    def load(self):
+        """Dosyaları oku; bozuksa (ör. elle düzenlenirken) eldeki veri korunur, False"""
+        stamp = self.file_stamp()
+        try:
+            presets = self.read_json(self.path)
+            meta = self.read_json(self.meta_path)
+        except (OSError, ValueError):
+            return False
+        self._stamp = stamp
+        # Yazılmamış yerel değişiklikler diskteki sürümün üstüne uygulanır
+        for name, present in self._dirty.items():
+            if present:
+                presets[name] = self._presets[name]
+                meta[name] = self._meta.get(name, {})
+            else:
+                presets.pop(name, None)
+                meta.pop(name, None)
+        self._presets = presets
+        self._meta = {name: meta[name] for name in presets if name in meta}
+        return True
+    
+    @staticmethod
+    def read_json(path):
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def reload_if_changed(self):
+        if self.file_stamp() == self._stamp:
+            return False
+        if self.load():
+            self.reloaded.emit()
+            return True
+        return False
+    
+    def put(self, name, values, **meta):
+        """Preset'i ekle/güncelle; meta: thumbnail, clip (lut_hash kendiliğinden hesaplanır)"""
+        self._presets[name] = values
+        entry = dict(self._meta.get(name, {}), **meta)
+        entry['lut_hash'] = lut_hash(values)
+        entry['modified'] = time.time()
+        self._meta[name] = entry
+        self.mark_dirty(name, True)
+        self.preset_changed.emit(name)
+    
+    def update_meta(self, name, **meta):
+        if name not in self._presets:
+            return
+        self._meta[name] = dict(self._meta.get(name, {}), **meta)
+        self.mark_dirty(name, True)
+        self.preset_changed.emit(name)
+    
+    def remove(self, name):
+        if name not in self._presets:
+            return
+        del self._presets[name]
+        thumbnail = self._meta.pop(name, {}).get('thumbnail')
+        if thumbnail:
+            self._orphans.add(thumbnail)
+        self.mark_dirty(name, False)
+        self.preset_removed.emit(name)
+    
+    def save_thumbnail(self, name, image):
+        """Key'lenmiş önizleme karesini küçültüp PNG olarak kaydet, yolunu döndür"""
+        os.makedirs(PRESET_THUMB_DIR, exist_ok=True)
+        path = os.path.join(PRESET_THUMB_DIR, hashlib.sha1(name.encode("utf-8")).hexdigest()[:16] + ".png")
+        image.scaled(PRESET_THUMB_SIZE, PRESET_THUMB_SIZE, Qt.KeepAspectRatio,
+                     Qt.SmoothTransformation).save(path)
+        return path
+    
+    def mark_dirty(self, name, present):
+        self._dirty[name] = present
+        # Olay döngüsü yoksa (CLI) zamanlayıcı çalışmaz; çağıran flush() eder
+        if QCoreApplication.instance() is not None and not self.flush_timer.isActive():
+            self.flush_timer.start(PRESET_FLUSH_MS)
+    
+    def flush(self):
+        """Bekleyen değişiklikleri şimdi yaz (kapanışta ve CLI'da doğrudan çağrılır)
+        
+        Yazılamazsa False döner; değişiklikler bellekte kalır ve yeniden denenir.
+        """
+        self.flush_timer.stop()
+        if not self._dirty:
+            return True
+        # Başka bir süreç bu arada yazdıysa onun değişiklikleri kaybolmasın;
+        # dosya okunamıyorsa (ör. yarım elle düzenleme) üstüne yazılmaz
+        if self.file_stamp() != self._stamp:
+            if not self.load():
+                return self.flush_failed(f"{self.path} okunamadı, dışarıdaki değişiklik ezilmedi")
+            self.reloaded.emit()
+        try:
+            write_json_atomic(self.path, self._presets)
+            write_json_atomic(self.meta_path, self._meta)
+        except OSError as e:
+            return self.flush_failed(str(e))
+        self._dirty.clear()
+        self._stamp = self.file_stamp()
+        self.writes += 1
+        self.error = None
+        # Aynı adla yeniden eklenen preset küçük resmini yeniden kullanmış olabilir
+        in_use = {entry.get('thumbnail') for entry in self._meta.values()}
+        for thumbnail in self._orphans - in_use:
+            try:
+                os.remove(thumbnail)
+            except OSError:
+                pass
+        self._orphans.clear()
+        return True
+    
+    def flush_failed(self, message):
+        if message != self.error:
+            self.error = message
+            self.save_failed.emit(message)
+        if QCoreApplication.instance() is not None:
+            self.flush_timer.start(PRESET_POLL_MS)
+        return False
+
+
+class PlaybackClock:
+    """Klibin kendi fps'ine göre monotonic saatle hangi karenin gösterileceğini hesaplar"""
+    def __init__(self):
+        self.native_fps = DEFAULT_FPS
+        self.max_fps = 0
+        self.presented_frames = 0
+        self.dropped_frames = 0
+        self.late_frames = 0
+        self.deadline = 0.0
+        self._start = 0.0
+        self._last_target = -1
+        self._paused_at = None
+    
+    @property
+    def effective_fps(self):
+        if self.max_fps > 0:
+            return min(self.native_fps, self.max_fps)
+        return self.native_fps
+    
+    def frame_stride(self):
+        """fps sınırı yüzünden her tick'te atlanan kaynak kare sayısı (alt sınır)"""
+        return max(1, int(self.native_fps / self.effective_fps))
+    
+    def start(self, native_fps):
+        # Bozuk/eksik metadata için güvenli varsayılan
+        if not native_fps or native_fps <= 0 or native_fps > 240:
+            native_fps = DEFAULT_FPS
+        self.native_fps = native_fps
+        self.presented_frames = self.dropped_frames = self.late_frames = 0
+        self._last_target = -1
+        self._paused_at = None
+        self._start = self.deadline = time.monotonic()
+    
+    def pause(self, now):
+        if self._paused_at is None:
+            self._paused_at = now
+    
+    def resume(self, now):
+        """Durduğu kareden devam et; duraklama süresi atlanmış kare sayılmaz"""
+        if self._paused_at is None:
+            return
+        self._start += now - self._paused_at
+        self._paused_at = None
+        self.schedule_next(now)
+    
+    def set_max_fps(self, fps):
+        """0 = sınırsız (klibin kendi fps'i)"""
+        self.max_fps = fps
+        self.schedule_next(time.monotonic())
+    
+    def mark_late(self):
+        """Tüketici zamanında hazır kare bulamadığında çağırır"""
+        self.late_frames += 1
+    
+    def due(self, now):
+        """Zamanı geldiyse gösterilecek kaynak kare numarasını, yoksa None döndür.
+        
+        Kare numarası döngüde sıfırlanmaz; geride kalınca aradaki kareler
+        atlanır ve dropped_frames'e sayılır.
+        """
+        if now < self.deadline:
+            return None
+        interval = 1.0 / self.effective_fps
+        if now - self.deadline > interval / 2:
+            self.late_frames += 1
+        
+        target = int((now - self._start) * self.native_fps)
+        result = None
+        if target > self._last_target:
+            if self._last_target >= 0:
+                expected = math.ceil(self.native_fps / self.effective_fps)
+                skipped = target - self._last_target - expected
+                if skipped > 0:
+                    self.dropped_frames += skipped
+            self._last_target = target
+            self.presented_frames += 1
+            result = target
+        self.schedule_next(now)
+        return result
+    
+    def schedule_next(self, now):
+        interval = 1.0 / self.effective_fps
+        n = int((now - self._start) / interval) + 1
+        self.deadline = self._start + n * interval
+    
+    def stats(self):
+        return {
+            'fps': self.effective_fps,
+            'presented': self.presented_frames,
+            'dropped': self.dropped_frames,
+            'late': self.late_frames,
+        }
+
+
+def on_battery():
+    """Pille çalışılıyorsa True; öğrenilemiyorsa False (prize takılı sayılır)"""
+    if psutil is not None:
+        battery = psutil.sensors_battery()
+        return battery is not None and not battery.power_plugged
+    mains = []
+    for supply in glob.glob("/sys/class/power_supply/*"):
+        try:
+            with open(os.path.join(supply, "type")) as f:
+                if f.read().strip() != "Mains":
+                    continue
+            with open(os.path.join(supply, "online")) as f:
+                mains.append(f.read().strip() == "1")
+        except OSError:
+            continue
+    return bool(mains) and not any(mains)
+
+
+class PowerPolicy:
+    """Pet'lerin görünürlüğüne, kullanıcı etkinliğine ve güç kaynağına göre oynatma kipi seçer.
+    
+    FROZEN: pet ekran dışında, gizli ya da pencere sistemi onu görünmez
+    bildiriyor; kare çözülmez, saat durur. THROTTLED: kullanıcı boşta, pilde
+    ya da kontrol penceresi küçültülmüş; fps throttle_fps'e iner. Aksi halde FULL.
+    Etkinlik, imlecin hareket edip etmediğinden anlaşılır.
+    """
+    FULL, THROTTLED, FROZEN = "full", "throttled", "frozen"
+    MODES = (FULL, THROTTLED, FROZEN)
+    
+    def __init__(self):
+        self.enabled = True
+        self.throttle_fps = POWER_THROTTLE_FPS
+        self.idle_seconds = POWER_IDLE_SECONDS
+        self.throttle_on_battery = True
+        self.control_minimized = False
+        self.on_battery = False
+        # Kiplerde geçirilen toplam pet-saniye
+        self.mode_seconds = dict.fromkeys(self.MODES, 0.0)
+        self._cursor = None
+        self._last_input = time.monotonic()
+        self._battery_checked = None
+        self._accounted_at = None
+    
+    def configure(self, enabled, throttle_fps, idle_seconds, throttle_on_battery):
+        self.enabled = enabled
+        self.throttle_fps = throttle_fps
+        self.idle_seconds = idle_seconds
+        self.throttle_on_battery = throttle_on_battery
+    
+    def note_input(self, now):
+        self._last_input = now
+    
+    def poll(self, now):
+        """İmleç hareketini ve (seyrek) güç kaynağını kontrol et"""
+        cursor = QCursor.pos()
+        if cursor != self._cursor:
+            self._cursor = cursor
+            self._last_input = now
+        if self._battery_checked is None or now - self._battery_checked >= BATTERY_CHECK_SECONDS:
+            self._battery_checked = now
+            self.on_battery = on_battery()
+    
+    def idle(self, now):
+        return now - self._last_input >= self.idle_seconds
+    
+    def base_mode(self, now):
+        """Görünür bir pet'in kipi (pet'ten bağımsız koşullar)"""
+        if not self.enabled:
+            return self.FULL
+        if self.control_minimized or self.idle(now) or (self.throttle_on_battery and self.on_battery):
+            return self.THROTTLED
+        return self.FULL
+    
+    def pet_mode(self, pet, base):
+        if not self.enabled:
+            return self.FULL
+        if not pet.isVisible() or pet.isMinimized():
+            return self.FROZEN
+        handle = pet.windowHandle()
+        if handle is not None and not handle.isExposed():
+            return self.FROZEN
+        geometry = pet.frameGeometry()
+        if not any(screen.geometry().intersects(geometry) for screen in QApplication.screens()):
+            return self.FROZEN
+        return base
+    
+    def stop_accounting(self):
+        """Pet kalmadı; bir sonraki account aradaki süreyi saymasın"""
+        self._accounted_at = None
+    
+    def account(self, modes, now):
+        """Son çağrıdan bu yana geçen süreyi pet'lerin kiplerine yaz"""
+        if self._accounted_at is not None:
+            elapsed = now - self._accounted_at
+            for mode in modes:
+                self.mode_seconds[mode] += elapsed
+        self._accounted_at = now
+    
+    def max_fps(self, mode, user_max_fps):
+        """Kipe göre akışa uygulanacak fps sınırı (0 = sınırsız)"""
+        if mode == self.THROTTLED and self.throttle_fps > 0:
+            return min(user_max_fps, self.throttle_fps) if user_max_fps else self.throttle_fps
+        return user_max_fps
+
+
+def msec_until(deadline):
+    return max(0, math.ceil((deadline - time.monotonic()) * 1000))
+
+
+class PlaybackScheduler(QObject):
+    """Tek bir PlaybackClock'u hassas QTimer ile süren zamanlayıcı"""
+    # Şu anda ekranda olması gereken kaynak kare numarası
+    tick = pyqtSignal(int)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.clock = PlaybackClock()
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.on_timeout)
+    
+    def start(self, native_fps):
+        self.clock.start(native_fps)
+        self.timer.start(0)
+    
+    def stop(self):
+        self.timer.stop()
+    
+    def pause(self):
+        self.timer.stop()
+        self.clock.pause(time.monotonic())
+    
+    def resume(self):
+        """Durduğu kareden devam et"""
+        self.clock.resume(time.monotonic())
+        self.timer.start(msec_until(self.clock.deadline))
+    
+    def on_timeout(self):
+        target = self.clock.due(time.monotonic())
+        if target is not None:
+            self.tick.emit(target)
+        self.timer.start(msec_until(self.clock.deadline))
+
+
+class StageProfiler:
+    """Kare hattının aşama sürelerini sabit boyutlu halkalarda toplar.
+    
+    Kapalıyken çağıranlar yalnızca enabled bayrağına bakar, saat okunmaz.
+    Aşama adları "hat.aşama" biçimindedir (ör. "pet.decode", "preview.paint");
+    ".interval" ile bitenler iki gösterim arası süredir ve fps'e çevrilir.
+    """
+    COLUMNS = ('stage', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'fps')
+    
+    def __init__(self, samples=PROFILE_SAMPLES):
+        self.enabled = False
+        self.samples = samples
+        # aşama -> [ölçüm halkası, toplam ölçüm sayısı]
+        self._rings = {}
+        self._lock = threading.Lock()
+    
+    def set_enabled(self, enabled):
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+    
+    def reset(self):
+        with self._lock:
+            self._rings.clear()
+    
+    def record(self, stage, seconds):
+        with self._lock:
+            ring = self._rings.get(stage)
+            if ring is None:
+                ring = self._rings[stage] = [np.zeros(self.samples), 0]
+            ring[0][ring[1] % self.samples] = seconds
+            ring[1] += 1
+    
+    def lap(self, stage, start):
+        """start'tan bu yana geçen süreyi kaydet ve şimdiki zamanı döndür"""
+        now = time.perf_counter()
+        self.record(stage, now - start)
+        return now
+    
+    def snapshot(self):
+        """aşama -> (toplam ölçüm sayısı, halkadaki ölçümlerin kopyası)"""
+        with self._lock:
+            return {stage: (count, values[:min(count, self.samples)].copy())
+                    for stage, (values, count) in self._rings.items()}
+    
+    def summary(self):
+        """aşama -> {count, mean_ms, p50_ms, p95_ms, p99_ms, fps}"""
+        result = {}
+        for stage, (count, values) in sorted(self.snapshot().items()):
+            mean = values.mean()
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            fps = 1.0 / mean if stage.endswith('.interval') and mean > 0 else None
+            result[stage] = {'count': count, 'mean_ms': mean * 1000, 'p50_ms': p50 * 1000,
+                             'p95_ms': p95 * 1000, 'p99_ms': p99 * 1000, 'fps': fps}
+        return result
+    
+    def export_csv(self, path):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.COLUMNS)
+            for stage, row in self.summary().items():
+                writer.writerow([stage] + ['' if row[c] is None else row[c] for c in self.COLUMNS[1:]])
+    
+    def export_json(self, path):
+        """Özetle birlikte halkadaki ham ölçümleri (ms) de yaz"""
+        data = {'samples': self.samples, 'summary': self.summary(),
+                'raw_ms': {stage: (values * 1000).round(4).tolist()
+                           for stage, (count, values) in self.snapshot().items()}}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+
+
+PROFILER = StageProfiler()
+
+
+class FrameRingBuffer:
+    """Üretici thread ile GUI arasında sınırlı kare tamponu; öğeler (kare no, kare, ...)
+    
+    on_discard verilirse gösterilmeden atılan her öğe için çağrılır (ör. kare
+    yuvasını havuza geri vermek için).
+    """
+    def __init__(self, capacity=FRAME_BUFFER_SIZE, drop_oldest=False, on_discard=None):
+        self.capacity = capacity
+        self.on_discard = on_discard
+        # drop_oldest=False: tampon doluyken üretici bekler (backpressure)
+        # drop_oldest=True: en eski kare atılır, üretici hiç beklemez
+        self.drop_oldest = drop_oldest
+        self.dropped = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+    
+    def put(self, item):
+        """Kareyi ekle; tampon kapatıldıysa False döner"""
+        with self._cond:
+            while len(self._items) >= self.capacity and not self._closed:
+                if self.drop_oldest:
+                    self._discard(self._items.popleft())
+                    self.dropped += 1
+                    break
+                self._cond.wait()
+            if self._closed:
+                return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+    
+    def pop_until(self, seq):
+        """Numarası seq'i geçmeyen en yeni kareyi al, öncekileri at.
+        
+        Hazır kare yoksa None döner (GUI thread'i asla beklemez).
+        """
+        with self._cond:
+            item = None
+            while self._items and self._items[0][0] <= seq:
+                if item is not None:
+                    self._discard(item)
+                item = self._items.popleft()
+            if item is not None:
+                self._cond.notify_all()
+            return item
+    
+    def free_slots(self):
+        with self._cond:
+            return self.capacity - len(self._items)
+    
+    def clear(self):
+        with self._cond:
+            self._discard_all()
+            self._cond.notify_all()
+    
+    def close(self):
+        """Bekleyen üreticiyi uyandır ve yeni kare kabul etme"""
+        with self._cond:
+            self._closed = True
+            self._discard_all()
+            self._cond.notify_all()
+    
+    def _discard(self, item):
+        if self.on_discard is not None:
+            self.on_discard(item)
+    
+    def _discard_all(self):
+        while self._items:
+            self._discard(self._items.popleft())
+
+
+class ChangeDetector:
+    """Ardışık karelerde değişen karoları küçük bir özetten bulur.
+    
+    Özet, karenin alan ortalamasıyla küçültülmüş halidir: her piksel bir
+    hücreye katkı verir, göz kırpma gibi küçük ama keskin değişimler de
+    hücreyi oynatır. Kare, özetin iki katından küçük kalana dek her eksende
+    yarılanır (alan ortalamasının hızlı yolu); kalan oran 2'nin altında olduğu
+    için son adımdaki doğrusal ölçekleme de hiçbir pikseli atlamaz. Karo, en çok değişen hücresine göre
+    değerlendirilir. Referans yalnızca değişti denen karolarda güncellenir;
+    eşik altındaki yavaş değişimler birikip ekrandaki kareden uzaklaşamaz.
+    Eşiğin de altında kalan bir değişiklik en geç max_skip karede bir yapılan
+    tam yenilemeyle ekrana gelir.
+    """
+    def __init__(self, grid=CHANGE_GRID, threshold=CHANGE_THRESHOLD, cells=CHANGE_CELLS,
+                 max_skip=CHANGE_MAX_SKIP):
+        self.grid = grid
+        self.cells = cells
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.tile_count = grid * grid
+        side = grid * cells
+        self._summary = np.empty((side, side, 3), np.uint8)
+        self._diff = np.empty((side, side, 3), np.uint8)
+        self._reference = None
+        # Son tam yenilemeden beri geçen kare sayısı
+        self._since_full = 0
+    
+    def dirty_tiles(self, frame):
+        """Değişen karoların (grid, grid) bool maskesi; referans yoksa ya da tam
+        yenileme zamanı geldiyse None (hepsi)"""
+        g, c = self.grid, self.cells
+        side = g * c
+        h, w = frame.shape[:2]
+        while h >= side * 2 or w >= side * 2:
+            h, w = (h // 2 if h >= side * 2 else h), (w // 2 if w >= side * 2 else w)
+            frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+        cv2.resize(frame, (side, side), dst=self._summary, interpolation=cv2.INTER_LINEAR)
+        self._since_full += 1
+        if self._reference is None or self._since_full >= self.max_skip:
+            self._reference = self._summary.copy()
+            self._since_full = 0
+            return None
+        cv2.absdiff(self._summary, self._reference, dst=self._diff)
+        dirty = self._diff.reshape(g, c, g, c * 3).max(axis=(1, 3)) > self.threshold
+        np.copyto(self._reference.reshape(g, c, g, c * 3), self._summary.reshape(g, c, g, c * 3),
+                  where=dirty[:, None, :, None])
+        return dirty
+    
+    def dirty_rect(self, dirty, width, height, margin=2):
+        """Değişen karoları kapsayan dikdörtgen, width x height çıktı koordinatlarında.
+        
+        margin, ölçekleme filtresinin karo sınırından taşan etkisini karşılar.
+        """
+        g = self.grid
+        rows = np.flatnonzero(dirty.any(axis=1))
+        cols = np.flatnonzero(dirty.any(axis=0))
+        x0 = max(0, cols[0] * width // g - margin)
+        y0 = max(0, rows[0] * height // g - margin)
+        x1 = min(width, -(-(cols[-1] + 1) * width // g) + margin)
+        y1 = min(height, -(-(rows[-1] + 1) * height // g) + margin)
+        return QRect(int(x0), int(y0), int(x1 - x0), int(y1 - y0))
+
+
+def unite_dirty(a, b):
+    """İki değişen alanı birleştir; None tüm kare, boş QRect değişiklik yok demek"""
+    if a is None or b is None:
+        return None
+    return a.united(b)
+
+
+class FrameSlot:
+    """Önceden ayrılmış kare yuvası: QImage ve aynı belleğe yazan numpy görünümü.
+    
+    Görünüm QImage'in belleğini kopyalamadan gösterdiği için ikisi birlikte
+    tutulur; yuva yaşadığı sürece görünüm geçerlidir.
+    """
+    __slots__ = ('image', 'pixels')
+    
+    def __init__(self, width, height):
+        self.image = QImage(width, height, FRAME_FORMAT)
+        self.pixels = qimage_to_array(self.image)
+
+
+class FrameCache:
+    """Döngü videoları için key'lenmiş, ölçeklenmiş karelerin LRU bellek önbelleği"""
+    def __init__(self, limit_mb=FRAME_CACHE_LIMIT_MB):
+        self.enabled = True
+        self.max_bytes = limit_mb * 1024 * 1024
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(video_path, preset_digest, mask_scale, scale, refine_disabled=()):
+        # Dosya değişirse eski kareler kullanılmasın diye mtime/boyut da anahtarda;
+        # süre bütçesiyle kapatılan iyileştirme aşamaları da: görünüm farklıdır
+        stat = os.stat(video_path)
+        return (os.path.abspath(video_path), stat.st_mtime, stat.st_size,
+                preset_digest, mask_scale, round(scale, 3), tuple(sorted(refine_disabled)))
+    
+    def fits(self, nbytes):
+        return self.enabled and nbytes <= self.max_bytes
+    
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def put(self, key, frames, nbytes):
+        """Kareleri sakla, gerekirse en az kullanılanları at"""
+        if not self.fits(nbytes):
+            return False
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (frames, nbytes)
+            self.total_bytes += nbytes
+            self._evict()
+        return True
+    
+    def set_limit(self, limit_mb):
+        with self._lock:
+            self.max_bytes = limit_mb * 1024 * 1024
+            self._evict()
+    
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self.clear()
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+    
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.total_bytes -= nbytes
+
+
+FRAME_CACHE = FrameCache()
+
+
+class FrameSource:
+    """Sırayla BGR kare veren çözücü arayüzü; çözme süresini kendisi ölçer.
+    
+    read(out) out'u yeniden kullanabilir; dönen kare bir sonraki read'e
+    kadar geçerlidir. Tur sonunda (False, None) döner, rewind() başa sarar.
+    """
+    backend = ""
+    # Başa sarma seek/çözücü boşaltma gerektirmiyorsa True (boşluksuz döngü gereksiz)
+    rewind_is_cheap = False
+    
+    def __init__(self):
+        self.fps = DEFAULT_FPS
+        self.frame_count = 0
+        self.decoded_frames = 0
+        self.decode_seconds = 0.0
+    
+    @property
+    def decode_fps(self):
+        """Saf çözme hızı (kare/sn); bekleme ve keying hariç"""
+        return self.decoded_frames / self.decode_seconds if self.decode_seconds > 0 else 0.0
+    
+    def read(self, out=None):
+        start = time.perf_counter()
+        ret, frame = self._read(out)
+        self.decode_seconds += time.perf_counter() - start
+        if ret:
+            self.decoded_frames += 1
+        return ret, frame
+    
+    def grab(self):
+        """Kareyi göstermeden geç (arka uç izin veriyorsa renk dönüşümü yapmadan)"""
+        return self.read()[0]
+    
+    def request_fill(self, pool):
+        pass
+    
+    def seek(self, index):
+        """index'inci kareye git; varsayılan: başa sarıp kareleri geç"""
+        self.rewind()
+        for _ in range(index):
+            if not self.grab():
+                break
+    
+    def _read(self, out):
+        raise NotImplementedError
+    
+    def rewind(self):
+        raise NotImplementedError
+    
+    def release(self):
+        pass
+
+
+class OpenCVSource(FrameSource):
+    """cv2.VideoCapture (FFmpeg); threads > 0 ise çözücü thread sayısı sabitlenir"""
+    backend = "opencv"
+    
+    def __init__(self, path, threads=0):
+        super().__init__()
+        params = [cv2.CAP_PROP_N_THREADS, threads] if threads > 0 else []
+        try:
+            self.cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG, params)
+        except (cv2.error, TypeError):
+            # Eski OpenCV parametre listesini desteklemez
+            self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Video açılamadı: {path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    
+    def _read(self, out):
+        return self.cap.read(out)
+    
+    def grab(self):
+        start = time.perf_counter()
+        ret = self.cap.grab()
+        self.decode_seconds += time.perf_counter() - start
+        if ret:
+            self.decoded_frames += 1
+        return ret
+    
+    def rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    
+    def seek(self, index):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+    
+    def release(self):
+        self.cap.release()
+
+
+def pyav_error():
+    """PyAV'ın çözücü hata sınıfı: eski sürümlerde av.AVError, yenilerde av.error.FFmpegError"""
+    return getattr(av, 'AVError', None) or av.error.FFmpegError
+
+
+class PyAVSource(FrameSource):
+    """PyAV (libav) ile çözme; kurulu değilse açılamaz"""
+    backend = "pyav"
+    
+    def __init__(self, path, threads=0):
+        super().__init__()
+        if av is None:
+            raise ValueError("PyAV kurulu değil (pip install av)")
+        try:
+            self.container = av.open(path)
+            self.stream = self.container.streams.video[0]
+        except ImportError as e:
+            raise ValueError(f"PyAV yüklenemedi ({e})")
+        except (pyav_error(), IndexError) as e:
+            raise ValueError(f"Video açılamadı: {path} ({e})")
+        self.stream.thread_type = "AUTO"
+        if threads > 0:
+            self.stream.codec_context.thread_count = threads
+        self.fps = float(self.stream.average_rate or DEFAULT_FPS)
+        self.frame_count = self.stream.frames
+        self._frames = self.container.decode(self.stream)
+    
+    def _read(self, out):
+        # PyAV her kare için yeni dizi döndürür; out kullanılamaz
+        try:
+            frame = next(self._frames)
+        except (StopIteration, pyav_error()):
+            return False, None
+        return True, frame.to_ndarray(format="bgr24")
+    
+    def rewind(self):
+        self.container.seek(0)
+        self._frames = self.container.decode(self.stream)
+    
+    def release(self):
+        self.container.close()
+
+
+class ImageSequenceSource(FrameSource):
+    """Kare klasörü (ada göre sıralı) ya da GIF/APNG/WebP animasyonu.
+    
+    Klasördeki kareler okundukça çözülür; animasyon dosyaları açılışta bir kez
+    çözülüp bellekte tutulur (sprite boyutunda klipler için).
+    """
+    backend = "images"
+    rewind_is_cheap = True
+    
+    def __init__(self, path):
+        super().__init__()
+        self._paths = None
+        self._frames = None
+        if os.path.isdir(path):
+            self._paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                                 if name.lower().endswith(IMAGE_EXTENSIONS))
+            if not self._paths:
+                raise ValueError(f"Klasörde kare yok: {path}")
+            self.frame_count = len(self._paths)
+        else:
+            # Açılıştaki toplu çözme, çözme hızına bu karelerin süresi olarak yansır
+            start = time.perf_counter()
+            self._frames, durations = self.load_animation(path)
+            self.decode_seconds = time.perf_counter() - start
+            self.decoded_frames = self.frame_count = len(self._frames)
+            if durations and np.mean(durations) > 0:
+                self.fps = 1000.0 / float(np.mean(durations))
+        self._size = None
+        self._index = 0
+    
+    @staticmethod
+    def load_animation(path):
+        """(BGR kareler, kare süreleri ms)"""
+        frames, durations = [], []
+        if hasattr(cv2, "imreadanimation"):
+            ok, animation = cv2.imreadanimation(path)
+            if ok:
+                frames, durations = list(animation.frames), list(animation.durations)
+        if not frames:
+            # Eski OpenCV: GIF'i FFmpeg üzerinden oku
+            cap = cv2.VideoCapture(path)
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.append(frame)
+            cap.release()
+        if not frames:
+            raise ValueError(f"Animasyon okunamadı: {path}")
+        frames = [cv2.cvtColor(f, cv2.COLOR_BGRA2BGR) if f.ndim == 3 and f.shape[2] == 4 else f
+                  for f in frames]
+        return frames, durations
+    
+    def read(self, out=None):
+        if self._frames is not None:
+            # Bellekteki animasyon karesi; çözme sayılmaz
+            return self._read(out)
+        return super().read(out)
+    
+    def _read(self, out):
+        if self._index >= self.frame_count:
+            return False, None
+        if self._paths is not None:
+            frame = cv2.imread(self._paths[self._index], cv2.IMREAD_COLOR)
+            if frame is None:
+                return False, None
+        else:
+            frame = self._frames[self._index]
+        self._index += 1
+        # Farklı boyuttaki kareler ilk karenin boyutuna getirilir
+        h, w = frame.shape[:2]
+        if self._size is None:
+            self._size = (w, h)
+        elif (w, h) != self._size:
+            frame = cv2.resize(frame, self._size, interpolation=cv2.INTER_AREA)
+        return True, frame
+    
+    def rewind(self):
+        self._index = 0
+    
+    def seek(self, index):
+        self._index = min(index, self.frame_count)
+
+
+class PrefetchSource(FrameSource):
+    """Başka bir kaynağı ortak havuzda depth kare önden çözen sarmalayıcı.
+    
+    Kuyruk boşsa read() kareyi kendisi çözer, havuzu beklemez. Kare dizileri
+    geri dönüştürülür. Döngü boşluksuzdur: ilk turda baştaki loop_head kare
+    kalıcı olarak saklanır ve opener ile açılan yedek kaynak boş anlarda
+    loop_head'inci kareye konumlandırılır. Tur bitince baştaki kareler
+    bellekten verilir ve yedek kaynağa geçilir; başa sarma (seek + çözücü
+    boşaltma) oynatma yolunda hiç yapılmaz. Yedek hazır değilse kaynak
+    hemen başa sarılıp sonraki tur önden çözülür.
+    """
+    def __init__(self, source, depth=PREFETCH_FRAMES, loop_head=0, opener=None):
+        super().__init__()
+        self.source = source
+        self.depth = depth
+        self.loop_head = loop_head if opener is not None else 0
+        self.backend = source.backend
+        self.fps = source.fps
+        self.frame_count = source.frame_count
+        # Kuyruktan verilen / kaynaktan bekletilerek çözülen kare sayıları
+        self.hits = 0
+        self.misses = 0
+        # Yedek kaynağa geçilerek seek'siz dönülen tur sayısı
+        self.gapless_loops = 0
+        # Kareler ya da tur sonu için None
+        self._queue = deque()
+        self._free = deque()
+        self._returned = None
+        self._lock = threading.Lock()
+        self._future = None
+        self._at_start = True
+        self._source_ended = False
+        self._closed = False
+        # Baştaki kareler (kalıcı kopyalar) ve kaynağın sıradaki kare no'su
+        self._opener = opener
+        self._head = []
+        self._head_ids = set()
+        self._head_complete = False
+        self._head_index = None
+        self._position = 0
+        self._spare = None
+        self._spare_ready = False
+    
+    @property
+    def decode_fps(self):
+        sources = [self.source] + ([self._spare] if self._spare is not None else [])
+        seconds = sum(source.decode_seconds for source in sources)
+        return sum(source.decoded_frames for source in sources) / seconds if seconds > 0 else 0.0
+    
+    def request_fill(self, pool):
+        if self._closed:
+            return
+        if len(self._queue) >= self.depth and not self._spare_pending():
+            return
+        if self._future is not None and not self._future.done():
+            return
+        self._future = pool.submit(self.fill)
+    
+    def fill(self):
+        while not self._closed and len(self._queue) < self.depth:
+            with self._lock:
+                if self._closed:
+                    return
+                item = self._decode()
+                self._queue.append(item)
+                # Kareler hiç çözülemiyorsa tur sonu işaretleriyle dolmasın
+                if item is None and self._position == 0:
+                    return
+        # Kuyruk dolu: boş zamanda yedek kaynağı hazırla
+        if self._spare_pending():
+            self._prepare_spare()
+    
+    def _spare_pending(self):
+        return self._head_complete and not self._spare_ready and self._opener is not None
+    
+    def _prepare_spare(self):
+        """Yedek kaynağı loop_head'inci kareye getir; kilit tutulmaz (oynatma sürer)"""
+        spare = self._spare
+        try:
+            if spare is None:
+                spare = self._opener()
+            else:
+                spare.rewind()
+            for _ in range(len(self._head)):
+                if not spare.grab():
+                    raise ValueError("Yedek kaynak konumlanamadı")
+        except (ValueError, cv2.error):
+            # Yedek açılamıyor: döngü başa sarmayla sürer
+            self._opener = None
+            if spare is not None and spare is not self._spare:
+                spare.release()
+            return
+        with self._lock:
+            if self._closed:
+                spare.release()
+                return
+            self._spare = spare
+            self._spare_ready = True
+    
+    def _decode(self):
+        """Sıradaki kareyi ver (kilit altında); tur sonunda None"""
+        if self._source_ended:
+            self._source_ended = False
+            if self._head_complete and self._spare_ready:
+                # Yedek kaynak zaten baştaki karelerin sonrasında bekliyor
+                self.source, self._spare = self._spare, self.source
+                self._spare_ready = False
+                self._position = len(self._head)
+                self._head_index = 0
+                self.gapless_loops += 1
+            else:
+                self.source.rewind()
+                self._position = 0
+        if self._head_index is not None:
+            frame = self._head[self._head_index]
+            self._head_index += 1
+            if self._head_index == len(self._head):
+                self._head_index = None
+            return frame
+        out = self._free.popleft() if self._free else None
+        ret, frame = self.source.read(out)
+        if not ret:
+            self._source_ended = True
+            self._end_pass()
+            return None
+        self._collect_head(frame)
+        self._position += 1
+        return frame
+    
+    def _collect_head(self, frame):
+        if self._head_complete or self._position != len(self._head):
+            return
+        if self._position == self.loop_head:
+            # Tur baştaki karelerden uzun: yedek kaynak bu turda hazırlanabilir
+            self._head_complete = self.loop_head > 0
+            return
+        if not self._head:
+            # Büyük karelerde bellek sınırı içinde kalacak kadar kare saklanır
+            self.loop_head = min(self.loop_head, LOOP_HEAD_LIMIT_MB * 1024 * 1024 // frame.nbytes)
+            if self.loop_head == 0:
+                return
+        head = frame.copy()
+        self._head.append(head)
+        self._head_ids.add(id(head))
+    
+    def _end_pass(self):
+        # Baştaki kareler ancak tur onlardan uzunsa ve hepsi sırayla çözüldüyse kullanılır
+        if not self._head_complete:
+            self._head.clear()
+            self._head_ids.clear()
+    
+    def _recycle(self, item):
+        if item is not None and id(item) not in self._head_ids:
+            self._free.append(item)
+    
+    def _read(self, out):
+        if self._returned is not None:
+            self._recycle(self._returned)
+            self._returned = None
+        try:
+            item = self._queue.popleft()
+            self.hits += 1
+        except IndexError:
+            with self._lock:
+                if self._queue:
+                    item = self._queue.popleft()
+                    self.hits += 1
+                else:
+                    item = self._decode()
+                    self.misses += 1
+        if item is None:
+            self._at_start = True
+            return False, None
+        self._at_start = False
+        self._returned = item
+        return True, item
+    
+    def read(self, out=None):
+        # Süre sarmalanan kaynakta ölçülür; burada yalnızca kuyruktan alınır
+        return self._read(out)
+    
+    def grab(self):
+        # Önden çözülmüş kare varsa onu at; yoksa kaynakta renk dönüşümsüz geç
+        with self._lock:
+            if not self._queue and not self._source_ended and self._head_index is None:
+                if self.source.grab():
+                    self._position += 1
+                    self._at_start = False
+                    return True
+                self._source_ended = True
+                self._end_pass()
+                self._at_start = True
+                return False
+        return self.read()[0]
+    
+    def rewind(self):
+        """Tur başındaysa (sonraki tur zaten önden çözülüyor) bir şey yapma"""
+        if self._at_start:
+            return
+        with self._lock:
+            while self._queue:
+                self._recycle(self._queue.popleft())
+            self.source.rewind()
+            self._source_ended = False
+            self._head_index = None
+            self._position = 0
+            if not self._head_complete:
+                self._head.clear()
+                self._head_ids.clear()
+        self._at_start = True
+    
+    def seek(self, index):
+        """Kuyruğu boşalt ve kaynağı index'inci kareye konumla"""
+        if index <= 0:
+            self.rewind()
+            return
+        with self._lock:
+            while self._queue:
+                self._recycle(self._queue.popleft())
+            self.source.seek(index)
+            self._source_ended = False
+            self._head_index = None
+            self._position = index
+            if not self._head_complete:
+                # Baştaki kareler bu turda toplanamaz; sonraki turda yeniden denenir
+                self._head.clear()
+                self._head_ids.clear()
+        self._at_start = False
+    
+    def release(self):
+        self._closed = True
+        future = self._future
+        if future is not None:
+            # Çözme hatası okuyanın kendi çözmesinde yeniden görülür; burada yalnızca beklenir
+            future.exception()
+        with self._lock:
+            self._queue.clear()
+            self._head.clear()
+            self.source.release()
+            if self._spare is not None:
+                self._spare.release()
+                self._spare = None
+
+
+def open_source(path, backend="auto", threads=0, prefetch=0):
+    """path için çözücü aç; açılamazsa ValueError.
+    
+    Klasör ve animasyon dosyaları her zaman ImageSequenceSource ile açılır;
+    backend yalnızca video dosyalarının çözücüsünü seçer (auto: OpenCV).
+    prefetch > 0 ise kaynak PrefetchSource ile sarılır.
+    """
+    if os.path.isdir(path) or path.lower().endswith(ANIMATION_EXTENSIONS):
+        backend = "images"
+    if backend == "images":
+        source = ImageSequenceSource(path)
+    elif backend == "pyav":
+        source = PyAVSource(path, threads)
+    else:
+        source = OpenCVSource(path, threads)
+    if prefetch > 0:
+        # Başa sarması pahalı kaynaklarda döngü yedek kaynakla boşluksuz yapılır
+        loop_head = 0 if source.rewind_is_cheap else LOOP_HEAD_FRAMES
+        source = PrefetchSource(source, prefetch, loop_head, lambda: open_source(path, backend, threads))
+    return source
+
+
+class SpriteFile:
+    """Önceden key'lenmiş sprite dosyası; kareler mmap üzerinden kopyasız okunur"""
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Geçersiz sprite dosyası: {path}")
+        
+        (magic, version, self.width, self.height, self.frame_count, self.fps, self.scale,
+         self.source_mtime, self.source_size, digest) = SPRITE_HEADER.unpack_from(self._mmap, 0)
+        self.preset_hash = digest.decode("ascii")
+        
+        expected = SPRITE_DATA_OFFSET + self.frame_count * self.height * self.width * 4
+        if magic != SPRITE_MAGIC or version != SPRITE_VERSION or len(self._mmap) < expected or self.frame_count == 0:
+            self.close()
+            raise ValueError(f"Geçersiz sprite dosyası: {path}")
+        
+        self.frames = np.ndarray((self.frame_count, self.height, self.width, 4), dtype=np.uint8,
+                                 buffer=self._mmap, offset=SPRITE_DATA_OFFSET)
+    
+    def is_valid_for(self, video_path, hsv_values, scale=1.0):
+        """Kaynak video (mtime/boyut) ve preset değişmediyse, ölçek de tutuyorsa True"""
+        if not os.path.exists(video_path):
+            return False
+        stat = os.stat(video_path)
+        return (self.source_mtime == stat.st_mtime and self.source_size == stat.st_size
+                and self.preset_hash == preset_hash(hsv_values) and round(self.scale, 3) == round(scale, 3))
+    
+    def frame_image(self, index):
+        """index'teki kareyi kopyasız QImage olarak döndür.
+        
+        QImage kare görünümüne referans tutar: sprite kapatılsa da (ör. rebind
+        eski akışı durdurunca) pet'in hâlâ çizdiği kare geçerli kalır.
+        """
+        pixels = self.frames[index]
+        image = frame_to_qimage(pixels)
+        image.owner = (self, pixels)
+        return image
+    
+    def close(self):
+        # mmap.close() çağrılmaz: numpy görünümleri tampon kilidi tutmadığı için
+        # hâlâ çizilen bir karenin altından eşlem kalkardı. Referanslar bırakılır,
+        # eşlem son kare görünümüyle (ve QImage'iyle) birlikte kapanır.
+        self.frames = None
+        self._mmap = None
+        self._file.close()
+    
+    @staticmethod
+    def open_for(video_path, hsv_values, scale=1.0):
+        """Video + preset + ölçek için geçerli sprite varsa aç, yoksa None.
+        
+        Başka ölçekte pişirilmiş sprite kullanılmaz: her çizimde yeniden
+        ölçeklemek pişirmenin kazancını yok ederdi; akış normal çözmeye döner.
+        """
+        path = sprite_path_for(video_path, hsv_values, scale)
+        if not os.path.exists(path):
+            return None
+        try:
+            sprite = SpriteFile(path)
+        except (OSError, ValueError, struct.error):
+            return None
+        if not sprite.is_valid_for(video_path, hsv_values, scale):
+            sprite.close()
+            return None
+        return sprite
+
+
+def bake_sprite(video_path, hsv_values, scale=1.0, out_path=None, progress=None, should_stop=None,
+                backend="auto", threads=0):
+    """Videoyu preset ile key'leyip sprite dosyasına yaz, dosya yolunu döndür"""
+    out_path = out_path or sprite_path_for(video_path, hsv_values, scale)
+    keyer = ChromaKeyer.for_preset(hsv_values)
+    # Çevrimdışı pişirmede kare süresi sınırı yok; iyileştirme aşamaları kapatılmaz
+    keyer.refine_budget_ms = float('inf')
+    stat = os.stat(video_path)
+    
+    try:
+        source = open_source(video_path, backend, threads)
+    except ValueError as e:
+        raise IOError(str(e))
+    fps = source.fps or 30.0
+    total = source.frame_count
+    
+    out_dir = os.path.dirname(out_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    tmp_path = out_path + ".tmp"
+    frame_count, size, frame = 0, None, None
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(b"\0" * SPRITE_DATA_OFFSET)
+            while True:
+                if should_stop and should_stop():
+                    raise InterruptedError("Sprite oluşturma iptal edildi")
+                ret, frame = source.read(frame if frame_count else None)
+                if not ret:
+                    break
+                keyed = keyer.key(frame, scale)
+                if size is None:
+                    size = (keyed.shape[1], keyed.shape[0])
+                f.write(keyed.data)
+                frame_count += 1
+                if progress:
+                    progress(frame_count, total)
+            
+            if frame_count == 0:
+                raise IOError(f"Video okunamadı: {video_path}")
+            f.seek(0)
+            f.write(SPRITE_HEADER.pack(SPRITE_MAGIC, SPRITE_VERSION, size[0], size[1], frame_count,
+                                       fps, scale, stat.st_mtime, stat.st_size,
+                                       preset_hash(hsv_values).encode("ascii")))
+        os.replace(tmp_path, out_path)
+    finally:
+        source.release()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return out_path
+
+
+class SpriteBakeWorker(QThread):
+    """Sprite dosyasını GUI'yi dondurmadan arka planda oluşturur"""
+    progress = pyqtSignal(int, int)
+    finished_ok = pyqtSignal(str)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, video_path, hsv_values, scale):
+        super().__init__()
+        self.video_path = video_path
+        self.hsv_values = hsv_values
+        self.scale = scale
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        try:
+            path = bake_sprite(self.video_path, self.hsv_values, self.scale,
+                               progress=self.progress.emit, should_stop=self._stop_event.is_set)
+        except (IOError, OSError, InterruptedError) as e:
+            self.failed.emit(str(e))
+            return
+        self.finished_ok.emit(path)
+    
+    def stop(self):
+        self._stop_event.set()
+        self.wait()
+
+
+def sample_frames(source, count):
+    """Klipten eşit aralıklı en fazla count kare üret (dönen kare bir sonrakine kadar geçerli)"""
+    total = source.frame_count if source.frame_count > 0 else count
+    stride = max(1, total // count)
+    if stride >= BG_SEEK_STRIDE:
+        # Uzun klip: aradaki kareleri çözmek yerine doğrudan konumlan
+        for index in range(0, stride * count, stride):
+            source.seek(index)
+            ret, frame = source.read()
+            if not ret:
+                return
+            yield frame
+        return
+    for index in range(stride * count):
+        if index % stride:
+            if not source.grab():
+                return
+            continue
+        ret, frame = source.read()
+        if not ret:
+            return
+        yield frame
+
+
+def hsv_in_range(pixels, lower, upper):
+    """(N, 3) HSV pikseller için aralık içi maskesi; lower hue > upper hue ise dolanır"""
+    h, sat, val = pixels[:, 0], pixels[:, 1], pixels[:, 2]
+    if lower[0] <= upper[0]:
+        inside = (h >= lower[0]) & (h <= upper[0])
+    else:
+        inside = (h >= lower[0]) | (h <= upper[0])
+    return inside & (sat >= lower[1]) & (sat <= upper[1]) & (val >= lower[2]) & (val <= upper[2])
+
+
+def fit_hsv_range(pixels):
+    """Piksellerin baskın grubunu (karanlık, gri/beyaz ya da renk tonu tepesi) saran aralık"""
+    h, sat, val = (pixels[:, i].astype(np.int16) for i in range(3))
+    dark = val < 60
+    gray = (sat < 40) & ~dark
+    chroma = ~dark & ~gray
+    kind = int(np.argmax([np.count_nonzero(dark), np.count_nonzero(gray), np.count_nonzero(chroma)]))
+    if kind == 0:
+        v_max = min(255, int(np.percentile(val[dark], 99)) + 10)
+        return (0, 0, 0), (179, 255, v_max)
+    if kind == 1:
+        v_min = max(0, int(np.percentile(val[gray], 1)) - 15)
+        s_max = min(255, int(np.percentile(sat[gray], 99)) + 15)
+        return (0, 0, v_min), (179, s_max, 255)
+    # Renk tonu histogramının (dairesel yumuşatılmış) tepesi etrafındaki pencere
+    hue = h[chroma]
+    hist = np.bincount(hue, minlength=180).astype(np.float32)
+    smooth = np.convolve(np.concatenate([hist[-2:], hist, hist[:2]]), np.ones(5), mode='valid')
+    peak = int(np.argmax(smooth))
+    offset = (hue - peak + 90) % 180 - 90
+    members = np.abs(offset) <= BG_HUE_WINDOW
+    low, high = np.percentile(offset[members], (1, 99))
+    s_min = max(0, int(np.percentile(sat[chroma][members], 1)) - 20)
+    v_min = max(0, int(np.percentile(val[chroma][members], 1)) - 20)
+    return ((peak + int(low) - 4) % 180, s_min, v_min), ((peak + int(high) + 4) % 180, 255, 255)
+
+
+def estimate_background(path, samples=BG_SAMPLE_FRAMES, backend="auto", threads=0):
+    """Klibin kenar piksellerinden arka plan rengini tahmin edip preset öner.
+    
+    Seyrek örneklenen kareler BG_ANALYSIS_WIDTH genişliğe küçültülüp HSV'ye
+    çevrilir; kenar bandındaki piksellere art arda aralık oturtulur. İlk
+    aralıktan sonrakiler en az iki kenarda görülmelidir (tek kenara değen
+    karakter aralık olmasın). Açılamazsa ValueError.
+    """
+    start = time.perf_counter()
+    source = open_source(path, backend, threads)
+    frames = []
+    try:
+        for frame in sample_frames(source, samples):
+            h, w = frame.shape[:2]
+            if w > BG_ANALYSIS_WIDTH:
+                size = (BG_ANALYSIS_WIDTH, max(1, round(h * BG_ANALYSIS_WIDTH / w)))
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2HSV))
+    finally:
+        source.release()
+    if not frames:
+        raise ValueError(f"Kare okunamadı: {path}")
+    
+    stack = np.stack(frames)
+    band = max(1, round(min(stack.shape[1:3]) * BG_BORDER))
+    sides = [stack[:, :band], stack[:, -band:], stack[:, band:-band, :band], stack[:, band:-band, -band:]]
+    side_sizes = np.array([side[..., 0].size for side in sides])
+    border = np.concatenate([side.reshape(-1, 3) for side in sides])
+    side_index = np.repeat(np.arange(4), side_sizes)
+    
+    ranges = []
+    remaining = np.ones(len(border), bool)
+    for _ in range(BG_MAX_RANGES):
+        if np.count_nonzero(remaining) < BG_MIN_RANGE_SHARE * len(border):
+            break
+        lower, upper = fit_hsv_range(border[remaining])
+        inside = hsv_in_range(border, lower, upper) & remaining
+        if np.count_nonzero(inside) < BG_MIN_RANGE_SHARE * len(border):
+            break
+        if ranges:
+            per_side = np.bincount(side_index[inside], minlength=4)
+            if np.count_nonzero(per_side >= BG_MIN_RANGE_SHARE * side_sizes) < 2:
+                break
+        ranges.append((lower, upper))
+        remaining &= ~inside
+    if not ranges:
+        raise ValueError("Belirgin bir arka plan rengi bulunamadı")
+    
+    values = {'lower': list(ranges[0][0]), 'upper': list(ranges[0][1])}
+    if len(ranges) > 1:
+        values['ranges'] = [{'lower': list(lower), 'upper': list(upper)} for lower, upper in ranges]
+    pixels = stack.reshape(-1, 3)
+    keyed = np.zeros(len(pixels), bool)
+    for lower, upper in ranges:
+        keyed |= hsv_in_range(pixels, lower, upper)
+    return {'preset': values,
+            'coverage': float(np.count_nonzero(keyed)) / len(pixels),
+            'border_coverage': 1.0 - float(np.count_nonzero(remaining)) / len(border),
+            'frames': len(frames), 'seconds': time.perf_counter() - start}
+
+
+class BackgroundEstimateWorker(QThread):
+    """Arka plan tahminini GUI'yi dondurmadan yapar"""
+    finished_ok = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, video_path):
+        super().__init__()
+        self.video_path = video_path
+    
+    def run(self):
+        try:
+            result = estimate_background(self.video_path)
+        except (ValueError, cv2.error) as e:
+            self.failed.emit(str(e))
+            return
+        self.finished_ok.emit(result)
+
+
+class FrameStream:
+    """Aynı klip + preset + ölçeği kullanan pet'lerin paylaştığı çözme/keying hattı.
+    
+    Üretici uzun ömürlü bir thread değil, ortak havuzda çalışan kısa "doldur"
+    görevleridir: tampon dolunca görev biter, PetManager tick'te yenisini ister.
+    Böylece pet sayısı ne olursa olsun çözme işi çekirdek sayısı kadar thread'e
+    yayılır. Önbelleğe alınmayan kareler sabit bir yuva havuzuna key'lenir;
+    gösterimi biten yuva tekrar kullanılır, kare başına QImage ayrılmaz.
+    
+    Öncekiyle aynı kareler key'lenmez; kısmen değişen karelerde pet'ler yalnız
+    değişen alanı (dirty_rect) yeniden çizer. Kareler seçilen çözücüden
+    PrefetchSource ile önden çözülerek alınır.
+    """
+    def __init__(self, key, video_path, hsv_values, scale, mask_scale=1.0, backend="auto", threads=0):
+        self.key = key
+        self.video_path = video_path
+        self.backend = backend
+        self.threads = threads
+        self.source = None
+        self.hsv_values = hsv_values
+        self.preset_hash = preset_hash(hsv_values)
+        self.scale_factor = scale
+        self.mask_scale = mask_scale
+        self.keyer = ChromaKeyer.for_preset(hsv_values, mask_scale)
+        self.pets = []
+        self.clock = PlaybackClock()
+        self.power_mode = PowerPolicy.FULL
+        self.frame_buffer = FrameRingBuffer(on_discard=self.discard)
+        self.current_image = None
+        # Son advance'te ekranda değişen alan: None tüm kare, QRect kısmi
+        self.dirty_rect = None
+        self.change_detector = ChangeDetector()
+        self.skipped_frames = 0
+        self.skipped_tiles = 0
+        self.total_tiles = 0
+        self._current = None
+        self._held = None
+        self._skipped_dirty = QRect()
+        self._free_slots = deque()
+        self.source_size = None
+        self.native_fps = DEFAULT_FPS
+        self.failed = None
+        # fps sınırı varsa keying'i atlanacak kare aralığı
+        self.frame_stride = 1
+        self._seq = 0
+        self._uncacheable = False
+        self._producer = None
+        self._future = None
+        self._stopped = False
+        self._lock = threading.Lock()
+    
+    def open(self):
+        """Çözücüyü aç, boyut ve fps için ilk kareyi oku; açılamazsa False"""
+        try:
+            source = open_source(self.video_path, self.backend, self.threads, PREFETCH_FRAMES)
+        except ValueError:
+            return False
+        ret, frame = source.read()
+        if not ret:
+            source.release()
+            return False
+        h, w = frame.shape[:2]
+        self.source_size = (w, h)
+        self.native_fps = source.fps
+        source.rewind()
+        self.source = source
+        return True
+    
+    def start(self):
+        self.clock.start(self.native_fps)
+        self.update_refine_budget()
+        self._producer = self.produce()
+    
+    def set_max_fps(self, fps):
+        self.clock.set_max_fps(fps)
+        self.frame_stride = self.clock.frame_stride()
+        self.update_refine_budget()
+    
+    def update_refine_budget(self):
+        """Maske iyileştirmesine kare aralığının REFINE_BUDGET_SHARE kadarını ayır"""
+        self.keyer.refine_budget_ms = REFINE_BUDGET_SHARE * 1000.0 / self.clock.effective_fps
+    
+    def request_fill(self, pool):
+        """Tamponda yer varsa ve çalışan görev yoksa havuza doldurma görevi ver"""
+        with self._lock:
+            if self._stopped or self.failed or self._producer is None:
+                return
+            if self._future is not None and not self._future.done():
+                return
+            if self.frame_buffer.free_slots() == 0:
+                # Tampon dolu; bu arada çözücü sonraki kareleri önden çözsün
+                self.source.request_fill(pool)
+                return
+            self._future = pool.submit(self.fill)
+    
+    def fill(self):
+        try:
+            while not self._stopped and self.frame_buffer.free_slots() > 0:
+                if not self.frame_buffer.put(next(self._producer)):
+                    return
+        except StopIteration:
+            if not self._stopped:
+                self.failed = "Video okunamadı!"
+        except cv2.error as e:
+            self.failed = str(e)
+    
+    def advance(self, now):
+        """Zamanı gelen kare hazırsa current_image ve dirty_rect'i güncelle.
+        
+        Ekranda yenilenecek bir şey varsa True döner; kare öncekiyle aynıysa False.
+        """
+        target = self.clock.due(now)
+        if target is None:
+            return False
+        item = self.frame_buffer.pop_until(target)
+        if item is None:
+            self.clock.mark_late()
+            return False
+        dirty = unite_dirty(self._skipped_dirty, item[3])
+        self._skipped_dirty = QRect()
+        if item[1] is None:
+            # Aynı kare işareti; arada gösterilmeden atılan değişmiş kare varsa o gösterilir
+            item, self._held = self._held, None
+            if item is None:
+                return False
+        else:
+            self.release_held()
+        previous, self._current = self._current, item
+        self.current_image = item[1]
+        self.dirty_rect = dirty
+        # Eski yuva hemen üreticiye döner: pet'ler yalnızca GUI thread'inde, bu
+        # tick bitip yeni kareyi aldıktan sonra çizildiği için eskisi bir daha çizilmez
+        if previous is not None and previous is not item:
+            self.release(previous)
+        return dirty is None or not dirty.isEmpty()
+    
+    def acquire_slot(self, width, height):
+        """Boştaki yuvayı al; yoksa yenisini ayır (havuz tampon boyutunda durulur)"""
+        try:
+            slot = self._free_slots.popleft()
+        except IndexError:
+            return FrameSlot(width, height)
+        if slot.image.width() != width or slot.image.height() != height:
+            return FrameSlot(width, height)
+        return slot
+    
+    def release(self, item):
+        """Gösterilmiş ya da atılmış karenin yuvasını havuza geri ver"""
+        slot = item[2]
+        if slot is not None:
+            self._free_slots.append(slot)
+    
+    def discard(self, item):
+        """Gösterilmeden atılan kare: değişen alanını biriktir, son key'leneni tut"""
+        self._skipped_dirty = unite_dirty(self._skipped_dirty, item[3])
+        if item[1] is not None:
+            self.release_held()
+            self._held = item
+    
+    def release_held(self):
+        if self._held is not None:
+            self.release(self._held)
+            self._held = None
+    
+    def detect_change(self, frame):
+        """(değişen alan, değişmeyen karo sayısı); alan None ise tüm kare, boşsa kare aynı"""
+        detector = self.change_detector
+        if detector is None:
+            return None, 0
+        if PROFILER.enabled:
+            t = time.perf_counter()
+            dirty = detector.dirty_tiles(frame)
+            PROFILER.lap("pet.detect", t)
+        else:
+            dirty = detector.dirty_tiles(frame)
+        if dirty is None:
+            return None, 0
+        clean = detector.tile_count - int(np.count_nonzero(dirty))
+        if clean == detector.tile_count:
+            return QRect(), clean
+        return detector.dirty_rect(dirty, *ChromaKeyer.output_size(frame, self.scale_factor)), clean
+    
+    def count_change(self, dirty, clean):
+        if self.change_detector is None:
+            return
+        self.total_tiles += self.change_detector.tile_count
+        self.skipped_tiles += clean
+        if dirty is not None and dirty.isEmpty():
+            self.skipped_frames += 1
+    
+    def produce(self):
+        """(kare no, QImage, yuva, değişen alan) üreten generator.
+        
+        Önbellekte varsa oradan oynatır. Önbellek karelerinin yuvası None'dır:
+        kalıcıdırlar, havuza dönmezler. Öncekiyle aynı kare key'lenmeden
+        (kare no, None, None, boş QRect) olarak geçer.
+        """
+        while True:
+            key = FrameCache.make_key(self.video_path, self.preset_hash, self.mask_scale, self.scale_factor,
+                                      self.keyer.refine_disabled)
+            frames = FRAME_CACHE.get(key)
+            if frames is not None:
+                yield from self.play_cached(frames)
+            else:
+                decoded = yield from self.stream_pass(self.source, key)
+                if decoded == 0:
+                    return
+    
+    def play_cached(self, frames):
+        """Önbellekteki (kare, değişen alan, temiz karo) kayıtlarını çözmeden oynat"""
+        # fps sınırıyla atlanan karelerin değişen alanları gösterilen kareye eklenir
+        dirty = QRect()
+        for image, frame_dirty, clean in frames:
+            seq = self._seq
+            self._seq += 1
+            dirty = unite_dirty(dirty, frame_dirty)
+            if seq % self.frame_stride == 0:
+                self.count_change(dirty, clean)
+                yield (seq, image, None, dirty)
+                dirty = QRect()
+    
+    def stream_pass(self, source, key):
+        """Videoyu baştan sona bir kez çöz; sığarsa kareleri önbelleğe yaz"""
+        source.rewind()
+        
+        # Kare sayısından tahmin: belli ki sığmayacaksa hiç toplamaya başlama
+        w, h = self.source_size
+        estimate = int(w * self.scale_factor) * int(h * self.scale_factor) * 4 * source.frame_count
+        collect = not self._uncacheable and FRAME_CACHE.fits(estimate)
+        pending, pending_bytes = [], 0
+        refine_disabled = len(self.keyer.refine_disabled)
+        
+        # Çözücü aynı diziye yazsın: kare başına yeni BGR dizisi ayrılmaz
+        # (önden çözmede diziler PrefetchSource içinde geri dönüştürülür)
+        frame = None
+        decoded = 0
+        while True:
+            seq = self._seq
+            # Önbelleğe toplamıyorsak gösterilmeyecek kareler çözülmeden geçilir
+            if not collect and seq % self.frame_stride != 0:
+                if not source.grab():
+                    break
+                self._seq += 1
+                decoded += 1
+                continue
+            
+            if PROFILER.enabled:
+                t = time.perf_counter()
+                ret, frame = source.read(frame)
+                PROFILER.lap("pet.decode", t)
+            else:
+                ret, frame = source.read(frame)
+            if not ret:
+                break
+            self._seq += 1
+            decoded += 1
+            
+            dirty, clean = self.detect_change(frame)
+            same = dirty is not None and dirty.isEmpty()
+            if same and collect and not pending:
+                # Önbelleğin ilk kaydı tekrar kullanacak bir önceki QImage bulamaz
+                dirty, clean, same = None, 0, False
+            self.count_change(dirty, clean)
+            
+            if not collect:
+                if same:
+                    yield (seq, None, None, dirty)
+                    continue
+                slot = self.acquire_slot(*ChromaKeyer.output_size(frame, self.scale_factor))
+                self.process_frame(frame, slot)
+                yield (seq, slot.image, slot, dirty)
+                continue
+            
+            # Önbellek toplarken aynı kare için önceki QImage tekrar kullanılır
+            if same:
+                image = pending[-1][0]
+            else:
+                image = self.process_frame(frame).image
+                pending_bytes += image.sizeInBytes()
+            pending.append((image, dirty, clean))
+            if not FRAME_CACHE.fits(pending_bytes):
+                # Çok büyük: streaming'e geri dön
+                self._uncacheable = True
+                collect, pending = False, []
+            yield (seq, image, None, dirty)
+        
+        if collect and pending:
+            if len(self.keyer.refine_disabled) == refine_disabled:
+                FRAME_CACHE.put(key, pending, pending_bytes)
+            # Bütçe tur ortasında bir aşamayı kapattıysa tur iki görünümü karışık
+            # içerir; saklanmaz, sonraki tur yeni anahtarla tutarlı toplanır
+        return decoded
+    
+    def process_frame(self, frame, slot=None):
+        # Keying doğrudan yuvanın QImage belleğine yazılır, ara kopya yok
+        # (QImage thread'ler arası güvenli; QPixmap değil)
+        if slot is None:
+            slot = FrameSlot(*ChromaKeyer.output_size(frame, self.scale_factor))
+        self.keyer.key(frame, self.scale_factor, slot.pixels)
+        return slot
+    
+    def stop(self):
+        """Doldurma görevini bitir ve videoyu serbest bırak"""
+        with self._lock:
+            self._stopped = True
+            future = self._future
+        self.frame_buffer.close()
+        self.release_held()
+        if future is not None:
+            future.result()
+        if self._producer is not None:
+            self._producer.close()
+            self._producer = None
+        if self.source is not None:
+            self.source.release()
+            self.source = None
+
+
+class SpriteStream:
+    """Sprite dosyasından oynatan akış; çözme ve keying yok"""
+    def __init__(self, key, sprite, scale):
+        self.key = key
+        self.sprite = sprite
+        self.scale_factor = scale
+        self.pets = []
+        self.clock = PlaybackClock()
+        self.power_mode = PowerPolicy.FULL
+        self.current_image = None
+        # Sprite kareleri her zaman bütün olarak çizilir; değişim tespiti yok
+        self.dirty_rect = None
+        self.skipped_frames = self.skipped_tiles = self.total_tiles = 0
+        self.failed = None
+        w, h = sprite.width / sprite.scale, sprite.height / sprite.scale
+        self.source_size = (int(round(w)), int(round(h)))
+    
+    def start(self):
+        self.clock.start(self.sprite.fps)
+    
+    def set_max_fps(self, fps):
+        self.clock.set_max_fps(fps)
+    
+    def request_fill(self, pool):
+        pass
+    
+    def advance(self, now):
+        target = self.clock.due(now)
+        if target is None:
+            return False
+        # Sprite pet'in ölçeğinde pişirildi; kare olduğu gibi, kopyasız çizilir
+        self.current_image = self.sprite.frame_image(target % self.sprite.frame_count)
+        return True
+    
+    def stop(self):
+        self.current_image = None
+        self.sprite.close()
+
+
+def process_context():
+    """Akış süreçleri her platformda 'spawn' ile açılır: Qt ve çözme
+    thread'leri çalışırken fork edilen çocuk kilitli bir mutex devralabilir"""
+    import multiprocessing
+    return multiprocessing.get_context("spawn")
+
+
+def take_slot(free_slots, stop):
+    """Boş yuva bekle; durdurulursa ya da ana süreç ölmüşse None"""
+    import multiprocessing
+    parent = multiprocessing.parent_process()
+    while not stop.is_set():
+        try:
+            return free_slots.get(timeout=0.5)
+        except queue.Empty:
+            # Ana süreç öldürüldüyse (SIGKILL) yetim kalmamak için çık
+            if parent is not None and not parent.is_alive():
+                return None
+    return None
+
+
+def run_stream_worker(spec, shm_name, free_slots, ready, stride, budget, shown, stop):
+    """Akış sürecinin gövdesi: kareleri çöz, key'le, paylaşılan bellekteki yuvalara yaz.
+    
+    Boş yuva numaraları free_slots'tan alınır (None: dur), yazılan kare
+    ready'ye ('frame', kare no, yuva) olarak bildirilir. shown'dan geride
+    kalan kareler key'lenmeden atlanır. Beklenen hatalar
+    ('error', mesaj) olarak gönderilir; beklenmeyen bir hata süreci düşürür,
+    ana süreç bunu fark edip yeniden başlatır.
+    """
+    from multiprocessing import shared_memory
+    # Her akışın kendi süreci var; OpenCV'nin iç thread'leri süreçleri boğmasın
+    cv2.setNumThreads(1)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    w, h = spec['size']
+    slots = [np.ndarray((h, w, 4), np.uint8, buffer=shm.buf, offset=i * w * h * 4) for i in range(spec['slots'])]
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="worker-decode")
+    source = None
+    try:
+        try:
+            source = open_source(spec['video_path'], spec['backend'], spec['threads'], PREFETCH_FRAMES)
+        except ValueError as e:
+            ready.put(('error', str(e)))
+            return
+        keyer = ChromaKeyer.for_preset(spec['hsv_values'], spec['mask_scale'])
+        seq = spec['start_seq']
+        if source.frame_count > 0:
+            # Yeniden başlatmada kalınan kareden devam edilir
+            source.seek(seq % source.frame_count)
+        frame = None
+        empty_passes = 0
+        while not stop.is_set():
+            source.request_fill(pool)
+            step = max(1, stride.value)
+            # Ekranın gerisinde kalan kareler çözülür ama key'lenmez (yetişme)
+            show = seq % step == 0 and seq + step > shown.value
+            if show:
+                ret, frame = source.read(frame)
+            else:
+                ret = source.grab()
+            if not ret:
+                # Tur sonu: kare no ilerlemez, sonraki tur baştan okunur
+                empty_passes += 1
+                if empty_passes > 1:
+                    ready.put(('error', "Video okunamadı!"))
+                    return
+                source.rewind()
+                continue
+            empty_passes = 0
+            if show:
+                slot = take_slot(free_slots, stop)
+                if slot is None:
+                    return
+                keyer.refine_budget_ms = budget.value
+                keyer.key(frame, spec['scale'], slots[slot])
+                ready.put(('frame', seq, slot))
+            seq += 1
+    finally:
+        if source is not None:
+            source.release()
+        pool.shutdown(wait=True)
+        del slots
+        shm.close()
+
+
+class SharedFrameRing:
+    """Paylaşılan bellekte sabit sayıda RGBA kare yuvası ve her birine kopyasız QImage.
+    
+    Halka kapatılsa (unlink) da bir pet'in hâlâ elinde tuttuğu kare geçerli
+    kalır: eşlem, son QImage bırakıldığında açıkça kapatılır. numpy görünümleri
+    tampon kilidi tutmadığı için bu sayım yapılmadan kapatmak çizilen karenin
+    altından belleği çekerdi.
+    """
+    def __init__(self, width, height, count):
+        from multiprocessing import shared_memory
+        self.width = width
+        self.height = height
+        slot_bytes = width * height * 4
+        self.shm = shared_memory.SharedMemory(create=True, size=slot_bytes * count)
+        self.images = []
+        self._live = 0
+        self._unlinked = False
+        for i in range(count):
+            pixels = np.ndarray((height, width, 4), np.uint8, buffer=self.shm.buf, offset=i * slot_bytes)
+            image = frame_to_qimage(pixels)
+            image.owner = pixels
+            # Halkaya QImage'den değil sonlandırıcıdan referans: döngü yok, GC beklenmez
+            weakref.finalize(image, self.image_released).atexit = False
+            self._live += 1
+            self.images.append(image)
+    
+    @property
+    def name(self):
+        return self.shm.name
+    
+    def __len__(self):
+        return len(self.images)
+    
+    def image_released(self):
+        self._live -= 1
+        self.close_if_unused()
+    
+    def close_if_unused(self):
+        if self._unlinked and self._live == 0 and self.shm is not None:
+            self.shm.close()
+            self.shm = None
+    
+    def unlink(self):
+        """Paylaşılan belleğin adını sil; eşlem son QImage ile birlikte kapanır"""
+        self.images = []
+        if not self._unlinked:
+            self._unlinked = True
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+        self.close_if_unused()
+
+
+class ProcessStream:
+    """Çözme ve keying'i ayrı bir süreçte yapan akış (süreç modu).
+    
+    Kareler SharedFrameRing yuvalarına yazılır, pet'ler onları kopyasız
+    QImage olarak çizer; GUI thread'ine yalnız yuva numaraları gelir, böylece
+    çözme/keying'in Python tarafı GIL'de GUI ile yarışmaz. Ekrandaki yuva
+    bir sonraki kare gösterilene kadar sürece geri verilmez.
+    
+    Süreç beklenmedik şekilde kapanırsa kalınan kareden yeniden başlatılır;
+    PROCESS_RESTART_WINDOW içinde PROCESS_MAX_RESTARTS'tan fazla çökerse
+    akış hata verir. Değişim tespiti ve döngü önbelleği bu modda yoktur.
+    """
+    def __init__(self, key, video_path, hsv_values, scale, mask_scale=1.0, backend="auto", threads=0):
+        self.key = key
+        self.video_path = video_path
+        self.hsv_values = hsv_values
+        self.scale_factor = scale
+        self.mask_scale = mask_scale
+        self.backend = backend
+        self.threads = threads
+        self.pets = []
+        self.clock = PlaybackClock()
+        self.power_mode = PowerPolicy.FULL
+        self.current_image = None
+        self.dirty_rect = None
+        self.skipped_frames = self.skipped_tiles = self.total_tiles = 0
+        self.failed = None
+        self.source_size = None
+        self.native_fps = DEFAULT_FPS
+        self.ring = None
+        self.process = None
+        self.free_slots = self.ready = None
+        self.restarts = 0
+        # Süreçten gelen, henüz gösterilmemiş (kare no, yuva) kayıtları
+        self._pending = deque()
+        self._current = None
+        self._last_seq = -1
+        self._crashes = deque()
+        self._stopped = False
+    
+    def open(self):
+        """İlk kareden boyut ve fps'i öğren, kare yuvalarını ayır ve süreci başlat.
+        
+        Açılamazsa False; süreç başlatılamadıysa nedeni failed'dadır.
+        """
+        try:
+            source = open_source(self.video_path, self.backend, self.threads)
+        except ValueError:
+            return False
+        try:
+            ret, frame = source.read()
+        finally:
+            source.release()
+        if not ret:
+            return False
+        h, w = frame.shape[:2]
+        self.source_size = (w, h)
+        self.native_fps = source.fps
+        self.ring = SharedFrameRing(*ChromaKeyer.output_size(frame, self.scale_factor), PROCESS_SLOTS)
+        try:
+            self.spawn(0)
+        except (RuntimeError, OSError) as e:
+            # ör. __main__ korumasız gömülü çalıştırma: spawn ana modülü yeniden yükleyemez
+            self.failed = f"Çözme/keying süreci başlatılamadı ({e})"
+            self.process = None
+            self.close_channels()
+            self.ring.unlink()
+            self.ring = None
+            return False
+        return True
+    
+    def start(self):
+        self.clock.start(self.native_fps)
+    
+    def refine_budget(self):
+        return REFINE_BUDGET_SHARE * 1000.0 / self.clock.effective_fps
+    
+    def spawn(self, start_seq):
+        """Süreci start_seq'inci kareden başlat; ekrandaki dışındaki yuvalar ona verilir"""
+        ctx = process_context()
+        self.free_slots = ctx.Queue()
+        self.ready = ctx.Queue()
+        self.stride = ctx.Value('i', self.clock.frame_stride(), lock=False)
+        self.budget = ctx.Value('d', self.refine_budget(), lock=False)
+        self.shown = ctx.Value('q', max(start_seq - 1, 0), lock=False)
+        self.stop_event = ctx.Event()
+        self._pending.clear()
+        for slot in range(len(self.ring)):
+            if slot != self._current:
+                self.free_slots.put(slot)
+        spec = {'video_path': self.video_path, 'hsv_values': self.hsv_values, 'scale': self.scale_factor,
+                'mask_scale': self.mask_scale, 'backend': self.backend, 'threads': self.threads,
+                'size': (self.ring.width, self.ring.height), 'slots': len(self.ring), 'start_seq': start_seq}
+        self.process = ctx.Process(target=run_stream_worker, name="pet-stream", daemon=True,
+                                   args=(spec, self.ring.name, self.free_slots, self.ready,
+                                         self.stride, self.budget, self.shown, self.stop_event))
+        self.process.start()
+    
+    def set_max_fps(self, fps):
+        self.clock.set_max_fps(fps)
+        if self.process is not None:
+            self.stride.value = self.clock.frame_stride()
+            self.budget.value = self.refine_budget()
+    
+    def request_fill(self, pool):
+        # Süreç kendi kendini doldurur; boş yuva bekleyince durur
+        pass
+    
+    def poll(self):
+        """Süreçten gelen kare ve hata bildirimlerini al (beklemeden)"""
+        while True:
+            try:
+                message = self.ready.get_nowait()
+            except (queue.Empty, EOFError, OSError):
+                return
+            if message[0] == 'error':
+                self.failed = message[1]
+                return
+            self._pending.append(message[1:])
+            self._last_seq = message[1]
+    
+    def check_worker(self):
+        """Süreç kapanmışsa yeniden başlat; çok sık çöküyorsa akışı hatalı işaretle"""
+        if self._stopped or self.failed or self.process.is_alive():
+            return
+        self.poll()
+        if self.failed:
+            return
+        now = time.monotonic()
+        self._crashes.append(now)
+        while now - self._crashes[0] > PROCESS_RESTART_WINDOW:
+            self._crashes.popleft()
+        if len(self._crashes) > PROCESS_MAX_RESTARTS:
+            self.failed = f"Çözme/keying süreci tekrar tekrar çöktü (çıkış kodu {self.process.exitcode})"
+            return
+        self.restarts += 1
+        self.close_channels()
+        try:
+            self.spawn(self._last_seq + 1)
+        except (RuntimeError, OSError) as e:
+            self.failed = f"Çözme/keying süreci yeniden başlatılamadı ({e})"
+            self.process = None
+            self.close_channels()
+    
+    def advance(self, now):
+        self.check_worker()
+        self.poll()
+        if self.failed:
+            return False
+        target = self.clock.due(now)
+        if target is None:
+            return False
+        self.shown.value = target
+        item = None
+        while self._pending and self._pending[0][0] <= target:
+            if item is not None:
+                self.free(item[1])
+            item = self._pending.popleft()
+        if item is None:
+            self.clock.mark_late()
+            return False
+        previous, self._current = self._current, item[1]
+        self.current_image = self.ring.images[self._current]
+        # Pet'ler yalnız GUI thread'inde ve bu tick'ten sonra çizer; eski yuva artık gösterilmez
+        if previous is not None:
+            self.free(previous)
+        return True
+    
+    def free(self, slot):
+        try:
+            self.free_slots.put(slot)
+        except (ValueError, OSError):
+            # Kuyruk kapatıldı (süreç yeniden başlatılıyor ya da durduruldu)
+            pass
+    
+    def close_channels(self):
+        for channel in (self.free_slots, self.ready):
+            if channel is None:
+                continue
+            channel.close()
+            # Kapanmış sürecin okumadığı veriler için çıkışta beklenmesin
+            channel.cancel_join_thread()
+    
+    def stop(self):
+        """Süreci durdur (gerekirse sonlandır) ve paylaşılan belleği bırak"""
+        self._stopped = True
+        if self.process is not None:
+            self.stop_event.set()
+            self.free(None)
+            self.process.join(PROCESS_JOIN_SECONDS)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(PROCESS_JOIN_SECONDS)
+            self.close_channels()
+            self.process = None
+        self.current_image = None
+        if self.ring is not None:
+            self.ring.unlink()
+            self.ring = None
 
-PRESETS_FILE = "color_presets.json"
 
-class DesktopPet(QLabel):
-    """Masaüstünde hareket eden şeffaf anime karakteri"""
-    def __init__(self, video_path, hsv_values, scale=1.0, opacity=1.0):
+class DesktopPet(QWidget):
+    """Masaüstünde hareket eden şeffaf anime karakteri.
+    
+    Kareyi QPixmap'e çevirmeden paintEvent'te doğrudan çizer; akışın QImage'ine
+    referans tuttuğu için çizilen bellek pet'te gösterildiği sürece yaşar.
+    """
+    closed = pyqtSignal(int)
+    # Sürüklendi/gösterildi/gizlendi: güç kipi hemen yeniden değerlendirilsin
+    visibility_changed = pyqtSignal(int)
+    
+    def __init__(self, pet_id, video_path, hsv_values, scale=1.0, opacity=1.0):
         super().__init__()
+        self.pet_id = pet_id
         self.video_path = video_path
-        self.lower_h, self.lower_s, self.lower_v = hsv_values['lower']
-        self.upper_h, self.upper_s, self.upper_v = hsv_values['upper']
+        self.hsv_values = hsv_values
         self.scale_factor = scale
         self.opacity_value = opacity
+        self.stream = None
         
         # Şeffaf, kenarlıksız, her zaman üstte pencere
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground)
         self.setWindowOpacity(opacity)
         
-        self.cap = None
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        
         # Sürükleme için
         self.dragging = False
         self.offset = QPoint()
         
         self.original_size = None
-        
-        self.load_video()
-        
-    def load_video(self):
-        if not os.path.exists(self.video_path):
-            QMessageBox.critical(None, "Hata", f"Video bulunamadı: {self.video_path}")
-            return
-            
-        self.cap = cv2.VideoCapture(self.video_path)
-        ret, frame = self.cap.read()
-        if not ret:
-            QMessageBox.critical(None, "Hata", "Video açılamadı!")
-            return
-        
+        self.image = None
+    
+    def set_original_size(self, size):
         # Video boyutuna göre pencereyi ayarla ve scale uygula
-        h, w, _ = frame.shape
-        self.original_size = (w, h)
-        scaled_w = int(w * self.scale_factor)
-        scaled_h = int(h * self.scale_factor)
-        self.setGeometry(100, 100, scaled_w, scaled_h)
-        self.timer.start(30)
+        self.original_size = size
+        self.set_scale(self.scale_factor)
     
     def set_scale(self, scale):
         """Ölçeği değiştir"""
@@ -68,41 +2917,32 @@ class DesktopPet(QLabel):
         """Şeffaflığı değiştir"""
         self.opacity_value = opacity
         self.setWindowOpacity(opacity)
-        
-    def update_frame(self):
-        if not self.cap:
-            return
-            
-        ret, frame = self.cap.read()
-        if not ret:
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            ret, frame = self.cap.read()
-        
-        if not ret:
+    
+    def show_image(self, image, dirty=None):
+        """Kareyi göster; dirty (QRect) verilirse yalnız o alan yeniden çizilir"""
+        self.image = image
+        if dirty is None or image.width() != self.width() or image.height() != self.height():
+            self.update()
+        else:
+            self.update(dirty)
+    
+    def paintEvent(self, event):
+        if self.image is None:
             return
-        
-        # BGR -> RGBA
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
-        
-        # HSV ile chroma key
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        lower = (self.lower_h, self.lower_s, self.lower_v)
-        upper = (self.upper_h, self.upper_s, self.upper_v)
-        
-        mask = cv2.inRange(hsv, lower, upper)
-        frame[mask > 0] = (0, 0, 0, 0)
-        
-        # Scale uygula
-        h, w, _ = frame.shape
-        if self.scale_factor != 1.0:
-            new_w = int(w * self.scale_factor)
-            new_h = int(h * self.scale_factor)
-            frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_AREA)
-        
-        # PyQt için QImage oluştur
-        h, w, ch = frame.shape
-        qimg = QImage(frame.data, w, h, w*ch, QImage.Format_RGBA8888)
-        self.setPixmap(QPixmap.fromImage(qimg))
+        profiling = PROFILER.enabled
+        if profiling:
+            t = time.perf_counter()
+        painter = QPainter(self)
+        if self.image.width() == self.width() and self.image.height() == self.height():
+            rect = event.rect()
+            painter.drawImage(rect, self.image, rect)
+        else:
+            # Ölçek yeni değişti, yeni ölçekteki kare henüz gelmedi: çizerken ölçekle
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawImage(self.rect(), self.image)
+        painter.end()
+        if profiling:
+            PROFILER.lap("pet.paint", t)
     
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -117,27 +2957,363 @@ class DesktopPet(QLabel):
         if event.button() == Qt.LeftButton:
             self.dragging = False
     
+    def moveEvent(self, event):
+        self.visibility_changed.emit(self.pet_id)
+    
+    def showEvent(self, event):
+        self.visibility_changed.emit(self.pet_id)
+    
+    def hideEvent(self, event):
+        self.visibility_changed.emit(self.pet_id)
+    
     def closeEvent(self, event):
-        if self.cap:
-            self.cap.release()
-        self.timer.stop()
+        self.closed.emit(self.pet_id)
         event.accept()
 
 
+class PetManager(QObject):
+    """Tüm pet'leri tek zamanlayıcıdan süren yönetici.
+    
+    Aynı klip, preset ve ölçeği kullanan pet'ler tek bir akışı (ve böylece
+    çözülmüş kareleri) paylaşır; çözme işleri çekirdek sayısı kadar thread'li
+    ortak bir havuzda yürür.
+    """
+    pet_removed = pyqtSignal(int)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pets = {}
+        self.streams = {}
+        self.max_fps = 0
+        self.mask_scale = 1.0
+        self.decoder = "auto"
+        self.decode_threads = 0
+        # Kare başına bant keying thread'i (1: bölmeden, çözme thread'inde)
+        self.key_threads = 1
+        # True ise video akışları ProcessStream ile ayrı süreçte çözülüp key'lenir
+        self.process_mode = False
+        # Son acquire_stream akış açamadıysa kullanıcıya gösterilecek neden (yoksa None)
+        self.open_error = None
+        self.pool = ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="decode")
+        self._next_id = 1
+        # Profil açıkken akış başına son gösterim zamanı (gerçek fps için)
+        self._presented_at = {}
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.tick)
+        # Görünürlük/boşta/pil durumu düzenli aralıkla kontrol edilir
+        self.power = PowerPolicy()
+        self.power_timer = QTimer(self)
+        self.power_timer.timeout.connect(self.update_power)
+    
+    def start_pet(self, video_path, hsv_values, scale, opacity):
+        """Yeni pet aç; video açılamazsa kullanıcıya bildirip None döndür"""
+        if not os.path.exists(video_path):
+            QMessageBox.critical(None, "Hata", f"Video bulunamadı: {video_path}")
+            return None
+        
+        stream = self.acquire_stream(video_path, hsv_values, scale)
+        if stream is None:
+            QMessageBox.critical(None, "Hata", self.open_error or "Video açılamadı!")
+            return None
+        
+        pet = DesktopPet(self._next_id, video_path, hsv_values, scale, opacity)
+        self._next_id += 1
+        pet.closed.connect(self.stop_pet)
+        pet.visibility_changed.connect(self.on_pet_visibility_changed)
+        pet.set_original_size(stream.source_size)
+        # Yeni pet'ler üst üste binmesin
+        offset = 40 * (len(self.pets) % 10)
+        pet.move(100 + offset, 100 + offset)
+        
+        self.pets[pet.pet_id] = pet
+        self.attach(pet, stream)
+        pet.show()
+        if not self.power_timer.isActive():
+            self.power_timer.start(POWER_POLL_MS)
+        self.update_power()
+        return pet
+    
+    def acquire_stream(self, video_path, hsv_values, scale):
+        """Klip + preset + ölçek için paylaşılan akışı bul veya oluştur"""
+        self.open_error = None
+        scale = round(scale, 3)
+        sprite_key = ('sprite', os.path.abspath(video_path), preset_hash(hsv_values), scale)
+        video_key = ('process' if self.process_mode else 'video', os.path.abspath(video_path),
+                     preset_hash(hsv_values), scale, self.mask_scale, self.decoder, self.decode_threads)
+        for key in (sprite_key, video_key):
+            if key in self.streams:
+                return self.streams[key]
+        
+        sprite = SpriteFile.open_for(video_path, hsv_values, scale)
+        if sprite:
+            stream = SpriteStream(sprite_key, sprite, scale)
+        elif self.process_mode:
+            stream = ProcessStream(video_key, video_path, hsv_values, scale, self.mask_scale,
+                                   self.decoder, self.decode_threads)
+            if not stream.open():
+                self.open_error = stream.failed
+                return None
+        else:
+            stream = FrameStream(video_key, video_path, hsv_values, scale, self.mask_scale,
+                                 self.decoder, self.decode_threads)
+            if not stream.open():
+                return None
+            stream.keyer.key_threads = self.key_threads
+        stream.start()
+        stream.set_max_fps(self.power.max_fps(stream.power_mode, self.max_fps))
+        stream.request_fill(self.pool)
+        self.streams[stream.key] = stream
+        return stream
+    
+    def attach(self, pet, stream):
+        pet.stream = stream
+        stream.pets.append(pet)
+        if stream.current_image is not None:
+            pet.show_image(stream.current_image)
+    
+    def detach(self, pet):
+        stream = pet.stream
+        pet.stream = None
+        if stream is None:
+            return
+        stream.pets.remove(pet)
+        # Son izleyici gidince akışı kapat
+        if not stream.pets:
+            del self.streams[stream.key]
+            self._presented_at.pop(stream.key, None)
+            stream.stop()
+    
+    def pet(self, pet_id):
+        return self.pets.get(pet_id)
+    
+    def stop_pet(self, pet_id):
+        pet = self.pets.pop(pet_id, None)
+        if pet is None:
+            return
+        self.detach(pet)
+        pet.close()
+        self.pet_removed.emit(pet_id)
+        if not self.pets:
+            self.power_timer.stop()
+            self.power.stop_accounting()
+        self.schedule()
+    
+    def stop_all(self):
+        for pet_id in list(self.pets):
+            self.stop_pet(pet_id)
+    
+    def set_pet_scale(self, pet_id, scale):
+        pet = self.pets.get(pet_id)
+        if pet is None:
+            return
+        pet.set_scale(scale)
+        self.rebind(pet)
+    
+    def set_pet_opacity(self, pet_id, opacity):
+        pet = self.pets.get(pet_id)
+        if pet:
+            pet.set_opacity(opacity)
+    
+    def rebind(self, pet):
+        """Pet'i güncel ayarlarına uyan akışa taşı"""
+        stream = self.acquire_stream(pet.video_path, pet.hsv_values, pet.scale_factor)
+        if stream is pet.stream:
+            return
+        self.detach(pet)
+        if stream is None:
+            self.stop_pet(pet.pet_id)
+            if self.open_error:
+                QMessageBox.critical(None, "Hata", self.open_error)
+            return
+        self.attach(pet, stream)
+        self.update_power()
+    
+    def set_max_fps(self, fps):
+        self.max_fps = fps
+        for stream in self.streams.values():
+            stream.set_max_fps(self.power.max_fps(stream.power_mode, fps))
+        self.schedule()
+    
+    def set_power_policy(self, enabled, throttle_fps, idle_seconds, throttle_on_battery):
+        self.power.configure(enabled, throttle_fps, idle_seconds, throttle_on_battery)
+        # Ayar kipi değiştirmese de yeni yavaş fps uygulansın
+        for stream in self.streams.values():
+            stream.set_max_fps(self.power.max_fps(stream.power_mode, self.max_fps))
+        self.update_power()
+    
+    def set_control_minimized(self, minimized):
+        self.power.control_minimized = minimized
+        self.update_power()
+    
+    def on_pet_visibility_changed(self, pet_id):
+        # Sürüklenen pet kullanıcı etkinliğidir; ekrana dönen pet beklemeden hızlanır
+        self.power.note_input(time.monotonic())
+        if pet_id in self.pets:
+            self.update_power()
+    
+    def update_power(self):
+        """Pet'lerin kiplerini belirle, kipi değişen akışları durdur/yavaşlat/hızlandır"""
+        now = time.monotonic()
+        self.power.poll(now)
+        base = self.power.base_mode(now)
+        modes = {pet_id: self.power.pet_mode(pet, base) for pet_id, pet in self.pets.items()}
+        self.power.account(modes.values(), now)
+        for stream in self.streams.values():
+            # Akış, en çok görünen pet'inin kipinde çalışır
+            mode = min((modes[pet.pet_id] for pet in stream.pets if pet.pet_id in modes),
+                       key=PowerPolicy.MODES.index, default=PowerPolicy.FROZEN)
+            self.apply_power_mode(stream, mode, now)
+        self.schedule()
+    
+    def apply_power_mode(self, stream, mode, now):
+        if mode == stream.power_mode:
+            return
+        if stream.power_mode == PowerPolicy.FROZEN:
+            stream.clock.resume(now)
+        elif mode == PowerPolicy.FROZEN:
+            stream.clock.pause(now)
+        stream.power_mode = mode
+        stream.set_max_fps(self.power.max_fps(mode, self.max_fps))
+    
+    def set_mask_scale(self, mask_scale):
+        self.mask_scale = mask_scale
+        for pet in list(self.pets.values()):
+            self.rebind(pet)
+    
+    def set_decoder(self, backend, threads):
+        """Çözücüyü değiştir; açık pet'ler yeni çözücülü akışlara taşınır"""
+        self.decoder = backend
+        self.decode_threads = threads
+        for pet in list(self.pets.values()):
+            self.rebind(pet)
+    
+    def set_process_mode(self, enabled):
+        """Süreç modunu aç/kapat; açık pet'ler uygun akışlara taşınır"""
+        self.process_mode = enabled
+        for pet in list(self.pets.values()):
+            self.rebind(pet)
+    
+    def set_key_threads(self, threads):
+        """Bant keying thread sayısı; çıktı değişmediğinden akışlar yerinde güncellenir"""
+        self.key_threads = threads
+        for stream in self.streams.values():
+            keyer = getattr(stream, 'keyer', None)
+            if keyer is not None:
+                keyer.key_threads = threads
+    
+    def tick(self):
+        now = time.monotonic()
+        for stream in list(self.streams.values()):
+            if stream.failed:
+                message = stream.failed
+                for pet in list(stream.pets):
+                    self.stop_pet(pet.pet_id)
+                # Diyalog kendi olay döngüsünü açar; zamanlayıcı callback'i içinde
+                # açılırsa tick iç içe yeniden girer. Akış durdu, mesaj sonra gösterilir
+                QTimer.singleShot(0, lambda message=message: QMessageBox.critical(None, "Hata", message))
+                continue
+            if stream.power_mode == PowerPolicy.FROZEN:
+                continue
+            if stream.advance(now):
+                for pet in stream.pets:
+                    pet.show_image(stream.current_image, stream.dirty_rect)
+                if PROFILER.enabled:
+                    previous = self._presented_at.get(stream.key)
+                    if previous is not None:
+                        PROFILER.record("pet.interval", now - previous)
+                    self._presented_at[stream.key] = now
+                elif self._presented_at:
+                    # Profil kapandı; yeniden açılınca eski zamanlar ölçümü bozmasın
+                    self._presented_at.clear()
+            stream.request_fill(self.pool)
+        self.schedule()
+    
+    def schedule(self):
+        """Zamanlayıcıyı en yakın akış tick'ine kur; donmuş akışlar beklenmez"""
+        deadlines = [stream.clock.deadline for stream in self.streams.values()
+                     if stream.power_mode != PowerPolicy.FROZEN]
+        if not deadlines:
+            self.timer.stop()
+            return
+        self.timer.start(msec_until(min(deadlines)))
+    
+    def stats(self):
+        """Tüm akışların toplam oynatma sayaçları"""
+        if not self.streams:
+            return None
+        totals = {'pets': len(self.pets), 'streams': len(self.streams),
+                  'fps': max(stream.clock.effective_fps for stream in self.streams.values()),
+                  'presented': 0, 'dropped': 0, 'late': 0,
+                  'skipped_frames': 0, 'skipped_tiles': 0, 'total_tiles': 0,
+                  'power_enabled': self.power.enabled, 'power': dict(self.power.mode_seconds),
+                  'decode': {}, 'refine_disabled': set(), 'workers': 0, 'restarts': 0}
+        for stream in self.streams.values():
+            for name, value in stream.clock.stats().items():
+                if name != 'fps':
+                    totals[name] += value
+            totals['skipped_frames'] += stream.skipped_frames
+            totals['skipped_tiles'] += stream.skipped_tiles
+            totals['total_tiles'] += stream.total_tiles
+            # Arka uç başına saf çözme hızı (önbellekten/sprite'tan oynatılanlar hariç)
+            source = getattr(stream, 'source', None)
+            if source is not None and source.decode_fps > 0:
+                totals['decode'].setdefault(source.backend, []).append(source.decode_fps)
+            keyer = getattr(stream, 'keyer', None)
+            if keyer is not None:
+                totals['refine_disabled'].update(keyer.refine_disabled)
+            if isinstance(stream, ProcessStream):
+                totals['workers'] += 1
+                totals['restarts'] += stream.restarts
+        return totals
+    
+    def shutdown(self):
+        """Tüm pet'leri kapat ve çözme havuzunu durdur"""
+        self.stop_all()
+        self.timer.stop()
+        self.power_timer.stop()
+        self.pool.shutdown(wait=True)
+        KEY_POOL.shutdown()
+
+
 class ControlPanel(QWidget):
     """Video seçimi ve oynatma kontrolleri"""
     start_pet = pyqtSignal(str, dict, float, float)
-    stop_pet = pyqtSignal()
-    update_pet_scale = pyqtSignal(float)
-    update_pet_opacity = pyqtSignal(float)
+    stop_pet = pyqtSignal(int)
+    stop_all_pets = pyqtSignal()
+    update_pet_scale = pyqtSignal(int, float)
+    update_pet_opacity = pyqtSignal(int, float)
+    position_pet = pyqtSignal(int, str)
+    update_pet_max_fps = pyqtSignal(int)
+    update_pet_mask_scale = pyqtSignal(float)
+    # çözücü arka ucu, çözücü thread sayısı (0: otomatik)
+    update_decoder = pyqtSignal(str, int)
+    update_key_threads = pyqtSignal(int)
+    update_process_mode = pyqtSignal(bool)
+    # açık mı, yavaş kip fps'i, boşta sayılma süresi (sn), pilde yavaşlat
+    update_power_policy = pyqtSignal(bool, int, int, bool)
     
-    def __init__(self):
+    def __init__(self, store):
         super().__init__()
+        self.store = store
+        store.preset_changed.connect(self.on_preset_changed)
+        store.preset_removed.connect(self.on_preset_removed)
+        store.reloaded.connect(self.on_presets_reloaded)
         self.current_preset = None
+        self.current_preset_name = None
         self.video_path = None
-        self.is_running = False
+        # pet_id -> [ölçek, şeffaflık]; sürgüler seçili pet'e uygulanır
+        self.pet_settings = {}
+        self.selected_pet = None
         self.scale_value = 1.0
         self.opacity_value = 1.0
+        self.max_fps = 0
+        self.mask_scale = 1.0
+        self.decoder = "auto"
+        self.decode_threads = 0
+        self.key_threads = 1
+        self.process_mode = False
         self.init_ui()
         
     def init_ui(self):
@@ -145,49 +3321,39 @@ class ControlPanel(QWidget):
         
         # Title
         title = QLabel("🎮 Desktop Pet Kontrolü")
-        title.setStyleSheet("font-size: 20px; color: #c77dff; font-weight: bold; padding: 10px;")
+        title.setProperty("role", "title")
         layout.addWidget(title)
         
         # Video selection
         video_layout = QHBoxLayout()
         video_label = QLabel("📹 Video:")
-        video_label.setStyleSheet("color: #c77dff; font-size: 14px; min-width: 80px;")
+        video_label.setProperty("role", "field")
         
         self.video_path_label = QLabel("Video seçilmedi")
-        self.video_path_label.setStyleSheet("""
-            QLabel {
-                background-color: #1a1a2e;
-                border: 2px solid #7b2cbf;
-                border-radius: 5px;
-                padding: 8px;
-                color: #9d4edd;
-            }
-        """)
+        self.video_path_label.setProperty("role", "box")
         
         browse_btn = QPushButton("📁 Seç")
         browse_btn.clicked.connect(self.select_video)
-        browse_btn.setStyleSheet(self.get_button_style())
+        browse_btn.setProperty("variant", "primary")
+        
+        folder_btn = QPushButton("🗂️ Klasör")
+        folder_btn.setToolTip("Kare dizisi klasörü (PNG/JPG ...)")
+        folder_btn.clicked.connect(self.select_frame_folder)
+        folder_btn.setProperty("variant", "primary")
         
         video_layout.addWidget(video_label)
         video_layout.addWidget(self.video_path_label, 1)
         video_layout.addWidget(browse_btn)
+        video_layout.addWidget(folder_btn)
         layout.addLayout(video_layout)
         
         # Preset selection
         preset_layout = QHBoxLayout()
         preset_label = QLabel("🎨 Preset:")
-        preset_label.setStyleSheet("color: #c77dff; font-size: 14px; min-width: 80px;")
+        preset_label.setProperty("role", "field")
         
         self.preset_label = QLabel("Preset seçilmedi")
-        self.preset_label.setStyleSheet("""
-            QLabel {
-                background-color: #1a1a2e;
-                border: 2px solid #7b2cbf;
-                border-radius: 5px;
-                padding: 8px;
-                color: #9d4edd;
-            }
-        """)
+        self.preset_label.setProperty("role", "box")
         
         preset_layout.addWidget(preset_label)
         preset_layout.addWidget(self.preset_label, 1)
@@ -195,38 +3361,22 @@ class ControlPanel(QWidget):
         
         # Settings section
         settings_title = QLabel("⚙️ Pet Ayarları")
-        settings_title.setStyleSheet("font-size: 16px; color: #c77dff; font-weight: bold; margin-top: 15px; padding: 5px;")
+        settings_title.setProperty("role", "section")
         layout.addWidget(settings_title)
         
         # Scale slider
         scale_layout = QHBoxLayout()
         scale_label = QLabel("📏 Boyut:")
-        scale_label.setStyleSheet("color: #9d4edd; font-size: 14px; min-width: 100px;")
+        scale_label.setProperty("role", "setting")
         
         self.scale_slider = QSlider(Qt.Horizontal)
         self.scale_slider.setMinimum(25)
         self.scale_slider.setMaximum(200)
         self.scale_slider.setValue(100)
-        self.scale_slider.setStyleSheet("""
-            QSlider::groove:horizontal {
-                background: #1a1a2e;
-                height: 8px;
-                border-radius: 4px;
-            }
-            QSlider::handle:horizontal {
-                background: #9d4edd;
-                width: 18px;
-                margin: -5px 0;
-                border-radius: 9px;
-            }
-            QSlider::handle:horizontal:hover {
-                background: #c77dff;
-            }
-        """)
         self.scale_slider.valueChanged.connect(self.on_scale_changed)
         
         self.scale_value_label = QLabel("100%")
-        self.scale_value_label.setStyleSheet("color: #c77dff; font-size: 14px; min-width: 50px;")
+        self.scale_value_label.setProperty("role", "value")
         
         scale_layout.addWidget(scale_label)
         scale_layout.addWidget(self.scale_slider)
@@ -236,61 +3386,160 @@ class ControlPanel(QWidget):
         # Opacity slider
         opacity_layout = QHBoxLayout()
         opacity_label = QLabel("🌟 Şeffaflık:")
-        opacity_label.setStyleSheet("color: #9d4edd; font-size: 14px; min-width: 100px;")
+        opacity_label.setProperty("role", "setting")
         
         self.opacity_slider = QSlider(Qt.Horizontal)
         self.opacity_slider.setMinimum(20)
         self.opacity_slider.setMaximum(100)
         self.opacity_slider.setValue(100)
-        self.opacity_slider.setStyleSheet("""
-            QSlider::groove:horizontal {
-                background: #1a1a2e;
-                height: 8px;
-                border-radius: 4px;
-            }
-            QSlider::handle:horizontal {
-                background: #9d4edd;
-                width: 18px;
-                margin: -5px 0;
-                border-radius: 9px;
-            }
-            QSlider::handle:horizontal:hover {
-                background: #c77dff;
-            }
-        """)
         self.opacity_slider.valueChanged.connect(self.on_opacity_changed)
         
         self.opacity_value_label = QLabel("100%")
-        self.opacity_value_label.setStyleSheet("color: #c77dff; font-size: 14px; min-width: 50px;")
+        self.opacity_value_label.setProperty("role", "value")
         
         opacity_layout.addWidget(opacity_label)
         opacity_layout.addWidget(self.opacity_slider)
         opacity_layout.addWidget(self.opacity_value_label)
         layout.addLayout(opacity_layout)
         
+        # FPS limit (ör. pilde 24)
+        fps_layout = QHBoxLayout()
+        fps_label = QLabel("🎞️ Maks FPS:")
+        fps_label.setProperty("role", "setting")
+        
+        self.fps_combo = QComboBox()
+        for fps in MAX_FPS_CHOICES:
+            self.fps_combo.addItem("Sınırsız (video fps)" if fps == 0 else f"{fps} fps", fps)
+        self.fps_combo.currentIndexChanged.connect(self.on_max_fps_changed)
+        
+        self.low_res_mask_checkbox = QCheckBox("⚡ Düşük çözünürlüklü maske")
+        self.low_res_mask_checkbox.toggled.connect(self.on_low_res_mask_toggled)
+        
+        fps_layout.addWidget(fps_label)
+        fps_layout.addWidget(self.fps_combo)
+        fps_layout.addWidget(self.low_res_mask_checkbox)
+        fps_layout.addStretch()
+        layout.addLayout(fps_layout)
+        
+        # Frame cache
+        cache_layout = QHBoxLayout()
+        self.cache_checkbox = QCheckBox("🧠 Döngü önbelleği")
+        self.cache_checkbox.setChecked(FRAME_CACHE.enabled)
+        self.cache_checkbox.setProperty("role", "setting")
+        self.cache_checkbox.toggled.connect(self.on_cache_toggled)
+        
+        self.cache_limit_spin = QSpinBox()
+        self.cache_limit_spin.setRange(16, 4096)
+        self.cache_limit_spin.setSingleStep(16)
+        self.cache_limit_spin.setSuffix(" MB")
+        self.cache_limit_spin.setValue(FRAME_CACHE_LIMIT_MB)
+        self.cache_limit_spin.valueChanged.connect(FRAME_CACHE.set_limit)
+        
+        cache_layout.addWidget(self.cache_checkbox)
+        cache_layout.addWidget(self.cache_limit_spin)
+        cache_layout.addStretch()
+        layout.addLayout(cache_layout)
+        
+        # Çözücü: arka uç ve thread sayısı (kare klasörü/GIF otomatikte ayrıca açılır)
+        decoder_layout = QHBoxLayout()
+        decoder_label = QLabel("🎬 Çözücü:")
+        decoder_label.setProperty("role", "setting")
+        
+        self.decoder_combo = QComboBox()
+        for backend, text in zip(DECODER_BACKENDS, ("Otomatik", "OpenCV (FFmpeg)", "PyAV")):
+            self.decoder_combo.addItem(text, backend)
+        if av is None:
+            # PyAV kurulu değil: seçenek görünür ama seçilemez
+            self.decoder_combo.model().item(DECODER_BACKENDS.index("pyav")).setEnabled(False)
+        self.decoder_combo.currentIndexChanged.connect(self.on_decoder_changed)
+        
+        self.decode_threads_spin = QSpinBox()
+        self.decode_threads_spin.setRange(0, 16)
+        self.decode_threads_spin.setSpecialValueText("thread: oto")
+        self.decode_threads_spin.setPrefix("thread: ")
+        self.decode_threads_spin.setToolTip("Çözücü thread sayısı; çok pet açıkken 1-2 daha verimli olabilir")
+        self.decode_threads_spin.valueChanged.connect(self.on_decoder_changed)
+        
+        # Büyük kliplerde (1440p/4K) kare yatay bantlara bölünüp paralel key'lenir
+        self.key_threads_spin = QSpinBox()
+        self.key_threads_spin.setRange(1, KEY_THREADS_MAX)
+        self.key_threads_spin.setSpecialValueText("keying: tek thread")
+        self.key_threads_spin.setPrefix("keying: ")
+        self.key_threads_spin.setSuffix(" thread")
+        self.key_threads_spin.setToolTip("Kareyi yatay bantlara bölüp bu kadar thread'de key'le; "
+                                         "1440p/4K kliplerde işe yarar, küçük karelerde bölünmez")
+        self.key_threads_spin.valueChanged.connect(self.on_key_threads_changed)
+        
+        decoder_layout.addWidget(decoder_label)
+        decoder_layout.addWidget(self.decoder_combo)
+        decoder_layout.addWidget(self.decode_threads_spin)
+        self.process_checkbox = QCheckBox("🧩 Ayrı süreç")
+        self.process_checkbox.setToolTip("Her klibi ayrı bir süreçte çöz ve key'le; kareler paylaşılan "
+                                         "bellekten kopyasız çizilir. Çok pet açıkken arayüz akıcı kalır")
+        self.process_checkbox.toggled.connect(self.on_process_mode_toggled)
+        
+        decoder_layout.addWidget(self.key_threads_spin)
+        decoder_layout.addWidget(self.process_checkbox)
+        decoder_layout.addStretch()
+        layout.addLayout(decoder_layout)
+        
+        # Güç tasarrufu: görünmeyen pet donar, boşta/pilde yavaşlar
+        power_layout = QHBoxLayout()
+        self.power_checkbox = QCheckBox("🔋 Güç tasarrufu")
+        self.power_checkbox.setChecked(True)
+        
+        self.power_fps_spin = QSpinBox()
+        self.power_fps_spin.setRange(1, 30)
+        self.power_fps_spin.setSuffix(" fps")
+        self.power_fps_spin.setValue(POWER_THROTTLE_FPS)
+        self.power_fps_spin.setToolTip("Boştayken / pilde kullanılacak fps")
+        
+        self.power_idle_spin = QSpinBox()
+        self.power_idle_spin.setRange(5, 3600)
+        self.power_idle_spin.setSingleStep(15)
+        self.power_idle_spin.setPrefix("boşta ")
+        self.power_idle_spin.setSuffix(" sn")
+        self.power_idle_spin.setValue(POWER_IDLE_SECONDS)
+        self.power_idle_spin.setToolTip("İmleç bu kadar süre kıpırdamazsa yavaşla")
+        
+        self.power_battery_checkbox = QCheckBox("Pilde yavaşlat")
+        self.power_battery_checkbox.setChecked(True)
+        
+        for spin in (self.power_fps_spin, self.power_idle_spin):
+            spin.valueChanged.connect(self.on_power_changed)
+        for checkbox in (self.power_checkbox, self.power_battery_checkbox):
+            checkbox.toggled.connect(self.on_power_changed)
+        
+        power_layout.addWidget(self.power_checkbox)
+        power_layout.addWidget(self.power_fps_spin)
+        power_layout.addWidget(self.power_idle_spin)
+        power_layout.addWidget(self.power_battery_checkbox)
+        power_layout.addStretch()
+        layout.addLayout(power_layout)
+        
         # Position presets
         position_layout = QHBoxLayout()
         position_label = QLabel("📍 Konum:")
-        position_label.setStyleSheet("color: #9d4edd; font-size: 14px; min-width: 100px;")
+        position_label.setProperty("role", "setting")
         
         self.pos_topleft_btn = QPushButton("⬉ Sol Üst")
         self.pos_topleft_btn.clicked.connect(lambda: self.set_position("topleft"))
-        self.pos_topleft_btn.setStyleSheet(self.get_small_button_style())
+        self.pos_topleft_btn.setProperty("variant", "small")
         self.pos_topleft_btn.setEnabled(False)
         
         self.pos_topright_btn = QPushButton("⬈ Sağ Üst")
         self.pos_topright_btn.clicked.connect(lambda: self.set_position("topright"))
-        self.pos_topright_btn.setStyleSheet(self.get_small_button_style())
+        self.pos_topright_btn.setProperty("variant", "small")
         self.pos_topright_btn.setEnabled(False)
         
         self.pos_bottomleft_btn = QPushButton("⬋ Sol Alt")
         self.pos_bottomleft_btn.clicked.connect(lambda: self.set_position("bottomleft"))
-        self.pos_bottomleft_btn.setStyleSheet(self.get_small_button_style())
+        self.pos_bottomleft_btn.setProperty("variant", "small")
         self.pos_bottomleft_btn.setEnabled(False)
         
         self.pos_bottomright_btn = QPushButton("⬊ Sağ Alt")
         self.pos_bottomright_btn.clicked.connect(lambda: self.set_position("bottomright"))
-        self.pos_bottomright_btn.setStyleSheet(self.get_small_button_style())
+        self.pos_bottomright_btn.setProperty("variant", "small")
         self.pos_bottomright_btn.setEnabled(False)
         
         position_layout.addWidget(position_label)
@@ -302,17 +3551,7 @@ class ControlPanel(QWidget):
         
         # Info box
         info = QLabel("ℹ️ Saved Settings sekmesinden bir preset seçin, ardından START'a basın")
-        info.setStyleSheet("""
-            QLabel {
-                background-color: #1a1a2e;
-                border-left: 4px solid #9d4edd;
-                padding: 12px;
-                color: #c77dff;
-                font-size: 13px;
-                border-radius: 5px;
-                margin: 10px 0;
-            }
-        """)
+        info.setProperty("role", "info")
         info.setWordWrap(True)
         layout.addWidget(info)
         
@@ -321,342 +3560,768 @@ class ControlPanel(QWidget):
         
         self.start_btn = QPushButton("▶ START")
         self.start_btn.clicked.connect(self.start_desktop_pet)
-        self.start_btn.setStyleSheet(self.get_button_style("#27ae60", "#2ecc71"))
+        self.start_btn.setProperty("variant", "success")
         self.start_btn.setEnabled(False)
         
         self.stop_btn = QPushButton("⏹ STOP")
         self.stop_btn.clicked.connect(self.stop_desktop_pet)
-        self.stop_btn.setStyleSheet(self.get_button_style("#c0392b", "#e74c3c"))
+        self.stop_btn.setProperty("variant", "danger")
         self.stop_btn.setEnabled(False)
         
         btn_layout.addWidget(self.start_btn)
         btn_layout.addWidget(self.stop_btn)
         layout.addLayout(btn_layout)
         
+        # Running pets: sürgüler ve konum butonları seçili pet'e uygulanır
+        pets_header = QHBoxLayout()
+        pets_title = QLabel("🐾 Çalışan Pet'ler")
+        pets_title.setProperty("role", "section")
+        
+        self.stop_all_btn = QPushButton("⏹ Tümünü Durdur")
+        self.stop_all_btn.clicked.connect(self.stop_all_pets.emit)
+        self.stop_all_btn.setProperty("variant", "small")
+        self.stop_all_btn.setEnabled(False)
+        
+        pets_header.addWidget(pets_title)
+        pets_header.addStretch()
+        pets_header.addWidget(self.stop_all_btn)
+        layout.addLayout(pets_header)
+        
+        self.pet_list = QListWidget()
+        self.pet_list.setMaximumHeight(110)
+        self.pet_list.currentItemChanged.connect(self.on_pet_selected)
+        layout.addWidget(self.pet_list)
+        
+        # Sprite export: video + preset'i bir kez key'leyip diske yazar
+        self.bake_btn = QPushButton("📦 Sprite Oluştur (Hızlı Başlangıç)")
+        self.bake_btn.clicked.connect(self.bake_sprite)
+        self.bake_btn.setProperty("variant", "small")
+        self.bake_btn.setEnabled(False)
+        self.bake_worker = None
+        layout.addWidget(self.bake_btn)
+        
         # Status
         self.status_label = QLabel("⭕ Durdu")
         self.status_label.setAlignment(Qt.AlignCenter)
-        self.status_label.setStyleSheet("""
-            QLabel {
-                background-color: #1a1a2e;
-                border: 2px solid #7b2cbf;
-                border-radius: 8px;
-                padding: 15px;
-                color: #e74c3c;
-                font-size: 16px;
-                font-weight: bold;
-            }
-        """)
+        self.status_label.setProperty("role", "status")
         layout.addWidget(self.status_label)
         
+        self.stats_label = QLabel("")
+        self.stats_label.setAlignment(Qt.AlignCenter)
+        self.stats_label.setProperty("role", "hint")
+        layout.addWidget(self.stats_label)
+        
+        # Aşama profili: açıkken kare hattının süreleri panelde gösterilir
+        profile_layout = QHBoxLayout()
+        self.profile_checkbox = QCheckBox("⏱️ Performans profili")
+        self.profile_checkbox.toggled.connect(self.on_profile_toggled)
+        self.profile_csv_btn = QPushButton("CSV")
+        self.profile_csv_btn.clicked.connect(lambda: self.export_profile("csv"))
+        self.profile_json_btn = QPushButton("JSON")
+        self.profile_json_btn.clicked.connect(lambda: self.export_profile("json"))
+        profile_layout.addWidget(self.profile_checkbox)
+        profile_layout.addStretch()
+        for btn in (self.profile_csv_btn, self.profile_json_btn):
+            btn.setProperty("variant", "small")
+            profile_layout.addWidget(btn)
+        layout.addLayout(profile_layout)
+        
+        self.profile_label = QLabel("")
+        self.profile_label.setFont(QFont("Monospace", 9))
+        self.profile_label.setProperty("role", "profile")
+        self.profile_label.hide()
+        layout.addWidget(self.profile_label)
+        
         layout.addStretch()
         self.setLayout(layout)
     
-    def get_button_style(self, color="#7b2cbf", hover_color="#9d4edd"):
-        return f"""
-            QPushButton {{
-                background-color: {color};
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 15px 30px;
-                font-size: 16px;
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {hover_color};
-            }}
-            QPushButton:pressed {{
-                background-color: #5a189a;
-            }}
-            QPushButton:disabled {{
-                background-color: #3c3c3c;
-                color: #666;
-            }}
-        """
-    
-    def get_small_button_style(self):
-        return """
-            QPushButton {
-                background-color: #5a189a;
-                color: white;
-                border: none;
-                border-radius: 5px;
-                padding: 8px 12px;
-                font-size: 11px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #7b2cbf;
-            }
-            QPushButton:pressed {
-                background-color: #3c096c;
-            }
-            QPushButton:disabled {
-                background-color: #2c2c2c;
-                color: #666;
-            }
-        """
-    
     def select_video(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Video Seç", "", "Video Files (*.mp4 *.avi *.mov)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "Video Seç", "", VIDEO_FILE_FILTER)
         if file_path:
             self.video_path = file_path
             self.video_path_label.setText(os.path.basename(file_path))
             self.check_ready()
     
+    def select_frame_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Kare Klasörü Seç")
+        if folder:
+            self.video_path = folder
+            self.video_path_label.setText(f"🗂️ {os.path.basename(folder)}")
+            self.check_ready()
+    
     def set_preset(self, name, values):
         self.current_preset = values
+        self.current_preset_name = name
         self.preset_label.setText(name)
         self.check_ready()
     
-    def check_ready(self):
-        if self.video_path and self.current_preset:
-            self.start_btn.setEnabled(True)
-        else:
-            self.start_btn.setEnabled(False)
+    def on_preset_changed(self, name):
+        # Seçili preset başka bir sekmede/dosyada güncellendiyse yeni pet'ler yenisini kullanır
+        if name == self.current_preset_name:
+            self.current_preset = self.store.get(name)
+    
+    def on_preset_removed(self, name):
+        if name == self.current_preset_name:
+            self.current_preset = self.current_preset_name = None
+            self.preset_label.setText("Preset seçilmedi")
+            self.check_ready()
+    
+    def on_presets_reloaded(self):
+        if self.current_preset_name is None:
+            return
+        if self.current_preset_name in self.store:
+            self.on_preset_changed(self.current_preset_name)
+        else:
+            self.on_preset_removed(self.current_preset_name)
+    
+    @property
+    def is_running(self):
+        return bool(self.pet_settings)
+    
+    def check_ready(self):
+        ready = bool(self.video_path and self.current_preset)
+        self.start_btn.setEnabled(ready)
+        self.bake_btn.setEnabled(ready and self.bake_worker is None)
+    
+    def bake_sprite(self):
+        """Seçili video ve preset için sprite dosyası oluştur"""
+        if not (self.video_path and self.current_preset):
+            return
+        self.bake_worker = SpriteBakeWorker(self.video_path, self.current_preset, self.scale_value)
+        self.bake_worker.progress.connect(
+            lambda done, total: self.bake_btn.setText(f"📦 Sprite Oluşturuluyor... {done}/{total}"))
+        self.bake_worker.finished_ok.connect(self.on_bake_finished)
+        self.bake_worker.failed.connect(self.on_bake_failed)
+        self.check_ready()
+        self.bake_worker.start()
+    
+    def on_bake_finished(self, path):
+        self.reset_bake_button()
+        QMessageBox.information(self, "Başarılı", f"Sprite kaydedildi:\n{path}")
+    
+    def on_bake_failed(self, message):
+        self.reset_bake_button()
+        QMessageBox.critical(self, "Hata", message)
+    
+    def reset_bake_button(self):
+        self.bake_worker.wait()
+        self.bake_worker = None
+        self.bake_btn.setText("📦 Sprite Oluştur (Hızlı Başlangıç)")
+        self.check_ready()
     
     def on_scale_changed(self, value):
         self.scale_value = value / 100.0
         self.scale_value_label.setText(f"{value}%")
-        if self.is_running:
-            self.update_pet_scale.emit(self.scale_value)
+        if self.selected_pet is not None:
+            self.pet_settings[self.selected_pet][0] = self.scale_value
+            self.update_pet_scale.emit(self.selected_pet, self.scale_value)
     
     def on_opacity_changed(self, value):
         self.opacity_value = value / 100.0
         self.opacity_value_label.setText(f"{value}%")
+        if self.selected_pet is not None:
+            self.pet_settings[self.selected_pet][1] = self.opacity_value
+            self.update_pet_opacity.emit(self.selected_pet, self.opacity_value)
+    
+    def on_max_fps_changed(self, index):
+        self.max_fps = self.fps_combo.itemData(index)
+        if self.is_running:
+            self.update_pet_max_fps.emit(self.max_fps)
+    
+    def on_low_res_mask_toggled(self, checked):
+        self.mask_scale = LOW_RES_MASK_SCALE if checked else 1.0
+        if self.is_running:
+            self.update_pet_mask_scale.emit(self.mask_scale)
+    
+    def on_decoder_changed(self):
+        self.decoder = self.decoder_combo.currentData()
+        self.decode_threads = self.decode_threads_spin.value()
+        if self.is_running:
+            self.update_decoder.emit(self.decoder, self.decode_threads)
+    
+    def on_process_mode_toggled(self, checked):
+        self.process_mode = checked
+        if self.is_running:
+            self.update_process_mode.emit(checked)
+    
+    def on_key_threads_changed(self, threads):
+        self.key_threads = threads
         if self.is_running:
-            self.update_pet_opacity.emit(self.opacity_value)
+            self.update_key_threads.emit(threads)
+    
+    def show_playback_stats(self, stats):
+        if stats is None:
+            self.stats_label.setText("")
+            return
+        text = (f"📊 {stats['pets']} pet / {stats['streams']} akış  •  {stats['fps']:.1f} fps hedef  •  "
+                f"{stats['presented']} kare  •  {stats['dropped']} atlanan  •  {stats['late']} geciken")
+        if stats['total_tiles']:
+            text += (f"\n♻️ {stats['skipped_frames']} aynı kare key'lenmedi  •  "
+                     f"karoların %{100 * stats['skipped_tiles'] / stats['total_tiles']:.0f}'i değişmedi")
+        if stats['power_enabled']:
+            seconds = stats['power']
+            text += (f"\n🔋 tam {seconds['full']:.0f} sn  •  yavaş {seconds['throttled']:.0f} sn  •  "
+                     f"donuk {seconds['frozen']:.0f} sn")
+        if stats['decode']:
+            text += "\n🎞️ çözme " + "  •  ".join(
+                f"{backend} {sum(rates) / len(rates):.0f} kare/sn" for backend, rates in stats['decode'].items())
+        if stats['refine_disabled']:
+            text += "\n✨ süre bütçesi aşıldı, kapatılan: " + ", ".join(sorted(stats['refine_disabled']))
+        if stats['workers']:
+            text += f"\n🧩 {stats['workers']} çözme/keying süreci  •  {stats['restarts']} yeniden başlatma"
+        self.stats_label.setText(text)
+    
+    def on_profile_toggled(self, checked):
+        PROFILER.set_enabled(checked)
+        self.profile_label.setVisible(checked)
+        self.profile_label.setText("Ölçüm bekleniyor...")
+    
+    def show_profile(self, summary):
+        """Aşama süreleri tablosu (ms); gösterim aralıklarında gerçek fps"""
+        if not summary:
+            return
+        lines = [f"{'aşama':<18}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        for stage, row in summary.items():
+            line = f"{stage:<18}{row['p50_ms']:>8.2f}{row['p95_ms']:>8.2f}{row['p99_ms']:>8.2f}"
+            if row['fps'] is not None:
+                line += f"  {row['fps']:.1f} fps"
+            lines.append(line)
+        self.profile_label.setText("\n".join(lines))
+    
+    def export_profile(self, kind):
+        path, _ = QFileDialog.getSaveFileName(self, "Profili Kaydet", f"profile.{kind}",
+                                              f"{kind.upper()} (*.{kind})")
+        if not path:
+            return
+        try:
+            if kind == "csv":
+                PROFILER.export_csv(path)
+            else:
+                PROFILER.export_json(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Hata", f"Profil kaydedilemedi: {e}")
+    
+    def on_power_changed(self):
+        enabled = self.power_checkbox.isChecked()
+        for widget in (self.power_fps_spin, self.power_idle_spin, self.power_battery_checkbox):
+            widget.setEnabled(enabled)
+        self.update_power_policy.emit(enabled, self.power_fps_spin.value(),
+                                      self.power_idle_spin.value(), self.power_battery_checkbox.isChecked())
+    
+    def on_cache_toggled(self, checked):
+        FRAME_CACHE.set_enabled(checked)
+        self.cache_limit_spin.setEnabled(checked)
     
     def set_position(self, position):
-        """Pet'in pozisyonunu ayarla"""
-        from PyQt5.QtWidgets import QApplication
-        screen = QApplication.desktop().screenGeometry()
-        
-        # Pet boyutunu hesapla
-        if hasattr(self, 'pet_size'):
-            pet_w, pet_h = self.pet_size
-        else:
-            pet_w, pet_h = 300, 400
-        
-        positions = {
-            'topleft': (20, 20),
-            'topright': (screen.width() - pet_w - 20, 20),
-            'bottomleft': (20, screen.height() - pet_h - 60),
-            'bottomright': (screen.width() - pet_w - 20, screen.height() - pet_h - 60)
-        }
-        
-        # MainWindow üzerinden pet'e eriş
-        main_window = self.window()
-        if hasattr(main_window, 'desktop_pet') and main_window.desktop_pet:
-            x, y = positions[position]
-            main_window.desktop_pet.move(x, y)
+        """Seçili pet'in pozisyonunu ayarla"""
+        if self.selected_pet is not None:
+            self.position_pet.emit(self.selected_pet, position)
     
     def start_desktop_pet(self):
         if self.video_path and self.current_preset:
             self.start_pet.emit(self.video_path, self.current_preset, self.scale_value, self.opacity_value)
-            self.is_running = True
-            self.start_btn.setEnabled(False)
-            self.stop_btn.setEnabled(True)
-            self.pos_topleft_btn.setEnabled(True)
-            self.pos_topright_btn.setEnabled(True)
-            self.pos_bottomleft_btn.setEnabled(True)
-            self.pos_bottomright_btn.setEnabled(True)
-            self.status_label.setText("✅ Çalışıyor")
-            self.status_label.setStyleSheet("""
-                QLabel {
-                    background-color: #1a1a2e;
-                    border: 2px solid #27ae60;
-                    border-radius: 8px;
-                    padding: 15px;
-                    color: #2ecc71;
-                    font-size: 16px;
-                    font-weight: bold;
-                }
-            """)
     
     def stop_desktop_pet(self):
-        self.stop_pet.emit()
-        self.is_running = False
-        self.start_btn.setEnabled(True)
-        self.stop_btn.setEnabled(False)
-        self.pos_topleft_btn.setEnabled(False)
-        self.pos_topright_btn.setEnabled(False)
-        self.pos_bottomleft_btn.setEnabled(False)
-        self.pos_bottomright_btn.setEnabled(False)
-        self.status_label.setText("⭕ Durdu")
-        self.status_label.setStyleSheet("""
-            QLabel {
-                background-color: #1a1a2e;
-                border: 2px solid #7b2cbf;
-                border-radius: 8px;
-                padding: 15px;
-                color: #e74c3c;
-                font-size: 16px;
-                font-weight: bold;
-            }
-        """)
+        if self.selected_pet is not None:
+            self.stop_pet.emit(self.selected_pet)
+    
+    def add_pet(self, pet_id, label):
+        """MainWindow yeni pet açtığında listeye ekler ve seçer"""
+        self.pet_settings[pet_id] = [self.scale_value, self.opacity_value]
+        item = QListWidgetItem(f"🐾 #{pet_id}  {label}")
+        item.setData(Qt.UserRole, pet_id)
+        self.pet_list.addItem(item)
+        self.pet_list.setCurrentItem(item)
+        self.update_running_state()
+    
+    def remove_pet(self, pet_id):
+        self.pet_settings.pop(pet_id, None)
+        for row in range(self.pet_list.count()):
+            if self.pet_list.item(row).data(Qt.UserRole) == pet_id:
+                self.pet_list.takeItem(row)
+                break
+        self.update_running_state()
+    
+    def on_pet_selected(self, current, previous=None):
+        self.selected_pet = current.data(Qt.UserRole) if current else None
+        if self.selected_pet is None:
+            return
+        # Sürgüleri seçili pet'in değerlerine getir (pet'e geri sinyal göndermeden)
+        scale, opacity = self.pet_settings[self.selected_pet]
+        for slider, value in ((self.scale_slider, scale), (self.opacity_slider, opacity)):
+            slider.blockSignals(True)
+            slider.setValue(int(round(value * 100)))
+            slider.blockSignals(False)
+        self.scale_value, self.opacity_value = scale, opacity
+        self.scale_value_label.setText(f"{int(round(scale * 100))}%")
+        self.opacity_value_label.setText(f"{int(round(opacity * 100))}%")
+    
+    def update_running_state(self):
+        running = self.is_running
+        has_selection = self.selected_pet is not None
+        self.stop_btn.setEnabled(has_selection)
+        self.stop_all_btn.setEnabled(running)
+        self.pos_topleft_btn.setEnabled(has_selection)
+        self.pos_topright_btn.setEnabled(has_selection)
+        self.pos_bottomleft_btn.setEnabled(has_selection)
+        self.pos_bottomright_btn.setEnabled(has_selection)
+        if running:
+            self.status_label.setText(f"✅ Çalışıyor ({len(self.pet_settings)} pet)")
+            set_style_state(self.status_label, "running")
+        else:
+            self.status_label.setText("⭕ Durdu")
+            set_style_state(self.status_label, "")
+
+
+def preset_info_text(values):
+    """Galeri kartındaki özet: aralıklar ve açık kenar iyileştirmeleri"""
+    ranges = preset_ranges(values)
+    if len(ranges) > 1 or values.get('softness'):
+        info_text = f"{len(ranges)} aralık\nYumuşaklık: {values.get('softness', 0)}"
+    else:
+        info_text = f"Lower: {list(ranges[0][0])}\nUpper: {list(ranges[0][1])}"
+    if any(values.get(key) for key in REFINE_KEYS):
+        info_text += "\n✨ " + " ".join(f"{key} {values[key]:g}" for key in REFINE_KEYS if values.get(key))
+    return info_text
+
+
+class PresetListModel(QAbstractListModel):
+    """PresetStore'un galeri modeli; store sinyalleriyle satır satır güncellenir.
+    
+    Küçük resimler yalnız görünen kartlar çizilirken yüklenir ve sınırlı bir
+    LRU önbellekte tutulur.
+    """
+    ValuesRole = Qt.UserRole
+    InfoRole = Qt.UserRole + 1
+    ThumbnailRole = Qt.UserRole + 2
+    SelectedRole = Qt.UserRole + 3
+    KindRole = Qt.UserRole + 4
+    
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.names = store.names()
+        self.rows = {name: row for row, name in enumerate(self.names)}
+        self.selected = None
+        self._info = {}
+        self._thumbnails = OrderedDict()
+        store.preset_changed.connect(self.on_preset_changed)
+        store.preset_removed.connect(self.on_preset_removed)
+        store.reloaded.connect(self.reset)
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self.names[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == self.ValuesRole:
+            return self.store.get(name)
+        if role == self.InfoRole:
+            info = self._info.get(name)
+            if info is None:
+                info = self._info[name] = preset_info_text(self.store.get(name))
+            return info
+        if role == self.ThumbnailRole:
+            return self.thumbnail(name)
+        if role == self.SelectedRole:
+            return name == self.selected
+        if role == self.KindRole:
+            values = self.store.get(name)
+            return {'lut': preset_needs_lut(values),
+                    'refine': any(values.get(key) for key in REFINE_KEYS)}
+        return None
+    
+    def thumbnail(self, name):
+        if name in self._thumbnails:
+            self._thumbnails.move_to_end(name)
+            return self._thumbnails[name]
+        path = self.store.meta(name).get('thumbnail')
+        pixmap = QPixmap(path) if path and os.path.exists(path) else None
+        self._thumbnails[name] = pixmap
+        if len(self._thumbnails) > GALLERY_THUMB_CACHE:
+            self._thumbnails.popitem(last=False)
+        return pixmap
+    
+    def forget(self, name):
+        self._info.pop(name, None)
+        self._thumbnails.pop(name, None)
+    
+    def index_of(self, name):
+        row = self.rows.get(name)
+        return self.index(row) if row is not None else QModelIndex()
+    
+    def set_selected(self, name):
+        """Yalnız eski ve yeni seçili satırları yeniden çizdir"""
+        previous, self.selected = self.selected, name
+        for changed in (previous, name):
+            index = self.index_of(changed)
+            if index.isValid():
+                self.dataChanged.emit(index, index, [self.SelectedRole])
+    
+    def on_preset_changed(self, name):
+        self.forget(name)
+        row = self.rows.get(name)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+            return
+        row = len(self.names)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.names.append(name)
+        self.rows[name] = row
+        self.endInsertRows()
+    
+    def on_preset_removed(self, name):
+        self.forget(name)
+        row = self.rows.get(name)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.names[row]
+        self.rows = {name: row for row, name in enumerate(self.names)}
+        self.endRemoveRows()
+    
+    def reset(self):
+        self.beginResetModel()
+        self.names = self.store.names()
+        self.rows = {name: row for row, name in enumerate(self.names)}
+        self._info.clear()
+        self._thumbnails.clear()
+        self.endResetModel()
+
+
+class PresetFilterModel(QSortFilterProxyModel):
+    """Ada göre arama ve preset türüne göre süzme"""
+    KINDS = [("Tümü", None), ("Tek aralık", 'single'), ("Çok aralık / yumuşak", 'lut'),
+             ("Kenar iyileştirmeli", 'refine')]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.kind = None
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+    
+    def set_kind(self, kind):
+        self.kind = kind
+        self.invalidateFilter()
+    
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not super().filterAcceptsRow(source_row, source_parent):
+            return False
+        if self.kind is None:
+            return True
+        kind = self.sourceModel().index(source_row).data(PresetListModel.KindRole)
+        if self.kind == 'single':
+            return not kind['lut']
+        return kind[self.kind]
+
+
+class PresetCardDelegate(QStyledItemDelegate):
+    """Preset kartını widget oluşturmadan çizer; Seç/Sil düğmeleri tıklamayla yakalanır"""
+    select_requested = pyqtSignal(str)
+    delete_requested = pyqtSignal(str)
+    
+    CARD_SIZE = QSize(220, 230)
+    MARGIN = 6
+    
+    @classmethod
+    def button_rects(cls, rect):
+        card = rect.adjusted(cls.MARGIN, cls.MARGIN, -cls.MARGIN, -cls.MARGIN)
+        top = card.bottom() - 40
+        delete = QRect(card.right() - 52, top, 40, 30)
+        select = QRect(card.left() + 12, top, delete.left() - card.left() - 20, 30)
+        return select, delete
+    
+    def sizeHint(self, option, index):
+        return self.CARD_SIZE
+    
+    def paint(self, painter, option, index):
+        selected = index.data(PresetListModel.SelectedRole)
+        hovered = bool(option.state & QStyle.State_MouseOver)
+        card = option.rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(QColor('#c77dff' if selected or hovered else '#7b2cbf'), 2))
+        painter.setBrush(QColor('#5a189a' if selected else '#1a1a2e'))
+        painter.drawRoundedRect(card, 10, 10)
+        
+        inner = card.adjusted(12, 10, -12, -10)
+        font = QFont(option.font)
+        font.setPixelSize(16)
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(QColor('#ffffff' if selected else '#c77dff'))
+        name = f"{'✓ ' if selected else '🎨 '}{index.data(Qt.DisplayRole)}"
+        name_rect = QRect(inner.left(), inner.top(), inner.width(), 24)
+        painter.drawText(name_rect, Qt.AlignLeft | Qt.AlignVCenter,
+                         QFontMetrics(font).elidedText(name, Qt.ElideRight, inner.width()))
+        
+        thumb_rect = QRect(inner.left(), name_rect.bottom() + 4, inner.width(), 90)
+        pixmap = index.data(PresetListModel.ThumbnailRole)
+        if pixmap is not None and not pixmap.isNull():
+            scaled = pixmap.scaled(thumb_rect.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            painter.drawPixmap(thumb_rect.center().x() - scaled.width() // 2,
+                               thumb_rect.center().y() - scaled.height() // 2, scaled)
+        
+        font.setPixelSize(12)
+        font.setBold(False)
+        painter.setFont(font)
+        painter.setPen(QColor('#e0e0e0' if selected else '#9d4edd'))
+        select, delete = self.button_rects(option.rect)
+        info_rect = QRect(inner.left(), thumb_rect.bottom() + 4, inner.width(),
+                          select.top() - thumb_rect.bottom() - 8)
+        painter.drawText(info_rect, Qt.AlignLeft | Qt.AlignTop, index.data(PresetListModel.InfoRole))
+        
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor('#27ae60' if selected else '#5a189a'))
+        painter.drawRoundedRect(select, 5, 5)
+        painter.setBrush(QColor('#e63946'))
+        painter.drawRoundedRect(delete, 5, 5)
+        painter.setPen(QColor('white'))
+        painter.drawText(select, Qt.AlignCenter, "✓ Seçili" if selected else "✓ Seç")
+        painter.drawText(delete, Qt.AlignCenter, "🗑")
+        painter.restore()
+    
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            select, delete = self.button_rects(option.rect)
+            name = index.data(Qt.DisplayRole)
+            if select.contains(event.pos()):
+                self.select_requested.emit(name)
+                return True
+            if delete.contains(event.pos()):
+                self.delete_requested.emit(name)
+                return True
+        return super().editorEvent(event, model, option, index)
 
 
 class SavedSettingsWidget(QWidget):
-    """Gallery yerine Saved Settings"""
+    """Gallery yerine Saved Settings.
+    
+    Kartlar QListView + PresetCardDelegate ile çizilir: yalnız görünen kartlar
+    boyanır, seçim ve store değişiklikleri yalnız ilgili satırları günceller.
+    """
     preset_selected = pyqtSignal(str, dict)
     
-    def __init__(self):
+    def __init__(self, store):
         super().__init__()
-        self.presets = self.load_presets()
+        self.store = store
         self.selected_preset = None
+        self.model = PresetListModel(store, self)
+        self.proxy = PresetFilterModel(self)
+        self.proxy.setSourceModel(self.model)
         self.init_ui()
+        for signal in (self.model.rowsInserted, self.model.rowsRemoved, self.model.modelReset,
+                       self.proxy.layoutChanged, self.proxy.rowsInserted, self.proxy.rowsRemoved,
+                       self.proxy.modelReset):
+            signal.connect(self.update_count)
+        store.preset_removed.connect(self.on_preset_removed)
+        self.update_count()
     
     def init_ui(self):
         layout = QVBoxLayout()
         
         title = QLabel("💾 Saved Settings")
-        title.setStyleSheet("font-size: 20px; color: #c77dff; font-weight: bold; padding: 10px;")
+        title.setProperty("role", "title")
         layout.addWidget(title)
         
-        # Scroll area for presets
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setStyleSheet("QScrollArea { border: none; background-color: #0f0f1e; }")
-        
-        container = QWidget()
-        self.grid_layout = QGridLayout()
-        self.grid_layout.setSpacing(15)
-        container.setLayout(self.grid_layout)
-        
-        self.refresh_gallery()
-        
-        scroll.setWidget(container)
-        layout.addWidget(scroll)
-        self.setLayout(layout)
-    
-    def refresh_gallery(self):
-        # Clear existing widgets
-        for i in reversed(range(self.grid_layout.count())): 
-            self.grid_layout.itemAt(i).widget().setParent(None)
-        
-        self.presets = self.load_presets()
-        
-        if not self.presets:
-            empty_label = QLabel("Henüz ayar kaydedilmedi.\n'Add' sekmesinden yeni ayar ekleyin.")
-            empty_label.setAlignment(Qt.AlignCenter)
-            empty_label.setStyleSheet("color: #9d4edd; font-size: 16px; padding: 50px;")
-            self.grid_layout.addWidget(empty_label, 0, 0)
-            return
-        
-        row, col = 0, 0
-        for name, values in self.presets.items():
-            preset_widget = self.create_preset_widget(name, values)
-            self.grid_layout.addWidget(preset_widget, row, col)
-            col += 1
-            if col > 2:
-                col = 0
-                row += 1
-    
-    def create_preset_widget(self, name, values):
-        widget = QWidget()
-        is_selected = (self.selected_preset == name)
-        
-        widget.setStyleSheet(f"""
-            QWidget {{
-                background-color: {'#5a189a' if is_selected else '#1a1a2e'};
-                border: 2px solid {'#c77dff' if is_selected else '#7b2cbf'};
-                border-radius: 10px;
-                padding: 15px;
-            }}
-            QWidget:hover {{
-                border-color: #c77dff;
-            }}
-        """)
-        
-        layout = QVBoxLayout()
-        
-        name_label = QLabel(f"{'✓ ' if is_selected else '🎨 '}{name}")
-        name_label.setStyleSheet(f"color: {'#ffffff' if is_selected else '#c77dff'}; font-size: 16px; font-weight: bold;")
-        layout.addWidget(name_label)
+        # Arama ve tür süzgeci
+        filter_layout = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("🔍 Ayar ara...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setProperty("role", "input")
+        self.search_input.textChanged.connect(self.proxy.setFilterFixedString)
         
-        info_label = QLabel(f"Lower: {values['lower']}\nUpper: {values['upper']}")
-        info_label.setStyleSheet(f"color: {'#e0e0e0' if is_selected else '#9d4edd'}; font-size: 12px;")
-        layout.addWidget(info_label)
+        self.kind_combo = QComboBox()
+        for label, kind in PresetFilterModel.KINDS:
+            self.kind_combo.addItem(label, kind)
+        self.kind_combo.currentIndexChanged.connect(
+            lambda i: self.proxy.set_kind(self.kind_combo.itemData(i)))
         
-        btn_layout = QHBoxLayout()
+        self.count_label = QLabel("")
+        self.count_label.setProperty("role", "hint")
         
-        select_btn = QPushButton("✓ Seç" if not is_selected else "✓ Seçili")
-        select_btn.clicked.connect(lambda: self.select_preset(name, values))
-        select_btn.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {'#27ae60' if is_selected else '#5a189a'};
-                color: white;
-                border: none;
-                border-radius: 5px;
-                padding: 8px;
-                font-size: 12px;
-            }}
-            QPushButton:hover {{
-                background-color: {'#2ecc71' if is_selected else '#7b2cbf'};
-            }}
-        """)
+        filter_layout.addWidget(self.search_input, 1)
+        filter_layout.addWidget(self.kind_combo)
+        filter_layout.addWidget(self.count_label)
+        layout.addLayout(filter_layout)
         
-        delete_btn = QPushButton("🗑")
-        delete_btn.clicked.connect(lambda: self.delete_preset(name))
-        delete_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #e63946;
-                color: white;
-                border: none;
-                border-radius: 5px;
-                padding: 8px;
-                font-size: 12px;
-                max-width: 40px;
-            }
-            QPushButton:hover {
-                background-color: #d62828;
-            }
-        """)
+        self.empty_label = QLabel("Henüz ayar kaydedilmedi.\n'Add' sekmesinden yeni ayar ekleyin.")
+        self.empty_label.setAlignment(Qt.AlignCenter)
+        self.empty_label.setProperty("role", "empty")
+        layout.addWidget(self.empty_label)
         
-        btn_layout.addWidget(select_btn)
-        btn_layout.addWidget(delete_btn)
-        layout.addLayout(btn_layout)
+        self.view = QListView()
+        self.view.setModel(self.proxy)
+        self.delegate = PresetCardDelegate(self.view)
+        self.delegate.select_requested.connect(self.select_by_name)
+        self.delegate.delete_requested.connect(self.delete_preset)
+        self.view.setItemDelegate(self.delegate)
+        self.view.setViewMode(QListView.IconMode)
+        self.view.setFlow(QListView.LeftToRight)
+        self.view.setWrapping(True)
+        self.view.setResizeMode(QListView.Adjust)
+        self.view.setMovement(QListView.Static)
+        self.view.setUniformItemSizes(True)
+        self.view.setSpacing(6)
+        self.view.setMouseTracking(True)
+        self.view.setSelectionMode(QListView.NoSelection)
+        self.view.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.view.activated.connect(lambda index: self.select_by_name(index.data(Qt.DisplayRole)))
+        self.view.setObjectName("preset_gallery")
+        layout.addWidget(self.view, 1)
         
-        widget.setLayout(layout)
-        return widget
+        self.setLayout(layout)
+    
+    def update_count(self, *args):
+        total = len(self.model.names)
+        self.empty_label.setVisible(total == 0)
+        self.view.setVisible(total > 0)
+        shown = self.proxy.rowCount()
+        self.count_label.setText(f"{total} ayar" if shown == total else f"{shown} / {total} ayar")
+    
+    def select_by_name(self, name):
+        values = self.store.get(name)
+        if values is not None:
+            self.select_preset(name, values)
     
     def select_preset(self, name, values):
+        # LUT'u seçim anında derle; pet başlarken ve sonraki seçimlerde hazır olur
+        if preset_needs_lut(values):
+            preset_lut(values)
         self.selected_preset = name
+        self.model.set_selected(name)
         self.preset_selected.emit(name, values)
-        self.refresh_gallery()
     
     def delete_preset(self, name):
         reply = QMessageBox.question(self, 'Sil', f'"{name}" ayarını silmek istediğinize emin misiniz?',
                                      QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            del self.presets[name]
-            self.save_presets()
-            if self.selected_preset == name:
-                self.selected_preset = None
-            self.refresh_gallery()
+            self.store.remove(name)
+    
+    def on_preset_removed(self, name):
+        if self.selected_preset == name:
+            self.selected_preset = None
+            self.model.selected = None
+
+
+class CpuMeteredPool:
+    """İşlerinin CPU süresini toplayan ThreadPoolExecutor sarmalayıcısı.
+    
+    thread_time yalnızca işi koşan thread'i sayar: beklemeler dahil
+    değildir, OpenCV'nin kendi iç thread'leri de sayılmaz.
+    """
+    def __init__(self, max_workers, thread_name_prefix=""):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self.cpu_seconds = 0.0
+    
+    def _run(self, fn, args, kwargs):
+        start = time.thread_time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.thread_time() - start
+            with self._lock:
+                self.cpu_seconds += elapsed
+    
+    def submit(self, fn, *args, **kwargs):
+        return self._pool.submit(self._run, fn, args, kwargs)
     
-    def load_presets(self):
-        if os.path.exists(PRESETS_FILE):
-            with open(PRESETS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+class TuningFrame:
+    """Canlı HSV ayarı için dondurulmuş önizleme karesi.
+    
+    Ölçekleme, HSV dönüşümü ve RGBA kopyası bir kez yapılır; sürgü
+    oynadıkça yalnızca inRange + maskeli kopya (ChromaKeyer.key_hsv) koşar.
+    """
+    def __init__(self, frame, scale):
+        h, w = frame.shape[:2]
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        if size != (w, h):
+            self.color = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        else:
+            # Çözücü kareyi bir sonraki okumada yeniden kullanır
+            self.color = frame.copy()
+        self.hsv = cv2.cvtColor(self.color, cv2.COLOR_BGR2HSV)
+        self.rgba = cv2.cvtColor(self.color, cv2.COLOR_BGR2RGBA)
+        self.out = np.empty_like(self.rgba)
+        self.image = frame_to_qimage(self.out)
     
-    def save_presets(self):
-        with open(PRESETS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.presets, f, indent=2, ensure_ascii=False)
+    def key(self, keyer):
+        if keyer.lut is not None or keyer.refining:
+            # Çok aralıklı preset tablo ile, kenar iyileştirmesi tam yoldan key'lenir
+            keyer.key(self.color, 1.0, self.out)
+        else:
+            keyer.key_hsv(self.rgba, self.hsv, self.out)
+        return self.image
+
+
+def refresh_interval_ms(widget):
+    """Pencerenin bulunduğu ekranın yenileme aralığı (ms)"""
+    handle = widget.window().windowHandle()
+    screen = (handle.screen() if handle else None) or QApplication.primaryScreen()
+    rate = screen.refreshRate() if screen else 60.0
+    return max(1, int(1000 / (rate if rate > 0 else 60.0)))
 
 
 class AddPresetWidget(QWidget):
-    preset_saved = pyqtSignal()
+    """Yeni preset ekleme sekmesi; canlı önizleme ve HSV ayarı.
     
-    def __init__(self):
+    Önizleme yalnızca sekme görünürken çalışır: set_preview_active(False)
+    oynatmayı duraklatır, çözücüyü ve keying tamponlarını bırakır. Son kare
+    ekranda ve bellekte kalır; yeniden etkinleşince çözücü arka planda aynı
+    kareden açılır, o hazır olana kadar bu kare gösterilir.
+    """
+    # (istek no, kaynak ya da None, hata mesajı); çözücü thread'inden gelir
+    source_reopened = pyqtSignal(int, object, str)
+    
+    def __init__(self, store):
         super().__init__()
+        self.store = store
         self.video_path = None
-        self.cap = None
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_preview)
+        self.source = None
+        # Son gösterilen ham kare (çözücü bir sonraki okumaya kadar geçerli tutar)
+        self.last_frame = None
+        # Dondurulmuşsa canlı ayarın yapıldığı kare
+        self.tuning = None
+        # Sürgü hareketleri ekran yenilemesine birleştirilir
+        self.retune_timer = QTimer(self)
+        self.retune_timer.setSingleShot(True)
+        self.retune_timer.timeout.connect(self.retune)
+        # Otomatik tahmin sürgülerle ifade edilemiyorsa (çok aralık/dolanan ton) preset'in kendisi
+        self.estimate = None
+        self.estimate_keyer = None
+        self.estimate_worker = None
+        self._applying_estimate = False
+        # Önizleme kareleri GUI thread'i dışında önden çözülür
+        self.decode_pool = CpuMeteredPool(max_workers=1, thread_name_prefix="preview-decode")
+        self.preview_seq = 0
+        # Kaynağın turdaki kare no'su (duraklayınca buradan devam edilir)
+        self.preview_pos = 0
+        # Sekme gizliyken None değilse: çözücü bırakıldı, bu kareden açılacak
+        self.resume_position = None
+        self.reopen_token = 0
+        self.source_reopened.connect(self.on_source_reopened)
+        self.preview_active = True
+        # GUI thread'inde harcanan önizleme CPU süresi (çözme havuzu ayrıca sayar)
+        self.preview_cpu = 0.0
+        self.cpu_sampled = None
+        self.keyer = ChromaKeyer((0, 0, 0), (179, 255, 10))
+        self.keyer.profile_name = "preview"
+        # Sürgüler 179/0'dan dolanan bir aralık verince (lower H > upper H) oynatmadaki
+        # gibi LUT'lu keyer; (preset hash'i, keyer)
+        self.wrap_keyer = None
+        self.presented_at = None
+        self.scheduler = PlaybackScheduler(self)
+        self.scheduler.tick.connect(self.update_preview)
         
         self.lower_h, self.lower_s, self.lower_v = 0, 0, 0
         self.upper_h, self.upper_s, self.upper_v = 179, 255, 10
@@ -668,25 +4333,16 @@ class AddPresetWidget(QWidget):
         
         # Title
         title = QLabel("➕ Yeni Ayar Ekle")
-        title.setStyleSheet("font-size: 20px; color: #c77dff; font-weight: bold; padding: 10px;")
+        title.setProperty("role", "title")
         layout.addWidget(title)
         
         # Name input
         name_layout = QHBoxLayout()
         name_label = QLabel("Ayar Adı:")
-        name_label.setStyleSheet("color: #c77dff; font-size: 14px; min-width: 100px;")
+        name_label.setProperty("role", "field")
         self.name_input = QLineEdit()
         self.name_input.setPlaceholderText("Örn: Yeşil Ekran, Mavi Arka Plan...")
-        self.name_input.setStyleSheet("""
-            QLineEdit {
-                background-color: #1a1a2e;
-                border: 2px solid #7b2cbf;
-                border-radius: 5px;
-                padding: 8px;
-                color: white;
-                font-size: 14px;
-            }
-        """)
+        self.name_input.setProperty("role", "input")
         name_layout.addWidget(name_label)
         name_layout.addWidget(self.name_input)
         layout.addLayout(name_layout)
@@ -694,20 +4350,48 @@ class AddPresetWidget(QWidget):
         # Preview
         preview_btn = QPushButton("📹 Test Videosu Yükle (Önizleme İçin)")
         preview_btn.clicked.connect(self.load_preview_video)
-        preview_btn.setStyleSheet(self.get_button_style())
+        preview_btn.setProperty("variant", "primary")
         layout.addWidget(preview_btn)
         
+        # Canlı ayar: kareyi dondur, sürgüler yalnız maskeyi yeniden hesaplar
+        tuning_layout = QHBoxLayout()
+        self.freeze_btn = QPushButton("⏸ Kareyi Dondur")
+        self.freeze_btn.setCheckable(True)
+        self.freeze_btn.setEnabled(False)
+        self.freeze_btn.toggled.connect(self.set_frozen)
+        self.freeze_btn.setProperty("variant", "primary")
+        
+        self.next_frame_btn = QPushButton("⏭ Sonraki Kare")
+        self.next_frame_btn.setEnabled(False)
+        self.next_frame_btn.clicked.connect(self.freeze_next_frame)
+        self.next_frame_btn.setProperty("variant", "primary")
+        
+        self.estimate_btn = QPushButton("🪄 Arka Planı Tahmin Et")
+        self.estimate_btn.setEnabled(False)
+        self.estimate_btn.clicked.connect(self.estimate_background)
+        self.estimate_btn.setProperty("variant", "primary")
+        
+        self.tuning_label = QLabel("")
+        self.tuning_label.setProperty("role", "hint")
+        
+        tuning_layout.addWidget(self.freeze_btn)
+        tuning_layout.addWidget(self.next_frame_btn)
+        tuning_layout.addWidget(self.estimate_btn)
+        tuning_layout.addWidget(self.tuning_label, 1)
+        layout.addLayout(tuning_layout)
+        
+        self.cpu_label = QLabel("")
+        self.cpu_label.setProperty("role", "hint")
+        layout.addWidget(self.cpu_label)
+        
+        self.estimate_label = QLabel("")
+        self.estimate_label.setWordWrap(True)
+        self.estimate_label.setProperty("role", "hint")
+        layout.addWidget(self.estimate_label)
+        
         self.preview_label = QLabel("Video yükleyerek ayarları test edebilirsiniz")
         self.preview_label.setAlignment(Qt.AlignCenter)
-        self.preview_label.setStyleSheet("""
-            QLabel {
-                background-color: #1a1a2e;
-                border: 2px solid #9d4edd;
-                border-radius: 10px;
-                color: #c77dff;
-                min-height: 300px;
-            }
-        """)
+        self.preview_label.setProperty("role", "preview")
         layout.addWidget(self.preview_label)
         
         # HSV Sliders
@@ -715,7 +4399,7 @@ class AddPresetWidget(QWidget):
         
         # Lower HSV
         lower_label = QLabel("🔽 Lower HSV Değerleri (Silinecek Renkler - Alt Sınır)")
-        lower_label.setStyleSheet("color: #c77dff; font-size: 16px; font-weight: bold; margin-top: 10px;")
+        lower_label.setProperty("role", "section")
         sliders_layout.addWidget(lower_label)
         
         self.lower_h_slider = self.create_slider("Hue:", 0, 179, 0, self.update_lower_h)
@@ -728,7 +4412,7 @@ class AddPresetWidget(QWidget):
         
         # Upper HSV
         upper_label = QLabel("🔼 Upper HSV Değerleri (Silinecek Renkler - Üst Sınır)")
-        upper_label.setStyleSheet("color: #c77dff; font-size: 16px; font-weight: bold; margin-top: 10px;")
+        upper_label.setProperty("role", "section")
         sliders_layout.addWidget(upper_label)
         
         self.upper_h_slider = self.create_slider("Hue:", 0, 179, 179, self.update_upper_h)
@@ -739,12 +4423,28 @@ class AddPresetWidget(QWidget):
         sliders_layout.addLayout(self.upper_s_slider)
         sliders_layout.addLayout(self.upper_v_slider)
         
+        # Maske iyileştirme (0 = kapalı); önizlemede çıktı çözünürlüğünde uygulanır
+        refine_label = QLabel("✨ Kenar İyileştirme")
+        refine_label.setProperty("role", "section")
+        sliders_layout.addWidget(refine_label)
+        
+        refine_layout = QHBoxLayout()
+        self.erode_spin = self.create_refine_spin("aşındır: ", 10, " px", "Kenardaki arka plan halkasını içeri doğru kırp")
+        self.dilate_spin = self.create_refine_spin("genişlet: ", 10, " px", "Maskedeki küçük delikleri kapat")
+        self.feather_spin = self.create_refine_spin("yumuşat: ", 15, " px", "Alfa kenarını Gauss ile yumuşat")
+        self.despill_spin = self.create_refine_spin("renk temizle: %", 100, "",
+                                                    "Kenarlara yansıyan arka plan rengini bastır")
+        for spin in (self.erode_spin, self.dilate_spin, self.feather_spin, self.despill_spin):
+            refine_layout.addWidget(spin)
+        refine_layout.addStretch()
+        sliders_layout.addLayout(refine_layout)
+        
         layout.addLayout(sliders_layout)
         
         # Save button
         save_btn = QPushButton("💾 Ayarları Kaydet")
         save_btn.clicked.connect(self.save_preset)
-        save_btn.setStyleSheet(self.get_button_style("#27ae60", "#2ecc71"))
+        save_btn.setProperty("variant", "success")
         layout.addWidget(save_btn)
         
         self.setLayout(layout)
@@ -753,32 +4453,16 @@ class AddPresetWidget(QWidget):
         layout = QHBoxLayout()
         
         label = QLabel(label_text)
-        label.setStyleSheet("color: #9d4edd; font-size: 13px; min-width: 100px;")
+        label.setProperty("role", "setting")
         
         slider = QSlider(Qt.Horizontal)
         slider.setMinimum(min_val)
         slider.setMaximum(max_val)
         slider.setValue(default)
-        slider.setStyleSheet("""
-            QSlider::groove:horizontal {
-                background: #1a1a2e;
-                height: 8px;
-                border-radius: 4px;
-            }
-            QSlider::handle:horizontal {
-                background: #9d4edd;
-                width: 18px;
-                margin: -5px 0;
-                border-radius: 9px;
-            }
-            QSlider::handle:horizontal:hover {
-                background: #c77dff;
-            }
-        """)
         slider.valueChanged.connect(callback)
         
         value_label = QLabel(str(default))
-        value_label.setStyleSheet("color: #c77dff; font-size: 13px; min-width: 40px;")
+        value_label.setProperty("role", "value")
         slider.valueChanged.connect(lambda v: value_label.setText(str(v)))
         
         layout.addWidget(label)
@@ -787,78 +4471,362 @@ class AddPresetWidget(QWidget):
         
         return layout
     
-    def get_button_style(self, color="#7b2cbf", hover_color="#9d4edd"):
-        return f"""
-            QPushButton {{
-                background-color: {color};
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 12px 24px;
-                font-size: 14px;
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {hover_color};
-            }}
-            QPushButton:pressed {{
-                background-color: #5a189a;
-            }}
-        """
+    def create_refine_spin(self, prefix, max_val, suffix, tooltip):
+        spin = QSpinBox()
+        spin.setRange(0, max_val)
+        spin.setPrefix(prefix)
+        spin.setSuffix(suffix)
+        spin.setToolTip(tooltip)
+        spin.valueChanged.connect(self.on_refine_changed)
+        return spin
     
     def update_lower_h(self, v):
         self.lower_h = v
+        self.on_range_changed()
     def update_lower_s(self, v):
         self.lower_s = v
+        self.on_range_changed()
     def update_lower_v(self, v):
         self.lower_v = v
+        self.on_range_changed()
     def update_upper_h(self, v):
         self.upper_h = v
+        self.on_range_changed()
     def update_upper_s(self, v):
         self.upper_s = v
+        self.on_range_changed()
     def update_upper_v(self, v):
         self.upper_v = v
+        self.on_range_changed()
+    
+    def on_range_changed(self):
+        if not self._applying_estimate and self.estimate is not None:
+            # Elle ayar: sürgülerle ifade edilemeyen tahmin bırakılır
+            self.estimate = self.estimate_keyer = None
+            self.estimate_label.setText("")
+        self.schedule_retune()
+    
+    def refine_values(self):
+        """Kenar iyileştirme ayarları; yalnız açık olanlar preset'e yazılır"""
+        values = {'erode': self.erode_spin.value(), 'dilate': self.dilate_spin.value(),
+                  'feather': self.feather_spin.value(), 'despill': self.despill_spin.value() / 100}
+        return {key: value for key, value in values.items() if value}
+    
+    def on_refine_changed(self):
+        refine = self.refine_values()
+        self.keyer.set_refine(refine)
+        if self.estimate_keyer is not None:
+            self.estimate_keyer.set_refine(refine)
+        self.schedule_retune()
+    
+    def schedule_retune(self):
+        """Donukken bir sonraki ekran yenilemesinde bir kez yeniden key'le"""
+        if self.tuning is not None and not self.retune_timer.isActive():
+            self.retune_timer.start(refresh_interval_ms(self))
+    
+    def preset_values(self):
+        """Kaydedilecek / önizlenecek preset"""
+        if self.estimate is not None:
+            return dict(self.estimate, **self.refine_values())
+        return dict({'lower': [self.lower_h, self.lower_s, self.lower_v],
+                     'upper': [self.upper_h, self.upper_s, self.upper_v]}, **self.refine_values())
+    
+    def active_keyer(self):
+        if self.estimate_keyer is not None:
+            return self.estimate_keyer
+        values = self.preset_values()
+        if preset_needs_lut(values):
+            # Tek inRange dolanan aralıkta hiçbir şeyi key'lemez; önizleme oynatmayla aynı olsun
+            digest = preset_hash(values)
+            if self.wrap_keyer is None or self.wrap_keyer[0] != digest:
+                keyer = ChromaKeyer.for_preset(values)
+                keyer.profile_name = "preview"
+                self.wrap_keyer = (digest, keyer)
+            return self.wrap_keyer[1]
+        self.keyer.set_range((self.lower_h, self.lower_s, self.lower_v),
+                             (self.upper_h, self.upper_s, self.upper_v))
+        return self.keyer
+    
+    def estimate_background(self):
+        if not self.video_path or self.estimate_worker is not None:
+            return
+        self.estimate_btn.setEnabled(False)
+        self.estimate_label.setText("🪄 Arka plan tahmin ediliyor...")
+        self.estimate_worker = BackgroundEstimateWorker(self.video_path)
+        self.estimate_worker.finished_ok.connect(self.apply_estimate)
+        self.estimate_worker.failed.connect(self.on_estimate_failed)
+        self.estimate_worker.finished.connect(self.on_estimate_done)
+        self.estimate_worker.start()
+    
+    def apply_estimate(self, result):
+        values = result['preset']
+        lower, upper = preset_ranges(values)[0]
+        self._applying_estimate = True
+        for layout, value in zip((self.lower_h_slider, self.lower_s_slider, self.lower_v_slider,
+                                  self.upper_h_slider, self.upper_s_slider, self.upper_v_slider),
+                                 lower + upper):
+            layout.itemAt(1).widget().setValue(value)
+        self._applying_estimate = False
+        if preset_needs_lut(values):
+            self.estimate = values
+            self.estimate_keyer = ChromaKeyer.for_preset(values)
+            self.estimate_keyer.profile_name = "preview"
+            self.estimate_keyer.set_refine(self.refine_values())
+        else:
+            self.estimate = self.estimate_keyer = None
+        count = len(preset_ranges(values))
+        self.estimate_label.setText(
+            f"🪄 {count} aralık  •  kenarların %{result['border_coverage'] * 100:.0f}'i, "
+            f"karenin %{result['coverage'] * 100:.0f}'i key'lenir  •  "
+            f"{result['frames']} kare, {result['seconds']:.1f} sn"
+            + ("  (sürgüler ilk aralığı gösterir; elle değiştirmek tahmini bırakır)" if count > 1 else ""))
+        self.schedule_retune()
+    
+    def on_estimate_failed(self, message):
+        self.estimate_label.setText(f"❌ {message}")
+    
+    def on_estimate_done(self):
+        self.estimate_worker = None
+        self.estimate_btn.setEnabled(self.has_video)
+    
+    def set_frozen(self, frozen):
+        if frozen:
+            if self.last_frame is None:
+                self.freeze_btn.setChecked(False)
+                return
+            self.scheduler.pause()
+            self.tuning = TuningFrame(self.last_frame, self.preview_scale(self.last_frame))
+            self.retune()
+        else:
+            self.tuning = None
+            self.retune_timer.stop()
+            self.tuning_label.setText("")
+            if self.source:
+                self.presented_at = None
+                self.scheduler.resume()
+        self.next_frame_btn.setEnabled(frozen)
+    
+    def freeze_next_frame(self):
+        if not self.source:
+            return
+        cpu = time.thread_time()
+        ret, frame = self.read_preview_frame()
+        self.preview_seq += 1
+        self.source.request_fill(self.decode_pool)
+        if not ret:
+            return
+        self.last_frame = frame
+        self.tuning = TuningFrame(frame, self.preview_scale(frame))
+        self.preview_cpu += time.thread_time() - cpu
+        self.retune()
+    
+    def retune(self):
+        """Dondurulmuş kareyi güncel aralıkla yeniden key'le ve göster"""
+        if self.tuning is None:
+            return
+        cpu = time.thread_time()
+        start = time.perf_counter()
+        image = self.tuning.key(self.active_keyer())
+        self.preview_label.setPixmap(QPixmap.fromImage(image))
+        self.tuning_label.setText(f"⚡ {(time.perf_counter() - start) * 1000:.1f} ms")
+        self.preview_cpu += time.thread_time() - cpu
+    
+    @staticmethod
+    def preview_scale(frame):
+        """Önizleme alanına (600x300) sığdıran küçültme oranı"""
+        h, w = frame.shape[:2]
+        max_w, max_h = 600, 300
+        if w > max_w or h > max_h:
+            return min(max_w / w, max_h / h)
+        return 1.0
     
     def load_preview_video(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Video Seç", "", "Video Files (*.mp4 *.avi *.mov)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "Video Seç", "", VIDEO_FILE_FILTER)
         if file_path:
+            self.freeze_btn.setChecked(False)
+            self.close_source()
+            try:
+                self.source = open_source(file_path, prefetch=PREFETCH_FRAMES)
+            except ValueError as e:
+                QMessageBox.critical(self, "Hata", str(e))
+                return
             self.video_path = file_path
-            if self.cap:
-                self.cap.release()
-            self.cap = cv2.VideoCapture(self.video_path)
-            self.timer.start(30)
+            self.preview_seq = 0
+            self.preview_pos = 0
+            self.presented_at = None
+            self.scheduler.start(self.source.fps)
+            self.source.request_fill(self.decode_pool)
+            self.freeze_btn.setEnabled(True)
+            self.estimate_btn.setEnabled(self.estimate_worker is None)
+    
+    def close_source(self):
+        self.scheduler.stop()
+        self.last_frame = None
+        self.freeze_btn.setEnabled(False)
+        self.estimate_btn.setEnabled(False)
+        # Süren yeniden açma isteği gelince bırakılsın
+        self.reopen_token += 1
+        self.resume_position = None
+        if self.source:
+            self.source.release()
+            self.source = None
+    
+    @property
+    def has_video(self):
+        """Önizleme videosu açık ya da sekme gizli olduğu için bırakılmış"""
+        return self.source is not None or self.resume_position is not None
+    
+    @property
+    def preview_cpu_seconds(self):
+        """Önizlemenin toplam CPU süresi: GUI thread'i + çözme havuzu"""
+        return self.preview_cpu + self.decode_pool.cpu_seconds
     
-    def update_preview(self):
-        if not self.cap:
+    def set_preview_active(self, active):
+        """Sekme görünür ve pencere açıksa True; değilse önizleme kaynakları bırakılır"""
+        if active == self.preview_active:
             return
-        
-        ret, frame = self.cap.read()
-        if not ret:
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            ret, frame = self.cap.read()
-        
+        self.preview_active = active
+        if active:
+            self.resume_preview()
+        else:
+            self.suspend_preview()
+    
+    def suspend_preview(self):
+        """Oynatmayı duraklat, çözücüyü ve keying tamponlarını bırak"""
+        # Yolda olan yeniden açma artık geçersiz
+        self.reopen_token += 1
+        self.retune_timer.stop()
+        if self.source is None:
+            return
+        if self.tuning is None:
+            self.scheduler.pause()
+        self.resume_position = self.preview_pos
+        # Çözücü kareleri geri dönüştürür; gösterilen kare bırakılmadan önce kopyalanır
+        if self.last_frame is not None:
+            self.last_frame = self.last_frame.copy()
+        self.source.release()
+        self.source = None
+        self.next_frame_btn.setEnabled(False)
+        self.keyer.release_buffers()
+        self.wrap_keyer = None
+        if self.estimate_keyer is not None:
+            self.estimate_keyer.release_buffers()
+    
+    def resume_preview(self):
+        """Çözücüyü kalınan kareden arka planda aç; o zamana kadar son kare ekranda kalır"""
+        if self.resume_position is None:
+            return
+        self.reopen_token += 1
+        self.decode_pool.submit(self.reopen_source, self.reopen_token, self.video_path, self.resume_position)
+    
+    def reopen_source(self, token, path, position):
+        """Çözücü thread'inde: kaynağı aç ve konumla (seek GUI'yi bekletmesin)"""
+        try:
+            source = open_source(path, prefetch=PREFETCH_FRAMES)
+        except ValueError as e:
+            self.source_reopened.emit(token, None, str(e))
+            return
+        try:
+            source.seek(position)
+        except cv2.error:
+            # Konumlanamıyorsa baştan oynamak yeter
+            source.rewind()
+        self.source_reopened.emit(token, source, "")
+    
+    def on_source_reopened(self, token, source, error):
+        if token != self.reopen_token or not self.preview_active:
+            # Bu arada sekme yeniden gizlendi ya da başka video açıldı
+            if source is not None:
+                source.release()
+            return
+        if source is None:
+            self.close_source()
+            self.preview_label.setText(f"⚠️ {error}")
+            return
+        self.source = source
+        self.preview_pos = self.resume_position
+        self.resume_position = None
+        if self.tuning is not None:
+            self.next_frame_btn.setEnabled(True)
+        else:
+            self.presented_at = None
+            self.scheduler.resume()
+        source.request_fill(self.decode_pool)
+    
+    def show_preview_stats(self):
+        """Önizleme CPU sayacını güncelle (ana pencere saniyede bir çağırır)"""
+        cpu = self.preview_cpu_seconds
+        now = time.monotonic()
+        text = f"🧮 Önizleme CPU: {cpu:.1f} sn"
+        if self.cpu_sampled is not None:
+            last_cpu, last_at = self.cpu_sampled
+            if now > last_at:
+                text += f"  •  son saniye %{(cpu - last_cpu) / (now - last_at) * 100:.0f}"
+        if self.resume_position is not None:
+            text += "  •  ⏸ sekme gizli, çözücü bırakıldı"
+        self.cpu_sampled = (cpu, now)
+        self.cpu_label.setText(text)
+    
+    def shutdown(self):
+        self.close_source()
+        self.decode_pool.shutdown(wait=True)
+        if self.estimate_worker is not None:
+            self.estimate_worker.wait()
+    
+    def read_preview_frame(self):
+        ret, frame = self.source.read()
         if not ret:
+            self.source.rewind()
+            self.preview_pos = 0
+            ret, frame = self.source.read()
+        if ret:
+            self.preview_pos += 1
+        return ret, frame
+    
+    def update_preview(self, target):
+        if not self.source:
             return
         
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        cpu = time.thread_time()
+        profiling = PROFILER.enabled
+        if profiling:
+            t = time.perf_counter()
         
-        lower = (self.lower_h, self.lower_s, self.lower_v)
-        upper = (self.upper_h, self.upper_s, self.upper_v)
+        # Geride kaldıysak aradaki kareleri çözmeden atla
+        while self.preview_seq < target:
+            if self.source.grab():
+                self.preview_pos += 1
+            else:
+                self.source.rewind()
+                self.preview_pos = 0
+            self.preview_seq += 1
         
-        mask = cv2.inRange(hsv, lower, upper)
-        frame[mask > 0] = (0, 0, 0, 0)
+        ret, frame = self.read_preview_frame()
+        self.preview_seq += 1
+        self.source.request_fill(self.decode_pool)
+        if not ret:
+            self.preview_cpu += time.thread_time() - cpu
+            return
+        if profiling:
+            PROFILER.lap("preview.decode", t)
+        self.last_frame = frame
         
-        h, w, _ = frame.shape
-        max_w, max_h = 600, 300
-        if w > max_w or h > max_h:
-            scale = min(max_w/w, max_h/h)
-            new_w, new_h = int(w*scale), int(h*scale)
-            frame = cv2.resize(frame, (new_w, new_h))
+        # Önizleme alanına sığdır, keying küçük karede yapılır
+        scale = self.preview_scale(frame)
+        frame = self.active_keyer().key(frame, scale)
         
-        h, w, ch = frame.shape
-        qimg = QImage(frame.data, w, h, w*ch, QImage.Format_RGBA8888)
+        if profiling:
+            t = time.perf_counter()
+        qimg = frame_to_qimage(frame)
         self.preview_label.setPixmap(QPixmap.fromImage(qimg))
+        if profiling:
+            now = PROFILER.lap("preview.paint", t)
+            if self.presented_at is not None:
+                PROFILER.record("preview.interval", now - self.presented_at)
+            self.presented_at = now
+        else:
+            self.presented_at = None
+        self.preview_cpu += time.thread_time() - cpu
     
     def save_preset(self):
         name = self.name_input.text().strip()
@@ -866,22 +4834,15 @@ class AddPresetWidget(QWidget):
             QMessageBox.warning(self, "Uyarı", "Lütfen bir ayar adı girin!")
             return
         
-        presets = {}
-        if os.path.exists(PRESETS_FILE):
-            with open(PRESETS_FILE, 'r', encoding='utf-8') as f:
-                presets = json.load(f)
-        
-        presets[name] = {
-            'lower': [self.lower_h, self.lower_s, self.lower_v],
-            'upper': [self.upper_h, self.upper_s, self.upper_v]
-        }
-        
-        with open(PRESETS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(presets, f, indent=2, ensure_ascii=False)
+        meta = {'clip': os.path.abspath(self.video_path) if self.video_path else None}
+        # Galeri için son key'lenmiş önizleme karesi
+        pixmap = self.preview_label.pixmap()
+        if pixmap is not None and not pixmap.isNull():
+            meta['thumbnail'] = self.store.save_thumbnail(name, pixmap.toImage())
+        self.store.put(name, self.preset_values(), **meta)
         
         QMessageBox.information(self, "Başarılı", f"'{name}' ayarı kaydedildi!")
         self.name_input.clear()
-        self.preset_saved.emit()
 
 
 class AboutWidget(QWidget):
@@ -895,7 +4856,7 @@ class AboutWidget(QWidget):
         
         title = QLabel("👨‍💻 About Developer")
         title.setAlignment(Qt.AlignCenter)
-        title.setStyleSheet("font-size: 28px; color: #c77dff; font-weight: bold; margin: 20px;")
+        title.setProperty("role", "hero")
         
         info = QLabel("""
         <div style='text-align: center; line-height: 1.8;'>
@@ -940,111 +4901,712 @@ class AboutWidget(QWidget):
         self.setLayout(layout)
 
 
+# Uygulama teması: widget'lara tek tek stil vermek yerine bir kez derlenir.
+# Widget'lar "role" (QLabel) ve "variant" (QPushButton) özellikleriyle seçilir;
+# giriş alanları yalnız ana pencerede temalanır (diyaloglar ve pet'ler etkilenmez).
+APP_STYLESHEET = """
+QMainWindow { background-color: #0f0f1e; }
+QTabWidget::pane {
+    border: 2px solid #7b2cbf;
+    border-radius: 8px;
+    background-color: #0f0f1e;
+}
+QTabBar::tab {
+    background-color: #1a1a2e;
+    color: #9d4edd;
+    padding: 12px 24px;
+    margin: 2px;
+    border-top-left-radius: 8px;
+    border-top-right-radius: 8px;
+    font-size: 14px;
+    font-weight: bold;
+}
+QTabBar::tab:selected { background-color: #7b2cbf; color: white; }
+QTabBar::tab:hover { background-color: #5a189a; color: white; }
+
+QLabel[role="title"] { font-size: 20px; color: #c77dff; font-weight: bold; padding: 10px; }
+QLabel[role="hero"] { font-size: 28px; color: #c77dff; font-weight: bold; margin: 20px; }
+QLabel[role="section"] { font-size: 16px; color: #c77dff; font-weight: bold; margin-top: 10px; padding: 5px; }
+QLabel[role="field"] { color: #c77dff; font-size: 14px; min-width: 80px; }
+QLabel[role="setting"] { color: #9d4edd; font-size: 14px; min-width: 100px; }
+QLabel[role="value"] { color: #c77dff; font-size: 14px; min-width: 50px; }
+QLabel[role="hint"] { color: #9d4edd; font-size: 12px; }
+QLabel[role="empty"] { color: #9d4edd; font-size: 16px; padding: 50px; }
+QLabel[role="box"] {
+    background-color: #1a1a2e;
+    border: 2px solid #7b2cbf;
+    border-radius: 5px;
+    padding: 8px;
+    color: #9d4edd;
+}
+QLabel[role="info"] {
+    background-color: #1a1a2e;
+    border-left: 4px solid #9d4edd;
+    padding: 12px;
+    color: #c77dff;
+    font-size: 13px;
+    border-radius: 5px;
+    margin: 10px 0;
+}
+QLabel[role="status"] {
+    background-color: #1a1a2e;
+    border: 2px solid #7b2cbf;
+    border-radius: 8px;
+    padding: 15px;
+    color: #e74c3c;
+    font-size: 16px;
+    font-weight: bold;
+}
+QLabel[role="status"][state="running"] { border-color: #27ae60; color: #2ecc71; }
+QLabel[role="profile"] {
+    background-color: #1a1a2e;
+    border: 1px solid #7b2cbf;
+    border-radius: 5px;
+    padding: 6px;
+    color: #c77dff;
+}
+QLabel[role="preview"] {
+    background-color: #1a1a2e;
+    border: 2px solid #9d4edd;
+    border-radius: 10px;
+    color: #c77dff;
+    min-height: 300px;
+}
+
+QPushButton[variant="primary"], QPushButton[variant="success"], QPushButton[variant="danger"] {
+    background-color: #7b2cbf;
+    color: white;
+    border: none;
+    border-radius: 8px;
+    padding: 12px 24px;
+    font-size: 15px;
+    font-weight: bold;
+}
+QPushButton[variant="primary"]:hover { background-color: #9d4edd; }
+QPushButton[variant="success"] { background-color: #27ae60; }
+QPushButton[variant="success"]:hover { background-color: #2ecc71; }
+QPushButton[variant="danger"] { background-color: #c0392b; }
+QPushButton[variant="danger"]:hover { background-color: #e74c3c; }
+QPushButton[variant="small"] {
+    background-color: #5a189a;
+    color: white;
+    border: none;
+    border-radius: 5px;
+    padding: 8px 12px;
+    font-size: 11px;
+    font-weight: bold;
+}
+QPushButton[variant="small"]:hover { background-color: #7b2cbf; }
+QPushButton[variant="small"]:pressed { background-color: #3c096c; }
+QPushButton[variant="primary"]:pressed, QPushButton[variant="success"]:pressed,
+QPushButton[variant="danger"]:pressed { background-color: #5a189a; }
+QPushButton[variant="primary"]:disabled, QPushButton[variant="success"]:disabled,
+QPushButton[variant="danger"]:disabled, QPushButton[variant="small"]:disabled {
+    background-color: #2c2c2c;
+    color: #666;
+}
+
+QMainWindow QCheckBox { color: #9d4edd; font-size: 14px; }
+QMainWindow QSlider::groove:horizontal { background: #1a1a2e; height: 8px; border-radius: 4px; }
+QMainWindow QSlider::handle:horizontal { background: #9d4edd; width: 18px; margin: -5px 0; border-radius: 9px; }
+QMainWindow QSlider::handle:horizontal:hover { background: #c77dff; }
+QMainWindow QComboBox, QMainWindow QSpinBox {
+    background-color: #1a1a2e;
+    border: 2px solid #7b2cbf;
+    border-radius: 5px;
+    padding: 4px;
+    color: #c77dff;
+}
+QLineEdit[role="input"] {
+    background-color: #1a1a2e;
+    border: 2px solid #7b2cbf;
+    border-radius: 5px;
+    padding: 8px;
+    color: white;
+    font-size: 14px;
+}
+QMainWindow QListWidget {
+    background-color: #1a1a2e;
+    border: 2px solid #7b2cbf;
+    border-radius: 5px;
+    color: #c77dff;
+    font-size: 13px;
+}
+QMainWindow QListWidget::item:selected { background-color: #5a189a; color: white; }
+QListView#preset_gallery { border: none; background-color: #0f0f1e; }
+"""
+
+
+def set_style_state(widget, state):
+    """Temadaki [state=...] kuralını değiştir; özellik değişince stil yeniden uygulanmalı"""
+    widget.setProperty("state", state)
+    widget.style().unpolish(widget)
+    widget.style().polish(widget)
+
+
 class MainWindow(QMainWindow):
+    """Kontrol penceresi.
+    
+    İlk açılışta yalnız Run/Stop sekmesi kurulur; diğer sekmeler ilk
+    seçildiklerinde oluşturulur (saved_settings/add_preset/about o zamana kadar
+    None). Tema uygulama düzeyinde bir kez verilir.
+    """
+    TAB_TITLES = ["▶ Run/Stop", "💾 Saved Settings", "➕ Add", "ℹ About"]
+    first_painted = pyqtSignal(float)  # perf_counter zamanı
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("🎭 Desktop Pet - Anime Companion")
         self.setGeometry(100, 100, 1000, 700)
         
-        self.desktop_pet = None
-        
-        # Set dark purple theme
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #0f0f1e;
-            }
-            QTabWidget::pane {
-                border: 2px solid #7b2cbf;
-                border-radius: 8px;
-                background-color: #0f0f1e;
-            }
-            QTabBar::tab {
-                background-color: #1a1a2e;
-                color: #9d4edd;
-                padding: 12px 24px;
-                margin: 2px;
-                border-top-left-radius: 8px;
-                border-top-right-radius: 8px;
-                font-size: 14px;
-                font-weight: bold;
-            }
-            QTabBar::tab:selected {
-                background-color: #7b2cbf;
-                color: white;
-            }
-            QTabBar::tab:hover {
-                background-color: #5a189a;
-                color: white;
-            }
-        """)
+        app = QApplication.instance()
+        if app.styleSheet() != APP_STYLESHEET:
+            app.setStyleSheet(APP_STYLESHEET)
+        
+        self.pet_manager = PetManager(self)
         
         # Create tab widget
         self.tabs = QTabWidget()
         
         # Create widgets
-        self.control_panel = ControlPanel()
-        self.saved_settings = SavedSettingsWidget()
-        self.add_preset = AddPresetWidget()
-        self.about = AboutWidget()
+        self.preset_store = PresetStore(parent=self)
+        self.preset_store.save_failed.connect(self.on_preset_save_failed)
+        self.control_panel = ControlPanel(self.preset_store)
+        self.saved_settings = None
+        self.add_preset = None
+        self.about = None
         
         # Connect signals
         self.control_panel.start_pet.connect(self.start_desktop_pet)
-        self.control_panel.stop_pet.connect(self.stop_desktop_pet)
-        self.control_panel.update_pet_scale.connect(self.update_pet_scale)
-        self.control_panel.update_pet_opacity.connect(self.update_pet_opacity)
-        self.saved_settings.preset_selected.connect(self.control_panel.set_preset)
-        self.add_preset.preset_saved.connect(self.saved_settings.refresh_gallery)
+        self.control_panel.stop_pet.connect(self.pet_manager.stop_pet)
+        self.control_panel.stop_all_pets.connect(self.pet_manager.stop_all)
+        self.control_panel.update_pet_scale.connect(self.pet_manager.set_pet_scale)
+        self.control_panel.update_pet_opacity.connect(self.pet_manager.set_pet_opacity)
+        self.control_panel.position_pet.connect(self.position_pet)
+        self.control_panel.update_pet_max_fps.connect(self.pet_manager.set_max_fps)
+        self.control_panel.update_pet_mask_scale.connect(self.pet_manager.set_mask_scale)
+        self.control_panel.update_decoder.connect(self.pet_manager.set_decoder)
+        self.control_panel.update_key_threads.connect(self.pet_manager.set_key_threads)
+        self.control_panel.update_process_mode.connect(self.pet_manager.set_process_mode)
+        self.control_panel.update_power_policy.connect(self.pet_manager.set_power_policy)
+        self.pet_manager.pet_removed.connect(self.control_panel.remove_pet)
         
-        # Add tabs
-        self.tabs.addTab(self.control_panel, "▶ Run/Stop")
-        self.tabs.addTab(self.saved_settings, "💾 Saved Settings")
-        self.tabs.addTab(self.add_preset, "➕ Add")
-        self.tabs.addTab(self.about, "ℹ About")
+        # Add tabs: diğerleri yer tutucuyla eklenir, ilk seçildiğinde kurulur
+        self.tabs.addTab(self.control_panel, self.TAB_TITLES[0])
+        self.tab_builders = {1: self.build_saved_settings, 2: self.build_add_preset, 3: self.build_about}
+        for index in sorted(self.tab_builders):
+            placeholder = QWidget()
+            QVBoxLayout(placeholder).setContentsMargins(0, 0, 0, 0)
+            self.tabs.addTab(placeholder, self.TAB_TITLES[index])
+        self.tabs.currentChanged.connect(self.ensure_tab)
+        self.tabs.currentChanged.connect(self.update_preview_activity)
         
         self.setCentralWidget(self.tabs)
+        
+        # Oynatma sayaçlarını saniyede bir göster
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.refresh_playback_stats)
+        self.stats_timer.start(1000)
+        
+        self.first_paint_at = None
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.first_paint_at is None:
+            self.first_paint_at = time.perf_counter()
+            self.first_painted.emit(self.first_paint_at)
+            # Pencere ekrandayken numpy/cv2 arka planda hazırlansın
+            QTimer.singleShot(0, preload_modules)
+    
+    def ensure_tab(self, index):
+        """Sekmeyi ilk seçildiğinde kur; kurulmuşsa widget'ını döndür"""
+        builder = self.tab_builders.pop(index, None)
+        if builder is None:
+            return self.tabs.widget(index)
+        widget = builder()
+        self.tabs.widget(index).layout().addWidget(widget)
+        return widget
+    
+    def build_saved_settings(self):
+        self.saved_settings = SavedSettingsWidget(self.preset_store)
+        self.saved_settings.preset_selected.connect(self.control_panel.set_preset)
+        return self.saved_settings
+    
+    def build_add_preset(self):
+        self.add_preset = AddPresetWidget(self.preset_store)
+        return self.add_preset
+    
+    def build_about(self):
+        self.about = AboutWidget()
+        return self.about
+    
+    def update_preview_activity(self):
+        """Add sekmesinin önizlemesi yalnızca sekme seçiliyken ve pencere açıkken çalışır"""
+        if self.add_preset is None:
+            return
+        visible = self.tabs.currentWidget() is self.add_preset.parentWidget() and not self.isMinimized()
+        self.add_preset.set_preview_active(visible)
+    
+    def refresh_playback_stats(self):
+        self.control_panel.show_playback_stats(self.pet_manager.stats())
+        if self.add_preset is not None:
+            self.add_preset.show_preview_stats()
+        if PROFILER.enabled:
+            self.control_panel.show_profile(PROFILER.summary())
     
     def start_desktop_pet(self, video_path, hsv_values, scale, opacity):
-        # Eğer zaten çalışan bir pet varsa kapat
-        if self.desktop_pet:
-            self.desktop_pet.close()
-            self.desktop_pet = None
-        
-        # Yeni desktop pet oluştur
-        self.desktop_pet = DesktopPet(video_path, hsv_values, scale, opacity)
-        self.desktop_pet.show()
-        
-        # Pet boyutunu kaydet
-        if self.desktop_pet.original_size:
-            w, h = self.desktop_pet.original_size
-            self.control_panel.pet_size = (int(w * scale), int(h * scale))
-    
-    def update_pet_scale(self, scale):
-        if self.desktop_pet:
-            self.desktop_pet.set_scale(scale)
-            # Boyutu güncelle
-            if self.desktop_pet.original_size:
-                w, h = self.desktop_pet.original_size
-                self.control_panel.pet_size = (int(w * scale), int(h * scale))
-    
-    def update_pet_opacity(self, opacity):
-        if self.desktop_pet:
-            self.desktop_pet.set_opacity(opacity)
+        # Global ayarlar yeni pet'in akışına da uygulansın
+        self.pet_manager.max_fps = self.control_panel.max_fps
+        self.pet_manager.mask_scale = self.control_panel.mask_scale
+        self.pet_manager.decoder = self.control_panel.decoder
+        self.pet_manager.decode_threads = self.control_panel.decode_threads
+        self.pet_manager.set_key_threads(self.control_panel.key_threads)
+        self.pet_manager.process_mode = self.control_panel.process_mode
+        
+        pet = self.pet_manager.start_pet(video_path, hsv_values, scale, opacity)
+        if pet:
+            label = f"{os.path.basename(video_path)} — {self.control_panel.preset_label.text()}"
+            self.control_panel.add_pet(pet.pet_id, label)
     
-    def stop_desktop_pet(self):
-        if self.desktop_pet:
-            self.desktop_pet.close()
-            self.desktop_pet = None
+    def position_pet(self, pet_id, position):
+        """Pet'i bulunduğu ekranın köşesine taşı"""
+        pet = self.pet_manager.pet(pet_id)
+        if pet is None:
+            return
+        screen = QApplication.screenAt(pet.geometry().center()) or QApplication.primaryScreen()
+        area = screen.availableGeometry()
+        pet_w, pet_h = pet.width(), pet.height()
+        
+        positions = {
+            'topleft': (area.left() + 20, area.top() + 20),
+            'topright': (area.right() - pet_w - 20, area.top() + 20),
+            'bottomleft': (area.left() + 20, area.bottom() - pet_h - 20),
+            'bottomright': (area.right() - pet_w - 20, area.bottom() - pet_h - 20)
+        }
+        pet.move(*positions[position])
+    
+    def changeEvent(self, event):
+        # Kontrol penceresi küçültülünce pet'ler yavaş kipe geçer
+        if event.type() == QEvent.WindowStateChange:
+            self.pet_manager.set_control_minimized(self.isMinimized())
+            self.update_preview_activity()
+        super().changeEvent(event)
+    
+    def on_preset_save_failed(self, message):
+        QMessageBox.warning(self, "Hata", f"Preset'ler kaydedilemedi: {message}")
     
     def closeEvent(self, event):
-        # Ana pencere kapatılırken desktop pet'i de kapat
-        if self.desktop_pet:
-            self.desktop_pet.close()
+        # Ana pencere kapatılırken tüm pet'leri de kapat
+        self.pet_manager.shutdown()
+        if self.add_preset is not None:
+            self.add_preset.shutdown()
+        self.preset_store.flush()
+        if self.control_panel.bake_worker:
+            self.control_panel.bake_worker.stop()
         event.accept()
 
 
+def run_cli(argv):
+    """Ekran gerektirmeyen komut satırı araçları"""
+    parser = argparse.ArgumentParser(prog="app.py", description="WaifuEngine komut satırı araçları")
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    bake = sub.add_parser("bake", help="Video + preset'i sprite dosyasına dönüştür")
+    bake.add_argument("video")
+    bake.add_argument("--preset", required=True, help=f"{PRESETS_FILE} içindeki preset adı")
+    bake.add_argument("--scale", type=float, default=1.0)
+    bake.add_argument("-o", "--output", help="Varsayılan: sprites/ altında, pet'in otomatik bulduğu yol")
+    
+    estimate = sub.add_parser("estimate", help="Klibin arka plan rengini tahmin edip preset öner")
+    estimate.add_argument("video")
+    estimate.add_argument("--samples", type=int, default=BG_SAMPLE_FRAMES, help="örneklenecek kare sayısı")
+    estimate.add_argument("--save", metavar="AD", help=f"öneriyi {PRESETS_FILE} içine bu adla kaydet")
+    
+    batch = sub.add_parser("batch", help="Klasördeki klipleri süreç havuzunda toplu key'le")
+    batch.add_argument("folder")
+    batch.add_argument("--preset", required=True, nargs="+", help=f"{PRESETS_FILE} içindeki preset adları")
+    batch.add_argument("--format", choices=list(BATCH_FORMATS), default="png",
+                       help="png: kare klasörü, apng/webp: animasyon, sprite: .wfsprite")
+    batch.add_argument("--scale", type=float, default=1.0)
+    batch.add_argument("-o", "--output", help="çıktı klasörü (varsayılan keyed/, sprite için sprites/)")
+    batch.add_argument("-j", "--workers", type=int, default=0, help="işçi süreç sayısı (0: çekirdek sayısı)")
+    batch.add_argument("--backend", choices=DECODER_BACKENDS, default="auto")
+    batch.add_argument("--threads", type=int, default=1, help="işçi başına çözücü thread sayısı")
+    batch.add_argument("--force", action="store_true", help="var olan çıktıları yeniden yaz")
+    
+    args = parser.parse_args(argv)
+    if args.command == "estimate":
+        return run_estimate(args)
+    if args.command == "batch":
+        return run_batch(args)
+    presets = PresetStore(watch=False)
+    if args.preset not in presets:
+        parser.error(f"Preset bulunamadı: {args.preset}")
+    
+    def progress(done, total):
+        print(f"\r{done}/{total} kare", end="", flush=True)
+    
+    try:
+        path = bake_sprite(args.video, presets.get(args.preset), args.scale, args.output, progress)
+    except (IOError, OSError) as e:
+        print(f"\nHata: {e}", file=sys.stderr)
+        return 1
+    print(f"\nSprite kaydedildi: {path}")
+    return 0
+
+
+def run_estimate(args):
+    try:
+        result = estimate_background(args.video, args.samples)
+    except ValueError as e:
+        print(f"Hata: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result['preset'], ensure_ascii=False))
+    print(f"kenarların %{result['border_coverage'] * 100:.0f}'i, karenin %{result['coverage'] * 100:.0f}'i "
+          f"key'lenir ({result['frames']} kare, {result['seconds']:.2f} sn)")
+    if args.save:
+        presets = PresetStore(watch=False)
+        presets.put(args.save, result['preset'], clip=os.path.abspath(args.video))
+        if not presets.flush():
+            print(f"Hata: preset kaydedilemedi: {presets.error}", file=sys.stderr)
+            return 1
+        print(f"Preset kaydedildi: {args.save}")
+    return 0
+
+
+# Toplu keying çıktı biçimleri ve uzantıları ("png": kare klasörü)
+BATCH_FORMATS = {"png": "", "apng": ".png", "webp": ".webp", "sprite": ".wfsprite"}
+# Toplu işte aranan klip uzantıları
+BATCH_EXTENSIONS = VIDEO_EXTENSIONS + (".gif", ".apng")
+# İşçilerin ilerleme bildirme aralığı (sn)
+BATCH_REPORT_INTERVAL = 0.5
+# apng/webp kodlayıcısı tüm kareleri bellekte ister; bunu aşan klip reddedilir
+BATCH_ANIMATION_MAX_BYTES = 1024 * 1024 * 1024
+# İşçi sürecinde ana sürece ilerleme taşıyan kuyruk (batch_worker_init kurar)
+_batch_queue = None
+
+
+def unpremultiply_bgra(keyed, out=None):
+    """Önceden çarpılmış RGBA'yı dosyalara yazılan düz alfalı BGRA'ya çevir"""
+    straight = cv2.cvtColor(keyed, cv2.COLOR_mRGBA2RGBA, dst=out)
+    return cv2.cvtColor(straight, cv2.COLOR_RGBA2BGRA, dst=straight)
+
+
+def animation_supported():
+    """Bu OpenCV sürümü apng/webp animasyonu yazabiliyor mu (4.11 ve sonrası)"""
+    return hasattr(cv2, "Animation") and hasattr(cv2, "imwriteanimation")
+
+
+def write_keyed_clip(video_path, hsv_values, fmt, out_path, scale=1.0, backend="auto", threads=0,
+                     progress=None):
+    """Klibi preset ile key'leyip şeffaf çıktıya yaz, yazılan kare sayısını döndür.
+    
+    png: out_path klasörüne 00000.png...; apng/webp: tek animasyon dosyası
+    (kareler bellekte toplanır, BATCH_ANIMATION_MAX_BYTES ile sınırlı);
+    sprite: pet'lerin doğrudan oynattığı .wfsprite. Çıktı önce geçici ada
+    yazılır, bitince yerine taşınır.
+    """
+    if fmt == "sprite":
+        counted = [0]
+        
+        def count(done, total):
+            counted[0] = done
+            if progress:
+                progress(done, total)
+        bake_sprite(video_path, hsv_values, scale, out_path, count, backend=backend, threads=threads)
+        return counted[0]
+    
+    keyer = ChromaKeyer.for_preset(hsv_values)
+    # Çevrimdışı: kenar iyileştirmeleri süre bütçesi yüzünden kapatılmaz
+    keyer.refine_budget_ms = float('inf')
+    try:
+        source = open_source(video_path, backend, threads)
+    except ValueError as e:
+        raise IOError(str(e))
+    total = source.frame_count
+    tmp_path = out_path + ".tmp"
+    frames, count, held, bgra = [], 0, 0, None
+    try:
+        if fmt == "png":
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            os.makedirs(tmp_path)
+        while True:
+            ret, frame = source.read()
+            if not ret:
+                break
+            keyed = keyer.key(frame, scale)
+            if fmt == "png":
+                bgra = unpremultiply_bgra(keyed, bgra)
+                if not cv2.imwrite(os.path.join(tmp_path, f"{count:05d}.png"), bgra):
+                    raise IOError(f"Kare yazılamadı: {tmp_path}")
+            else:
+                # Animasyon kodlayıcısı tüm kareleri birlikte ister
+                frames.append(unpremultiply_bgra(keyed))
+                held += frames[-1].nbytes
+                # Kare sayısı biliniyorsa ilk karede, bilinmiyorsa sınır aşılınca dur
+                if max(held, frames[0].nbytes * total) > BATCH_ANIMATION_MAX_BYTES:
+                    raise IOError(f"Klip {fmt} için fazla uzun "
+                                  f"(~{frames[0].nbytes * max(total, count + 1) // 2 ** 20} MB kare, "
+                                  f"sınır {BATCH_ANIMATION_MAX_BYTES // 2 ** 20} MB); "
+                                  f"--format png/sprite ya da daha küçük --scale kullanın")
+            count += 1
+            if progress:
+                progress(count, total)
+        if count == 0:
+            raise IOError(f"Video okunamadı: {video_path}")
+        
+        if fmt == "png":
+            if os.path.isdir(out_path):
+                shutil.rmtree(out_path)
+            os.replace(tmp_path, out_path)
+            return count
+        animation = cv2.Animation()
+        animation.frames = frames
+        animation.durations = [int(round(1000.0 / (source.fps or DEFAULT_FPS)))] * count
+        animation.loop_count = 0
+        tmp_file = tmp_path + BATCH_FORMATS[fmt]
+        # WebP'de 100 üstü kalite kayıpsız sıkıştırma demek
+        params = [cv2.IMWRITE_WEBP_QUALITY, 101] if fmt == "webp" else []
+        if not cv2.imwriteanimation(tmp_file, animation, params):
+            raise IOError(f"Animasyon yazılamadı: {out_path}")
+        os.replace(tmp_file, out_path)
+        return count
+    finally:
+        source.release()
+        if fmt == "png":
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        elif os.path.exists(tmp_path + BATCH_FORMATS[fmt]):
+            os.remove(tmp_path + BATCH_FORMATS[fmt])
+
+
+def batch_worker_init(progress_queue, threads):
+    """Süreç havuzu işçisi: ilerleme kuyruğunu al, OpenCV'yi tek thread'e indir"""
+    global _batch_queue
+    _batch_queue = progress_queue
+    # Paralellik süreçlerden gelir; her işçi ayrıca thread açarsa çekirdekler taşar
+    cv2.setNumThreads(threads)
+
+
+def batch_key_job(job):
+    """İşçide bir (klip, preset) işini koştur; ilerlemeyi kuyruğa bildir"""
+    pid = os.getpid()
+    label = job['label']
+    start = last_report = time.perf_counter()
+    
+    def progress(done, total):
+        nonlocal last_report
+        now = time.perf_counter()
+        if _batch_queue is not None and now - last_report >= BATCH_REPORT_INTERVAL:
+            last_report = now
+            _batch_queue.put(('progress', pid, label, done, total, done / (now - start)))
+    
+    if _batch_queue is not None:
+        _batch_queue.put(('start', pid, label, 0, 0, 0.0))
+    try:
+        frames = write_keyed_clip(job['video'], job['values'], job['format'], job['output'],
+                                  job['scale'], job['backend'], job['threads'], progress)
+    except (IOError, OSError, ValueError, cv2.error, AttributeError) as e:
+        # Bir klibin hatası (ör. kodlayıcı desteklemiyor) yalnız o işi düşürür
+        return {'label': label, 'pid': pid, 'error': str(e), 'frames': 0,
+                'seconds': time.perf_counter() - start}
+    return {'label': label, 'pid': pid, 'error': None, 'frames': frames, 'output': job['output'],
+            'seconds': time.perf_counter() - start}
+
+
+def batch_jobs(args, presets):
+    """Klasördeki klipler x preset'ler için iş listesi (çıktısı olanlar --force yoksa atlanır)"""
+    videos = sorted(os.path.join(args.folder, name) for name in os.listdir(args.folder)
+                    if name.lower().endswith(BATCH_EXTENSIONS))
+    ext = BATCH_FORMATS[args.format]
+    planned = []
+    for video in videos:
+        stem = os.path.splitext(os.path.basename(video))[0]
+        for name in args.preset:
+            if args.format == "sprite" and args.output is None:
+                # Pet'in kendiliğinden bulduğu yol (klip + preset + ölçek)
+                output = sprite_path_for(video, presets.get(name), args.scale)
+            else:
+                slug = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+                output = os.path.join(args.output or "keyed", f"{stem}-{slug}")
+            planned.append((video, stem, name, output))
+    # "a b" ile "a_b" preset'leri ya da clip.mp4 ile clip.gif aynı ada düşer;
+    # çakışan her çıktıya klip + preset'ten türeyen kısa bir hash eklenir
+    taken = Counter(output for _, _, _, output in planned)
+    jobs, skipped = [], 0
+    for video, stem, name, output in planned:
+        if taken[output] > 1:
+            key = f"{os.path.basename(video)}\0{name}".encode("utf-8")
+            output += "-" + hashlib.sha1(key).hexdigest()[:8]
+        if not output.endswith(ext):
+            output += ext
+        if os.path.exists(output) and not args.force:
+            skipped += 1
+            continue
+        jobs.append({'label': f"{stem}/{name}", 'video': video, 'values': presets.get(name),
+                     'format': args.format, 'output': output, 'scale': args.scale,
+                     'backend': args.backend, 'threads': args.threads})
+    return jobs, skipped
+
+
+def run_batch(args):
+    presets = PresetStore(watch=False)
+    missing = [name for name in args.preset if name not in presets]
+    if missing:
+        print(f"Preset bulunamadı: {', '.join(missing)}", file=sys.stderr)
+        return 2
+    if args.format == "sprite" and args.output is None and len(args.preset) > 1:
+        print("Birden çok preset sprite'a yazılırken -o ile bir klasör verilmeli", file=sys.stderr)
+        return 2
+    if args.format in ("apng", "webp") and not animation_supported():
+        print(f"Bu OpenCV sürümü ({cv2.__version__}) animasyon yazamıyor; "
+              f"--format {args.format} için OpenCV 4.11+ gerekli", file=sys.stderr)
+        return 2
+    if not os.path.isdir(args.folder):
+        print(f"Klasör bulunamadı: {args.folder}", file=sys.stderr)
+        return 2
+    jobs, skipped = batch_jobs(args, presets)
+    if skipped:
+        print(f"{skipped} çıktı zaten var, atlandı (yeniden yazmak için --force)")
+    if not jobs:
+        print("Yapılacak iş yok")
+        return 0
+    for job in jobs:
+        out_dir = os.path.dirname(job['output'])
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+    
+    workers = min(args.workers or DECODE_WORKERS, len(jobs))
+    print(f"{len(jobs)} iş, {workers} işçi, biçim: {args.format}")
+    # Süreç havuzu yalnız toplu işte gerekir; GUI açılışını yavaşlatmasın
+    from concurrent.futures import ProcessPoolExecutor
+    # Akış süreçleriyle aynı 'spawn': Qt ve thread havuzları yüklü süreç fork edilmez
+    context = process_context()
+    progress_queue = context.Queue()
+    # pid -> {'no', 'label', 'done', 'total', 'fps', 'jobs', 'frames', 'seconds'}
+    status = {}
+    results = []
+    finished = set()
+    start = time.perf_counter()
+    
+    def worker(pid):
+        if pid not in status:
+            status[pid] = {'no': len(status) + 1, 'label': "", 'done': 0, 'total': 0, 'fps': 0.0,
+                           'jobs': 0, 'frames': 0, 'seconds': 0.0}
+        return status[pid]
+    
+    def drain(timeout):
+        """İlk mesajı timeout kadar bekle, birikenlerin hepsini al"""
+        while True:
+            try:
+                kind, pid, label, done, total, fps = progress_queue.get(timeout=timeout)
+            except queue.Empty:
+                return
+            timeout = 0
+            # Sonuçtan sonra gelen eski ilerleme mesajı işçiyi meşgul göstermesin
+            if label not in finished:
+                worker(pid).update(label=label, done=done, total=total, fps=fps)
+    
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=batch_worker_init,
+                             initargs=(progress_queue, 1)) as pool:
+        pending = {pool.submit(batch_key_job, job) for job in jobs}
+        last_print = 0.0
+        while pending:
+            drain(0.1)
+            for future in [f for f in pending if f.done()]:
+                pending.discard(future)
+                result = future.result()
+                results.append(result)
+                finished.add(result['label'])
+                entry = worker(result['pid'])
+                entry['jobs'] += 1
+                entry['frames'] += result['frames']
+                entry['seconds'] += result['seconds']
+                entry['label'] = ""
+                if result['error']:
+                    print(f"  ✗ {result['label']}: {result['error']}")
+                else:
+                    print(f"  ✓ {result['label']}: {result['frames']} kare, "
+                          f"{result['frames'] / max(result['seconds'], 1e-9):.0f} kare/sn -> {result['output']}")
+            now = time.perf_counter()
+            if pending and now - last_print >= 1.0:
+                last_print = now
+                busy = [e for e in sorted(status.values(), key=lambda e: e['no']) if e['label']]
+                if busy:
+                    print("  " + "  |  ".join(
+                        f"işçi {e['no']}: {e['label']} {e['done']}/{e['total'] or '?'} {e['fps']:.0f} kare/sn"
+                        for e in busy), flush=True)
+    
+    elapsed = time.perf_counter() - start
+    frames = sum(r['frames'] for r in results)
+    failed = [r for r in results if r['error']]
+    print(f"\n{'işçi':<6} {'iş':>4} {'kare':>8} {'süre sn':>9} {'kare/sn':>9}")
+    for entry in sorted(status.values(), key=lambda e: e['no']):
+        fps = entry['frames'] / entry['seconds'] if entry['seconds'] else 0.0
+        print(f"{entry['no']:<6} {entry['jobs']:>4} {entry['frames']:>8} {entry['seconds']:>9.1f} {fps:>9.1f}")
+    print(f"toplam: {len(results) - len(failed)}/{len(results)} iş, {frames} kare, {elapsed:.1f} sn, "
+          f"{frames / elapsed:.1f} kare/sn")
+    return 1 if failed else 0
+
+
+def process_age():
+    """Sürecin oluşturulmasından bu yana geçen süre (sn); bilinmiyorsa None"""
+    if psutil is not None:
+        return time.time() - psutil.Process().create_time()
+    try:
+        with open("/proc/self/stat") as f:
+            # comm alanı boşluk içerebilir; kapanan parantezden sonrasını böl
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def report_startup(marks, first_paint, interpreter):
+    """--startup-time çıktısı: adım adım süreler ve ilk boyamaya kadar toplam"""
+    print("Açılış süresi (ilk boyamaya kadar):")
+    previous = STARTUP_T0
+    for label, at in marks + [("ilk boyama", first_paint)]:
+        print(f"  {label:<16} {(at - previous) * 1000:7.1f} ms")
+        previous = at
+    total = (first_paint - STARTUP_T0) * 1000
+    print(f"  {'toplam':<16} {total:7.1f} ms (app.py çalışmaya başladıktan sonra)")
+    if interpreter is not None:
+        print(f"  {'yorumlayıcı':<16} {interpreter * 1000:7.1f} ms (süreç başlangıcından app.py'ye)")
+    heavy = loaded_heavy_modules()
+    print(f"  ilk boyamada yüklü ağır modüller: {', '.join(heavy) if heavy else 'yok'}")
+
+
 if __name__ == '__main__':
+    if getattr(sys, 'frozen', False):
+        # Paketlenmiş (ör. PyInstaller) Windows sürümünde akış süreçleri bu
+        # dosyayla başlar; multiprocessing açılışı yavaşlatmasın diye yalnız burada
+        import multiprocessing
+        multiprocessing.freeze_support()
+    if len(sys.argv) > 1 and sys.argv[1] in ("bake", "estimate", "batch"):
+        sys.exit(run_cli(sys.argv[1:]))
+    
+    startup_time = "--startup-time" in sys.argv
+    if startup_time:
+        sys.argv.remove("--startup-time")
+        interpreter = process_age()
+        if interpreter is not None:
+            interpreter -= time.perf_counter() - STARTUP_T0
+        marks = [("modül yükleme", time.perf_counter())]
+    
     app = QApplication(sys.argv)
     app.setFont(QFont("Segoe UI", 10))
+    if startup_time:
+        marks.append(("QApplication", time.perf_counter()))
     window = MainWindow()
+    if startup_time:
+        marks.append(("ana pencere", time.perf_counter()))
+        
+        def on_first_paint(at):
+            report_startup(marks, at, interpreter)
+            # Ölçüm kipinde pencere açık kalmaz; ön yükleme sürerken çık
+            QTimer.singleShot(0, app.quit)
+        window.first_painted.connect(on_first_paint)
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,742 @@
+"""WaifuEngine chroma key hattı için ekransız benchmark.
+
+Kullanım:
+    python benchmark.py [--video hudul.mp4] [--frames 60]
+    python benchmark.py suite [--frames 60] [--repeat 3] [--json sonuc.json]
+                              [--baseline benchmark_baseline.json] [--update-baseline]
+                              [--tolerance 0.15]
+    python benchmark.py decode [--threads 0 1 2] [--pace 5]
+    python benchmark.py loop [--pace 10] [--loop-tolerance 2]
+    python benchmark.py refine [--frames 60]
+    python benchmark.py bands [--threads 1 2 4 8]
+    python benchmark.py process [--streams 1 2 4] [--seconds 5] [--gui-load 2]
+
+"suite" kipi pet hattını (çözme -> keying -> Qt çizimi) gerçek video ve
+sentetik kliplerde, birkaç çözünürlük/ölçek/preset için koşturur; sonuçları
+JSON'a yazar ve kayıtlı baseline ile karşılaştırır (gerileme varsa çıkış 1).
+
+"decode" kipi kurulu çözücü arka uçlarını thread sayılarıyla, önden çözme
+açık/kapalı karşılaştırır: saf çözme hızı ve döngü başı dahil okuma bekleme süreleri.
+
+"loop" kipi döngü sınırındaki kare aralığını ölçer: doğrudan okuma, yalnız
+önden çözme ve boşluksuz döngü karşılaştırılır; boşluksuz döngüde sınırdaki
+aralık diğer aralıkların p99'unu ve ortanca + toleransı aşarsa çıkış 1.
+
+"refine" kipi maske iyileştirme aşamalarının (erode/dilate, feather, despill)
+kare başına maliyetini gerçek ve sentetik kliplerde ayrı ayrı ölçer ve
+oynatmadaki süre bütçesiyle (REFINE_BUDGET_SHARE) karşılaştırır.
+
+"bands" kipi bant keying'inin (ChromaKeyer.key_threads) ölçeklenmesini
+1080p/1440p/4K sentetik karelerde 1'den N thread'e ölçer; 1 thread bugünkü
+bölünmemiş yoldur. Her thread sayısında çıktının onunla aynı olduğu da denetlenir.
+
+"process" kipi 1080p sentetik kliplerden N ayrı akışı thread modunda
+(FrameStream, ortak çözme havuzu) ve süreç modunda (ProcessStream, paylaşılan
+bellek) PetManager.tick gibi bir döngüyle oynatır; döngü her tick'te kareleri
+çizer ve --gui-load ms Python işi yapar. Gösterilen fps, geç/atlanan kare ve
+döngünün uyanma gecikmesi (p95) karşılaştırılır. Önbellek ve değişim tespiti kapalıdır.
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import threading
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import cv2
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from PyQt5.QtGui import QGuiApplication, QImage, QPainter
+from PyQt5.QtCore import Qt
+
+import app
+
+SCALE_STEPS = [25, 50, 75, 100, 125, 150, 175, 200]
+SUITE_SCALES = [0.5, 1.0, 1.5]
+SYNTHETIC_SIZES = [(640, 360), (1280, 720), (1920, 1080)]
+# Sentetik kliplerin zemini (BGR) ve onu seçen HSV aralığı
+SYNTHETIC_BACKGROUND = (40, 200, 40)
+GREEN_RANGE = {'lower': [35, 80, 80], 'upper': [85, 255, 255]}
+BLACK_RANGE = {'lower': [0, 0, 0], 'upper': [179, 255, 10]}
+WARMUP_FRAMES = 5
+ALLOC_FRAMES = 20
+# refine kipinde ölçülen aşamalar ve ayarları
+REFINE_CASES = [
+    ("morph", {'erode': 2, 'dilate': 1}),
+    ("feather", {'feather': 3}),
+    ("despill", {'despill': 1.0}),
+]
+# bands kipi: kare boyutları ve (4K kareler büyük olduğundan) bellekte tutulan kare sayısı
+BAND_SIZES = [(1920, 1080), (2560, 1440), (3840, 2160)]
+BAND_FRAMES = 12
+PROCESS_CLIP_SIZE = (1920, 1080)
+PROCESS_CLIP_FRAMES = 90
+BASELINE_FILE = "benchmark_baseline.json"
+RESULTS_FILE = "benchmark_results.json"
+
+
+def legacy_key_frame(frame, lower, upper, scale):
+    """Eski sıra: tam çözünürlükte keying, sonra ölçekleme (karşılaştırma için)"""
+    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, lower, upper)
+    frame[mask > 0] = (0, 0, 0, 0)
+    h, w, _ = frame.shape
+    if scale != 1.0:
+        frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    return frame
+
+
+def load_frames(video_path, count):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise SystemExit(f"Video okunamadı: {video_path}")
+    return frames
+
+
+def time_per_frame(fn, frames, repeat=3):
+    """En iyi turun kare başına süresi (ms)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for frame in frames:
+            fn(frame)
+        best = min(best, (time.perf_counter() - start) / len(frames))
+    return best * 1000
+
+
+def allocated_bytes_per_frame(fn, frames):
+    """Isınmadan sonra kare başına ayrılan bellek (tracemalloc tepe değeri)"""
+    fn(frames[0])
+    tracemalloc.start()
+    try:
+        for frame in frames:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            fn(frame)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - before)
+
+
+def bench_keying(frames, lower, upper):
+    """Eski boolean indeksli keying ile ChromaKeyer'ı tam çözünürlükte karşılaştır"""
+    keyer = app.ChromaKeyer(lower, upper)
+    lut_keyer = app.ChromaKeyer.for_preset({
+        'ranges': [{'lower': list(lower), 'upper': list(upper)},
+                   {'lower': [170, 100, 100], 'upper': [10, 255, 255]}],
+        'softness': 8,
+    })
+    cases = [
+        ("eski (frame[mask > 0] = 0)", lambda f: legacy_key_frame(f, lower, upper, 1.0)),
+        ("ChromaKeyer.key", lambda f: keyer.key(f)),
+        ("ChromaKeyer LUT (2 aralık)", lambda f: lut_keyer.key(f)),
+    ]
+    print(f"{'yöntem':<28} {'ms/kare':>9} {'ayrılan KB/kare':>16}")
+    for name, fn in cases:
+        ms = time_per_frame(fn, frames)
+        kb = allocated_bytes_per_frame(fn, frames) / 1024
+        print(f"{name:<28} {ms:>9.2f} {kb:>16.1f}")
+
+
+def bench_scale_steps(frames, lower, upper):
+    """ControlPanel.scale_slider adımlarında eski ve yeni sıralamayı karşılaştır"""
+    keyer = app.ChromaKeyer(lower, upper)
+    low_res_keyer = app.ChromaKeyer(lower, upper, app.LOW_RES_MASK_SCALE)
+    print(f"{'ölçek':>6} {'eski ms':>9} {'yeni ms':>9} {'kazanç':>8} {'maske½ ms':>10} {'kazanç':>8}")
+    for step in SCALE_STEPS:
+        scale = step / 100.0
+        legacy = time_per_frame(lambda f: legacy_key_frame(f, lower, upper, scale), frames)
+        new = time_per_frame(lambda f: keyer.key(f, scale), frames)
+        low_res = time_per_frame(lambda f: low_res_keyer.key(f, scale), frames)
+        print(f"{step:>5}% {legacy:>9.2f} {new:>9.2f} {(1 - new / legacy) * 100:>7.0f}% "
+              f"{low_res:>10.2f} {(1 - low_res / legacy) * 100:>7.0f}%")
+
+
+def bench_refine(frames, background, fps):
+    """İyileştirmesiz keying'e göre her aşamanın ve hepsinin ek maliyetini yazdır"""
+    budget = app.REFINE_BUDGET_SHARE * 1000.0 / fps
+    cases = [("iyileştirmesiz", {})] + REFINE_CASES
+    cases.append(("hepsi", {key: value for _, refine in REFINE_CASES for key, value in refine.items()}))
+    base = None
+    for name, refine in cases:
+        keyer = app.ChromaKeyer.for_preset(dict(background, **refine))
+        # Ölçüm sırasında bütçe aşılsa da aşama kapatılmasın
+        keyer.refine_budget_ms = float("inf")
+        ms = time_per_frame(keyer.key, frames)
+        if base is None:
+            base = ms
+            print(f"  {name:<16} {ms:>9.2f} {'':>9} {'':>8}")
+            continue
+        extra = ms - base
+        print(f"  {name:<16} {ms:>9.2f} {extra:>+9.2f} {100 * extra / budget:>7.0f}%")
+
+
+def main_refine(args):
+    print(f"aşama başına ms/kare; bütçe = kare aralığının %{app.REFINE_BUDGET_SHARE * 100:g}'i\n")
+    print(f"  {'aşama':<16} {'ms/kare':>9} {'ek ms':>9} {'bütçe':>8}")
+    cap = cv2.VideoCapture(args.video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    frames = load_frames(args.video, args.frames)
+    h, w = frames[0].shape[:2]
+    print(f"{args.video} ({w}x{h}, {fps:g} fps)")
+    bench_refine(frames, {'lower': args.lower, 'upper': args.upper}, fps)
+    with tempfile.TemporaryDirectory() as tmp:
+        for w, h in SYNTHETIC_SIZES:
+            path = make_synthetic_clip(os.path.join(tmp, f"synthetic_{h}p.mp4"), (w, h), args.frames)
+            print(f"synthetic_{h}p (30 fps)")
+            bench_refine(load_frames(path, args.frames), GREEN_RANGE, 30.0)
+    return 0
+
+
+def synthetic_frames(size, count):
+    """make_synthetic_clip'in karelerini dosyaya yazmadan üret"""
+    w, h = size
+    radius = min(w, h) // 5
+    frames = []
+    for i in range(count):
+        angle = 2 * math.pi * i / count
+        center = (int(w / 2 + (w / 2 - radius) * 0.8 * math.cos(angle)),
+                  int(h / 2 + (h / 2 - radius) * 0.8 * math.sin(angle)))
+        frame = np.empty((h, w, 3), np.uint8)
+        frame[:] = SYNTHETIC_BACKGROUND
+        cv2.circle(frame, center, radius, (60, 90, 220), -1, cv2.LINE_AA)
+        frames.append(frame)
+    return frames
+
+
+def band_thread_counts():
+    """1..N (çok çekirdekte 1, 2, 4, ... ve N)"""
+    cores = os.cpu_count() or 1
+    if cores <= 8:
+        return list(range(1, cores + 1))
+    counts = [1 << i for i in range(cores.bit_length()) if 1 << i < cores]
+    return counts + [cores]
+
+
+def bench_bands(frames, values, thread_counts, repeat):
+    """Thread sayısına göre ms/kare, hızlanma ve bugünkü yolla fark"""
+    keyer = app.ChromaKeyer.for_preset(values)
+    keyer.refine_budget_ms = float("inf")
+    reference = [keyer.key(frame).copy() for frame in frames[:2]]
+    base = None
+    for threads in thread_counts:
+        keyer.key_threads = threads
+        ms = time_per_frame(keyer.key, frames, repeat)
+        same = all(np.array_equal(keyer.key(frame), ref) for frame, ref in zip(frames, reference))
+        if base is None:
+            base = ms
+        label = f"{threads}" + (" (bugünkü)" if threads == 1 else "")
+        print(f"  {label:<14} {ms:>9.2f} {1000 / ms:>8.1f} {base / ms:>8.2f}x  {'aynı' if same else 'FARKLI'}")
+
+
+def main_bands(args):
+    thread_counts = args.threads or band_thread_counts()
+    cores = os.cpu_count() or 1
+    print(f"{cores} çekirdek, OpenCV iç thread sayısı {cv2.getNumThreads()}; "
+          f"bant başına en az {app.KEY_BAND_MIN_ROWS} satır\n")
+    presets = {
+        "hsv": GREEN_RANGE,
+        "iyileştirmeli": dict(GREEN_RANGE, erode=2, dilate=1, feather=3, despill=1.0),
+        "lut": suite_presets(GREEN_RANGE)["lut"],
+    }
+    for w, h in BAND_SIZES:
+        frames = synthetic_frames((w, h), min(args.frames, BAND_FRAMES))
+        for name, values in presets.items():
+            print(f"{w}x{h} {name}")
+            print(f"  {'thread':<14} {'ms/kare':>9} {'fps':>8} {'hızlanma':>9}  çıktı")
+            bench_bands(frames, values, thread_counts, args.repeat)
+        print()
+    if max(thread_counts) > cores:
+        print(f"Not: {cores} çekirdekten fazla thread ölçeklenmez")
+    return 0
+
+
+def gui_busy(ms):
+    """GUI thread'indeki Python işini taklit et (GIL'i tutarak)"""
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        sum(range(200))
+
+
+def bench_process(video_path, values, stream_count, mode, seconds, gui_load):
+    """stream_count akışı mode ('thread'/'process') ile seconds boyunca oynat.
+    
+    Döngü en yakın akış tick'ine kadar uyur; uyanma gecikmesi, GUI thread'inin
+    çözme/keying yüzünden ne kadar geç kaldığını gösterir.
+    """
+    pool = ThreadPoolExecutor(max_workers=app.DECODE_WORKERS, thread_name_prefix="decode")
+    streams = []
+    for i in range(stream_count):
+        cls = app.ProcessStream if mode == "process" else app.FrameStream
+        stream = cls((mode, i), video_path, values, 1.0)
+        if not stream.open():
+            raise SystemExit(f"Video açılamadı: {video_path}")
+        if mode == "thread":
+            stream.change_detector = None
+        streams.append(stream)
+    surface = QImage(*PROCESS_CLIP_SIZE, QImage.Format_ARGB32_Premultiplied)
+    wake_late = []
+    try:
+        for stream in streams:
+            stream.start()
+            stream.request_fill(pool)
+        # Süreçlerin açılışı ölçüme girmesin: herkes ilk karesini gösterene kadar bekle
+        warmup_end = time.monotonic() + 10
+        while time.monotonic() < warmup_end and any(stream.current_image is None for stream in streams):
+            now = time.monotonic()
+            for stream in streams:
+                stream.advance(now)
+                stream.request_fill(pool)
+            time.sleep(0.005)
+        for stream in streams:
+            stream.clock.start(stream.clock.native_fps)
+            stream.request_fill(pool)
+        end = time.monotonic() + seconds
+        while True:
+            deadline = min(stream.clock.deadline for stream in streams)
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.monotonic()
+            if now >= end:
+                break
+            wake_late.append(now - deadline)
+            for stream in streams:
+                if stream.failed:
+                    raise SystemExit(stream.failed)
+                if stream.advance(now):
+                    painter = QPainter(surface)
+                    painter.drawImage(0, 0, stream.current_image)
+                    painter.end()
+                stream.request_fill(pool)
+            gui_busy(gui_load)
+    finally:
+        for stream in streams:
+            stream.stop()
+        pool.shutdown(wait=True)
+    presented = sum(stream.clock.presented_frames for stream in streams)
+    return {'fps': presented / stream_count / seconds,
+            'late': sum(stream.clock.late_frames for stream in streams),
+            'dropped': sum(stream.clock.dropped_frames for stream in streams),
+            'wake_p95_ms': float(np.percentile(wake_late, 95)) * 1000 if wake_late else 0.0}
+
+
+def main_process(args):
+    QGuiApplication.instance() or QGuiApplication([])
+    cores = os.cpu_count() or 1
+    print(f"{cores} çekirdek; {PROCESS_CLIP_SIZE[0]}x{PROCESS_CLIP_SIZE[1]} klip, "
+          f"tick başına {args.gui_load:g} ms GUI işi, {args.seconds:g} s\n")
+    app.FRAME_CACHE.set_enabled(False)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_synthetic_clip(os.path.join(tmp, "synthetic_process.mp4"), PROCESS_CLIP_SIZE,
+                                   PROCESS_CLIP_FRAMES)
+        print(f"  {'akış':>4} {'kip':<8} {'fps/akış':>9} {'geç':>6} {'atlanan':>8} {'uyanma p95':>11}")
+        for count in args.streams:
+            for mode in ("thread", "process"):
+                r = bench_process(path, GREEN_RANGE, count, mode, args.seconds, args.gui_load)
+                print(f"  {count:>4} {mode:<8} {r['fps']:>9.1f} {r['late']:>6} {r['dropped']:>8} "
+                      f"{r['wake_p95_ms']:>8.2f} ms")
+    if max(args.streams) > cores:
+        print(f"\nNot: {cores} çekirdekte süreçler de aynı çekirdekleri paylaşır")
+    return 0
+
+
+def make_synthetic_clip(path, size, frame_count, fps=30):
+    """Yeşil zemin üzerinde dönen yumuşak kenarlı bir daire yaz"""
+    w, h = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    if not writer.isOpened():
+        raise SystemExit(f"Sentetik klip yazılamadı: {path}")
+    radius = min(w, h) // 5
+    frame = np.empty((h, w, 3), np.uint8)
+    for i in range(frame_count):
+        angle = 2 * math.pi * i / frame_count
+        center = (int(w / 2 + (w / 2 - radius) * 0.8 * math.cos(angle)),
+                  int(h / 2 + (h / 2 - radius) * 0.8 * math.sin(angle)))
+        frame[:] = SYNTHETIC_BACKGROUND
+        cv2.circle(frame, center, radius, (60, 90, 220), -1, cv2.LINE_AA)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def suite_presets(background):
+    """Klibin zemini için tek aralıklı HSV preset'i ve 2 aralıklı yumuşak LUT preset'i"""
+    return {
+        "hsv": dict(background),
+        "lut": dict(background, ranges=[background, {'lower': [170, 100, 100], 'upper': [10, 255, 255]}],
+                    softness=8),
+    }
+
+
+def peak_rss_mb():
+    """Sürecin şimdiye kadarki en yüksek RSS'i (MB); ölçülemiyorsa None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux KB, macOS bayt verir
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def latency_result(name, latencies, **fields):
+    """Kare süreleri listesinden (s) ortak sonuç kaydı"""
+    latencies = np.asarray(latencies)
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) * 1000
+    result = {'name': name, 'frames': len(latencies), 'fps': len(latencies) / latencies.sum(),
+              'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99}
+    result.update(fields)
+    return result
+
+
+def bench_pipeline(video_path, hsv_values, scale, frame_count, repeat=3, change_detection=True):
+    """FrameStream üreticisi + DesktopPet'teki gibi QPainter çizimi, önbellek kapalı.
+    
+    Kare başına süre: çöz, yuvaya key'le, pencere yüzeyinin değişen alanını
+    çiz, yuvayı geri ver. Gürültüye karşı repeat tur koşulur, toplamı en kısa
+    turun süreleri döner.
+    """
+    stream = app.FrameStream(("bench",), video_path, hsv_values, scale)
+    if not stream.open():
+        raise SystemExit(f"Video açılamadı: {video_path}")
+    if not change_detection:
+        stream.change_detector = None
+    producer = stream.produce()
+    surface = None
+    
+    def step():
+        nonlocal surface
+        item = next(producer)
+        _, image, _, dirty = item
+        if image is None or (dirty is not None and dirty.isEmpty()):
+            return
+        if surface is None:
+            surface = QImage(image.width(), image.height(), QImage.Format_ARGB32_Premultiplied)
+        rect = surface.rect() if dirty is None else dirty
+        # Şeffaf pencerede Qt çizimden önce güncellenen alanı temizler
+        painter = QPainter(surface)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.fillRect(rect, Qt.transparent)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        painter.drawImage(rect, image, rect)
+        painter.end()
+        stream.release(item)
+    
+    try:
+        for _ in range(WARMUP_FRAMES):
+            step()
+        best = None
+        for _ in range(repeat):
+            latencies = []
+            for _ in range(frame_count):
+                start = time.perf_counter()
+                step()
+                latencies.append(time.perf_counter() - start)
+            if best is None or sum(latencies) < sum(best):
+                best = latencies
+        alloc = allocated_bytes_per_frame(lambda _: step(), range(ALLOC_FRAMES))
+    finally:
+        producer.close()
+    return best, alloc, (surface.width(), surface.height())
+
+
+def bench_decode(video_path, backend, threads, prefetch, passes=2, pace=0.005):
+    """Kaynağı passes tur baştan sona oku; okuma başına bekleme süreleri ve saf çözme hızı.
+    
+    Okumalar arasında pace saniye beklenir (keying/çizim yerine); önden çözme
+    bu arada kuyruğu doldurur. Tur sonundaki başa sarma da ölçüme girer;
+    loop_ms başa sarılan okumaların en uzunudur. İlk (soğuk) okuma sayılmaz.
+    """
+    source = app.open_source(video_path, backend, threads, app.PREFETCH_FRAMES if prefetch else 0)
+    pool = ThreadPoolExecutor(max_workers=1)
+    latencies, loop_latencies = [], []
+    idle = threading.Event()
+    try:
+        source.read()
+        source.request_fill(pool)
+        idle.wait(pace)
+        done = 0
+        while done < passes:
+            start = time.perf_counter()
+            ret, _ = source.read()
+            if not ret:
+                source.rewind()
+                ret, _ = source.read()
+                done += 1
+                if not ret:
+                    raise SystemExit(f"Kare okunamadı: {video_path}")
+                loop_latencies.append(time.perf_counter() - start)
+            latencies.append(time.perf_counter() - start)
+            source.request_fill(pool)
+            idle.wait(pace)
+        decode_fps = source.decode_fps
+    finally:
+        source.release()
+        pool.shutdown(wait=True)
+    name = f"{source.backend}/t{threads}/{'prefetch' if prefetch else 'direct'}"
+    return latency_result(name, latencies, decode_fps=decode_fps, max_ms=max(latencies) * 1000,
+                          loop_ms=max(loop_latencies) * 1000, backend=source.backend, threads=threads)
+
+
+def main_decode(args):
+    backends = ["opencv"] + (["pyav"] if app.av is not None else [])
+    if os.path.isdir(args.video) or args.video.lower().endswith(app.ANIMATION_EXTENSIONS):
+        backends = ["images"]
+    print(f"{args.video}: tur başına okuma bekleme süreleri (ms), okumalar arası {args.pace:g} ms\n")
+    print(f"{'çözücü':<26} {'çözme fps':>10} {'p50':>7} {'p95':>7} {'p99':>7} {'maks':>7} {'döngü':>7}")
+    for backend in backends:
+        for threads in (args.threads if backend != "images" else [0]):
+            for prefetch in (False, True):
+                result = bench_decode(args.video, backend, threads, prefetch, pace=args.pace / 1000)
+                print(f"{result['name']:<26} {result['decode_fps']:>10.1f} {result['p50_ms']:>7.2f} "
+                      f"{result['p95_ms']:>7.2f} {result['p99_ms']:>7.2f} {result['max_ms']:>7.2f} "
+                      f"{result['loop_ms']:>7.2f}")
+    return 0
+
+
+LOOP_VARIANTS = ("direct", "prefetch", "gapless")
+
+
+def bench_loop(video_path, variant, passes=3, pace=0.005):
+    """Oynatma gibi okuyup ardışık karelerin eline geçme aralıklarını ölç; döngü sınırındakiler ayrıca.
+    
+    direct: kaynak tur sonunda başa sarılır; prefetch: yalnız önden çözme;
+    gapless: baştaki kareler + yedek kaynak (uygulamanın varsayılanı).
+    """
+    if variant == "direct":
+        source = app.open_source(video_path)
+    elif variant == "prefetch":
+        source = app.PrefetchSource(app.open_source(video_path), app.PREFETCH_FRAMES)
+    else:
+        source = app.open_source(video_path, prefetch=app.PREFETCH_FRAMES)
+    pool = ThreadPoolExecutor(max_workers=1)
+    intervals, boundary = [], []
+    idle = threading.Event()
+    try:
+        source.read()
+        source.request_fill(pool)
+        idle.wait(pace)
+        last = None
+        done = 0
+        while done < passes:
+            ret, _ = source.read()
+            wrapped = not ret
+            if wrapped:
+                source.rewind()
+                ret, _ = source.read()
+                done += 1
+                if not ret:
+                    raise SystemExit(f"Kare okunamadı: {video_path}")
+            now = time.perf_counter()
+            if last is not None:
+                (boundary if wrapped else intervals).append(now - last)
+            last = now
+            source.request_fill(pool)
+            # Keying/çizim ve zamanlayıcı beklemesi yerine
+            idle.wait(pace)
+        gapless_loops = getattr(source, 'gapless_loops', 0)
+    finally:
+        source.release()
+        pool.shutdown(wait=True)
+    median = float(np.median(intervals)) * 1000
+    return {'name': variant, 'median_ms': median, 'p99_ms': float(np.percentile(intervals, 99)) * 1000,
+            'boundary_ms': max(boundary) * 1000, 'hitch_ms': max(boundary) * 1000 - median,
+            'loops': len(boundary), 'gapless_loops': gapless_loops}
+
+
+def loop_hitched(result, tolerance_ms):
+    """Sınırdaki aralık hem sıradan kare gecikmelerinden hem ortanca + toleranstan uzunsa True"""
+    return result['boundary_ms'] > max(result['p99_ms'], result['median_ms'] + tolerance_ms)
+
+
+def main_loop(args):
+    clips = [(os.path.basename(args.video), args.video)]
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for w, h in SYNTHETIC_SIZES[-1:]:
+            path = make_synthetic_clip(os.path.join(tmp, f"synthetic_{h}p.mp4"), (w, h), args.frames)
+            clips.append((f"synthetic_{h}p", path))
+        print(f"döngü sınırı: kare başına {args.pace:g} ms iş, kare aralıkları (ms)\n")
+        print(f"{'klip':<18} {'kip':<10} {'ortanca':>8} {'p99':>7} {'sınır':>7} {'takılma':>8} {'seeksiz':>6}")
+        for clip_name, path in clips:
+            for variant in LOOP_VARIANTS:
+                result = bench_loop(path, variant, pace=args.pace / 1000)
+                ok = variant != "gapless" or not loop_hitched(result, args.loop_tolerance)
+                print(f"{clip_name:<18} {variant:<10} {result['median_ms']:>8.2f} {result['p99_ms']:>7.2f} "
+                      f"{result['boundary_ms']:>7.2f} {result['hitch_ms']:>+8.2f} {result['gapless_loops']:>6}"
+                      f"{'' if ok else '  TAKILMA'}")
+                if not ok:
+                    failed.append(clip_name)
+    if failed:
+        print(f"\nboşluksuz döngüde takılma: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+def run_suite(video_path, frame_count, repeat=3, change_detection=True):
+    """Tüm klip x ölçek x preset senaryolarını koştur, sonuç listesini döndür"""
+    app.FRAME_CACHE.set_enabled(False)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        clips = [(os.path.basename(video_path), video_path, BLACK_RANGE)]
+        for w, h in SYNTHETIC_SIZES:
+            path = make_synthetic_clip(os.path.join(tmp, f"synthetic_{h}p.mp4"), (w, h), frame_count)
+            clips.append((f"synthetic_{h}p", path, GREEN_RANGE))
+        
+        print(f"{'senaryo':<34} {'çıktı':>10} {'fps':>8} {'p50':>7} {'p95':>7} {'p99':>7} "
+              f"{'KB/kare':>8} {'RSS MB':>7}")
+        for clip_name, path, background in clips:
+            for preset_name, hsv_values in suite_presets(background).items():
+                for scale in SUITE_SCALES:
+                    name = f"{clip_name}/{preset_name}/x{scale:g}"
+                    latencies, alloc, size = bench_pipeline(path, hsv_values, scale, frame_count, repeat,
+                                                            change_detection)
+                    result = latency_result(name, latencies, clip=clip_name, preset=preset_name,
+                                            scale=scale, output=list(size),
+                                            alloc_kb_per_frame=alloc / 1024, peak_rss_mb=peak_rss_mb())
+                    print_result(result)
+                    results.append(result)
+    return results
+
+
+def print_result(result):
+    w, h = result.get('output', (0, 0))
+    rss = result['peak_rss_mb']
+    print(f"{result['name']:<34} {f'{w}x{h}':>10} {result['fps']:>8.1f} {result['p50_ms']:>7.2f} "
+          f"{result['p95_ms']:>7.2f} {result['p99_ms']:>7.2f} {result['alloc_kb_per_frame']:>8.1f} "
+          f"{'-' if rss is None else f'{rss:.0f}':>7}")
+
+
+def environment_info():
+    return {'python': platform.python_version(), 'opencv': cv2.__version__, 'numpy': np.__version__,
+            'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+            'time': time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """fps düşüşü ya da p95 artışı toleransı aşan senaryoların adlarını döndür"""
+    previous = {result['name']: result for result in baseline['results']}
+    regressions = []
+    print(f"\nbaseline karşılaştırması (tolerans %{tolerance * 100:.0f}):")
+    print(f"{'senaryo':<34} {'fps':>8} {'p95':>8}")
+    for result in results:
+        old = previous.get(result['name'])
+        if old is None:
+            continue
+        fps_change = result['fps'] / old['fps'] - 1
+        p95_change = result['p95_ms'] / old['p95_ms'] - 1
+        regressed = fps_change < -tolerance or p95_change > tolerance
+        print(f"{result['name']:<34} {fps_change * 100:>+7.0f}% {p95_change * 100:>+7.0f}%"
+              f"{'  GERİLEME' if regressed else ''}")
+        if regressed:
+            regressions.append(result['name'])
+    return regressions
+
+
+def main_suite(args):
+    QGuiApplication.instance() or QGuiApplication([])
+    results = run_suite(args.video, args.frames, args.repeat, not args.no_change_detection)
+    report = {'environment': environment_info(), 'frames': args.frames, 'repeat': args.repeat,
+              'results': results}
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nsonuçlar: {args.json}")
+    
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline güncellendi: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"baseline yok ({args.baseline}); oluşturmak için --update-baseline")
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} senaryoda gerileme var")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("mode", nargs="?", choices=["keying", "suite", "decode", "loop", "refine", "bands",
+                                                         "process"],
+                        default="keying")
+    parser.add_argument("--video", default="hudul.mp4")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3, help="suite: senaryo başına tur (en iyisi alınır)")
+    parser.add_argument("--lower", type=int, nargs=3, default=[0, 0, 0])
+    parser.add_argument("--upper", type=int, nargs=3, default=[179, 255, 10])
+    parser.add_argument("--json", default=RESULTS_FILE, help="suite sonuç dosyası")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="karşılaştırmak yerine sonuçları baseline olarak kaydet")
+    parser.add_argument("--no-change-detection", action="store_true",
+                        help="suite: aynı/kısmen değişen kare tespitini kapat")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="gerileme sayılacak oran (fps düşüşü / p95 artışı)")
+    parser.add_argument("--threads", type=int, nargs="+", default=None,
+                        help="decode: denenecek çözücü thread sayıları (0: otomatik, varsayılan 0 1 2); "
+                             "bands: keying thread sayıları (varsayılan 1..çekirdek sayısı)")
+    parser.add_argument("--pace", type=float, default=None,
+                        help="decode/loop: kare başına bekleme (ms; decode 5, loop 10)")
+    parser.add_argument("--loop-tolerance", type=float, default=2.0,
+                        help="loop: sınırdaki aralığın ortancayı aşabileceği süre (ms)")
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 2, 4],
+                        help="process: aynı anda oynatılan akış sayıları")
+    parser.add_argument("--seconds", type=float, default=5.0, help="process: ölçüm başına süre (s)")
+    parser.add_argument("--gui-load", type=float, default=2.0,
+                        help="process: tick başına GUI thread'inde Python işi (ms)")
+    args = parser.parse_args(argv)
+    
+    if args.mode == "suite":
+        return main_suite(args)
+    if args.mode == "decode":
+        args.pace = 5.0 if args.pace is None else args.pace
+        args.threads = args.threads or [0, 1, 2]
+        return main_decode(args)
+    if args.mode == "loop":
+        # Çözme kare süresine yaklaşırsa hiçbir tampon yetmez; oynatmadaki gibi pay bırakılır
+        args.pace = 10.0 if args.pace is None else args.pace
+        return main_loop(args)
+    if args.mode == "refine":
+        return main_refine(args)
+    if args.mode == "bands":
+        return main_bands(args)
+    if args.mode == "process":
+        return main_process(args)
+    
+    frames = load_frames(args.video, args.frames)
+    h, w = frames[0].shape[:2]
+    print(f"{args.video}: {w}x{h}, {len(frames)} kare\n")
+    bench_keying(frames, tuple(args.lower), tuple(args.upper))
+    print()
+    bench_scale_steps(frames, tuple(args.lower), tuple(args.upper))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from PyQt5.QtWidgets import QApplication
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HUDUL = os.path.join(ROOT, "hudul.mp4")
+GREEN = {'lower': [35, 80, 80], 'upper': [85, 255, 255]}
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def green_clip(tmp_path):
+    """Yeşil zemin üzerinde kayan kırmızı kare: 12 kare, 96x64"""
+    path = str(tmp_path / "clip.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 25, (96, 64))
+    for i in range(12):
+        frame = np.empty((64, 96, 3), np.uint8)
+        frame[:] = (40, 200, 40)
+        frame[16:48, 4 + i * 4:36 + i * 4] = (40, 40, 220)
+        writer.write(frame)
+    writer.release()
+    return path
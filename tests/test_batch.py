@@ -0,0 +1,53 @@
+import argparse
+import json
+import os
+
+import pytest
+
+import app
+from conftest import GREEN
+
+
+def batch_args(folder, presets, fmt="png", output=None):
+    return argparse.Namespace(folder=str(folder), preset=presets, format=fmt, scale=1.0, output=output,
+                              workers=1, backend="auto", threads=1, force=False)
+
+
+def test_colliding_outputs_get_distinct_names(tmp_path):
+    for name in ("clip.mp4", "clip.gif"):
+        (tmp_path / name).write_bytes(b"")
+    presets = {"a b": GREEN, "a_b": GREEN}
+    jobs, skipped = app.batch_jobs(batch_args(tmp_path, list(presets), "webp", str(tmp_path / "out")), presets)
+    outputs = [job['output'] for job in jobs]
+    assert skipped == 0
+    assert len(outputs) == 4 and len(set(outputs)) == 4
+    assert all(output.endswith(".webp") for output in outputs)
+
+
+def test_long_animation_fails_before_buffering(monkeypatch, tmp_path, green_clip):
+    monkeypatch.setattr(app, "BATCH_ANIMATION_MAX_BYTES", 96 * 64 * 4 * 5)
+    out = str(tmp_path / "clip.webp")
+    frames = []
+    with pytest.raises(IOError, match="fazla uzun"):
+        app.write_keyed_clip(green_clip, GREEN, "webp", out, progress=lambda done, total: frames.append(done))
+    assert frames == []
+    assert not os.path.exists(out) and not os.path.exists(out + ".tmp.webp")
+
+
+def test_animation_formats_refused_without_encoder(monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(tmp_path)
+    with open(app.PRESETS_FILE, "w", encoding="utf-8") as f:
+        json.dump({"yeşil": GREEN}, f)
+    monkeypatch.setattr(app, "animation_supported", lambda: False)
+    assert app.run_batch(batch_args(tmp_path, ["yeşil"], "apng")) == 2
+    assert "4.11" in capsys.readouterr().err
+
+
+def test_job_error_is_reported_per_clip(monkeypatch):
+    def broken(*args):
+        raise AttributeError("module 'cv2' has no attribute 'Animation'")
+    monkeypatch.setattr(app, "write_keyed_clip", broken)
+    result = app.batch_key_job({'label': "clip/yeşil", 'video': "clip.mp4", 'values': GREEN,
+                                'format': "webp", 'output': "clip.webp", 'scale': 1.0,
+                                'backend': "auto", 'threads': 1})
+    assert "Animation" in result['error'] and result['frames'] == 0
@@ -0,0 +1,28 @@
+import app
+from conftest import GREEN
+
+
+def test_budget_change_mid_loop_does_not_mix_cached_looks(qapp, green_clip):
+    app.FRAME_CACHE.set_enabled(True)
+    app.FRAME_CACHE.clear()
+    stream = app.FrameStream(("cache",), green_clip, dict(GREEN, feather=2), 1.0)
+    assert stream.open()
+    stream.change_detector = None
+    keyer = stream.keyer
+    keyer.refine_budget_ms = float("inf")
+    producer = stream.produce()
+    try:
+        for _ in range(5):
+            next(producer)
+        # Süre bütçesi tur ortasında feather'ı kapatır
+        keyer.refine_stages.remove("feather")
+        keyer.refine_disabled.append("feather")
+        for _ in range(7 + 12 + 1):
+            next(producer)
+        keys = list(app.FRAME_CACHE._entries)
+        assert len(keys) == 1
+        assert keys[0][-1] == ("feather",)
+    finally:
+        producer.close()
+        stream.stop()
+        app.FRAME_CACHE.clear()
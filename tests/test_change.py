@@ -0,0 +1,42 @@
+import numpy as np
+
+import app
+
+
+def still_frame():
+    rng = np.random.default_rng(0)
+    frame = np.empty((960, 720, 3), np.uint8)
+    frame[:] = (40, 200, 40)
+    frame[200:700, 150:550] = rng.integers(90, 110, (500, 400, 3), np.uint8)
+    return frame
+
+
+def test_small_local_change_is_detected():
+    detector = app.ChangeDetector()
+    frame = still_frame()
+    assert detector.dirty_tiles(frame) is None
+    assert not detector.dirty_tiles(frame.copy()).any()
+    # Göz kırpma: birkaç piksellik, keskin bir değişiklik
+    blink = frame.copy()
+    blink[401:404, 301:305] = 0
+    dirty = detector.dirty_tiles(blink)
+    tile_h, tile_w = 960 / app.CHANGE_GRID, 720 / app.CHANGE_GRID
+    assert dirty[int(402 / tile_h), int(303 / tile_w)]
+    assert np.count_nonzero(dirty) <= 2
+
+
+def test_noise_below_threshold_is_not_a_change():
+    detector = app.ChangeDetector()
+    frame = still_frame()
+    detector.dirty_tiles(frame)
+    noise = np.random.default_rng(1).integers(-2, 3, frame.shape)
+    noisy = np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    assert not detector.dirty_tiles(noisy).any()
+
+
+def test_full_refresh_caps_skipped_frames():
+    detector = app.ChangeDetector(max_skip=5)
+    frame = still_frame()
+    results = [detector.dirty_tiles(frame) for _ in range(11)]
+    assert [r is None for r in results] == [True, False, False, False, False,
+                                            True, False, False, False, False, True]
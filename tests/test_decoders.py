@@ -0,0 +1,23 @@
+import types
+
+import pytest
+
+import app
+
+
+class FFmpegError(Exception):
+    pass
+
+
+def fake_av(**attrs):
+    def open(path):
+        raise FFmpegError("bozuk")
+    return types.SimpleNamespace(open=open, error=types.SimpleNamespace(FFmpegError=FFmpegError), **attrs)
+
+
+@pytest.mark.parametrize("av", [fake_av(), fake_av(AVError=FFmpegError)], ids=["ffmpeg-error", "av-error"])
+def test_pyav_open_error_is_value_error(monkeypatch, av):
+    # Yeni PyAV'da av.AVError yok; except ifadesi AttributeError vermemeli
+    monkeypatch.setattr(app, "av", av)
+    with pytest.raises(ValueError, match="bozuk"):
+        app.PyAVSource("yok.mp4")
@@ -0,0 +1,77 @@
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+import app
+from conftest import HUDUL
+
+PASSES = 2
+# Sınırdaki aralığın ortanca aralığı aşabileceği süre (başa sarma burada ~10 ms)
+WRAP_TOLERANCE_MS = 5.0
+
+
+def direct_checksums(path):
+    cap = cv2.VideoCapture(path)
+    checksums = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        checksums.append(zlib.crc32(frame))
+    cap.release()
+    return checksums
+
+
+def play(source, passes, pace, checksum=False):
+    """Oynatma gibi oku: (kare sağlamaları, sıradan aralıklar, sınır aralıkları)"""
+    pool = ThreadPoolExecutor(max_workers=1)
+    idle = threading.Event()
+    checksums, intervals, boundary = [], [], []
+    last = None
+    done = 0
+    try:
+        source.request_fill(pool)
+        while True:
+            ret, frame = source.read()
+            wrapped = not ret
+            if wrapped:
+                done += 1
+                if done == passes:
+                    break
+                source.rewind()
+                ret, frame = source.read()
+                assert ret
+            now = time.perf_counter()
+            if last is not None:
+                (boundary if wrapped else intervals).append(now - last)
+            last = now
+            if checksum:
+                checksums.append(zlib.crc32(frame))
+            source.request_fill(pool)
+            # Keying/çizim ve zamanlayıcı beklemesi yerine
+            idle.wait(pace)
+    finally:
+        source.release()
+        pool.shutdown(wait=True)
+    return checksums, intervals, boundary
+
+
+def test_loop_plays_frames_in_direct_decoding_order():
+    expected = direct_checksums(HUDUL)
+    source = app.open_source(HUDUL, prefetch=app.PREFETCH_FRAMES)
+    checksums, _, _ = play(source, PASSES, 0.005, checksum=True)
+    assert source.gapless_loops >= PASSES - 1
+    assert checksums == expected * PASSES
+
+
+def test_loop_wrap_interval_stays_near_median():
+    source = app.open_source(HUDUL, prefetch=app.PREFETCH_FRAMES)
+    _, intervals, boundary = play(source, PASSES + 1, 0.010)
+    assert len(boundary) == PASSES
+    median = float(np.median(intervals)) * 1000
+    wrap = float(np.median(boundary)) * 1000
+    assert wrap <= median + WRAP_TOLERANCE_MS, f"döngü sınırı {wrap:.2f} ms, ortanca {median:.2f} ms"
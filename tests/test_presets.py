@@ -0,0 +1,44 @@
+import os
+
+import app
+from conftest import GREEN
+
+
+def make_store(tmp_path):
+    return app.PresetStore(str(tmp_path / "presets.json"), str(tmp_path / "meta.json"), watch=False)
+
+
+def test_flush_keeps_unreadable_external_edit(qapp, tmp_path):
+    store = make_store(tmp_path)
+    store.put("yeşil", GREEN)
+    assert store.flush()
+    with open(store.path, "w", encoding="utf-8") as f:
+        f.write('{"yarım": ')
+    errors = []
+    store.save_failed.connect(errors.append)
+    store.put("ikinci", GREEN)
+    assert not store.flush()
+    assert errors and store.error
+    with open(store.path, encoding="utf-8") as f:
+        assert f.read() == '{"yarım": '
+    # Dosya düzelince bekleyen değişiklik yazılır
+    os.remove(store.path)
+    assert store.flush()
+    assert set(store.read_json(store.path)) == {"ikinci"}
+
+
+def test_remove_deletes_thumbnail_only_after_flush(qapp, tmp_path):
+    thumbnail = tmp_path / "yeşil.png"
+    thumbnail.write_bytes(b"png")
+    store = make_store(tmp_path)
+    store.put("yeşil", GREEN, thumbnail=str(thumbnail))
+    assert store.flush()
+    store.remove("yeşil")
+    assert thumbnail.exists()
+    with open(store.path, "w", encoding="utf-8") as f:
+        f.write("bozuk")
+    assert not store.flush()
+    assert thumbnail.exists()
+    os.remove(store.path)
+    assert store.flush()
+    assert not thumbnail.exists()
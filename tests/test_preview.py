@@ -0,0 +1,27 @@
+import numpy as np
+
+import app
+
+
+def red_frame():
+    """Kırmızı zemin (H≈178 ve H≈2) üzerinde mavi kare"""
+    frame = np.empty((64, 96, 3), np.uint8)
+    frame[:, :48] = (10, 0, 230)
+    frame[:, 48:] = (0, 10, 230)
+    frame[16:48, 32:64] = (220, 60, 40)
+    return frame
+
+
+def test_wrapping_hue_range_previews_like_playback(qapp):
+    widget = app.AddPresetWidget(app.PresetStore(watch=False))
+    widget.lower_h, widget.lower_s, widget.lower_v = 170, 100, 100
+    widget.upper_h, widget.upper_s, widget.upper_v = 10, 255, 255
+    values = widget.preset_values()
+    assert app.preset_needs_lut(values)
+    frame = red_frame()
+    preview = widget.active_keyer().key(frame).copy()
+    playback = app.ChromaKeyer.for_preset(values).key(frame)
+    assert np.array_equal(preview, playback)
+    # Zemin dolanan aralıkla key'lenir, karakter kalır
+    assert preview[0, 0, 3] == 0 and preview[0, 95, 3] == 0
+    assert preview[32, 48, 3] == 255
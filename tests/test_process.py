@@ -0,0 +1,65 @@
+import gc
+import time
+
+import app
+from conftest import GREEN
+
+
+def wait_for(condition, seconds=10):
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_ring_mapping_closes_with_last_image(qapp):
+    ring = app.SharedFrameRing(32, 16, 3)
+    held = ring.images[1]
+    held.fill(0xff336699)
+    expected = held.copy()
+    ring.unlink()
+    # Pet'in elindeki kare hâlâ okunabilir, eşlem açık
+    assert ring.shm is not None
+    assert held == expected
+    del held
+    gc.collect()
+    assert ring.shm is None
+
+
+def test_ring_closes_at_unlink_when_unused(qapp):
+    ring = app.SharedFrameRing(32, 16, 3)
+    ring.unlink()
+    assert ring.shm is None
+
+
+def test_spawn_failure_is_reported_as_open_error(qapp, green_clip, monkeypatch):
+    def refuse(self, start_seq):
+        raise RuntimeError("ana modül korumasız")
+    monkeypatch.setattr(app.ProcessStream, "spawn", refuse)
+    shown = []
+    monkeypatch.setattr(app.QMessageBox, "critical", lambda *args: shown.append(args[2]))
+    manager = app.PetManager()
+    manager.process_mode = True
+    try:
+        assert manager.start_pet(green_clip, GREEN, 1.0, 1.0) is None
+    finally:
+        manager.shutdown()
+    assert len(shown) == 1 and "başlatılamadı" in shown[0]
+    assert not manager.streams
+
+
+def test_worker_restarts_after_crash(qapp, green_clip):
+    stream = app.ProcessStream(("process",), green_clip, GREEN, 1.0)
+    assert stream.open()
+    stream.start()
+    try:
+        assert wait_for(lambda: stream.advance(time.monotonic()) or stream.current_image is not None)
+        stream.process.kill()
+        stream.process.join()
+        seen = stream._last_seq
+        assert wait_for(lambda: stream.advance(time.monotonic()) or stream._last_seq > seen)
+        assert stream.restarts == 1
+        assert stream.failed is None
+    finally:
+        stream.stop()
+    assert stream.ring is None
@@ -0,0 +1,74 @@
+import gc
+import time
+
+import app
+from conftest import GREEN
+
+
+def test_sprite_frame_outlives_closed_sprite(qapp, green_clip, tmp_path):
+    # rebind eski akışı durdururken pet hâlâ son sprite karesini çiziyor olabilir
+    path = app.bake_sprite(green_clip, GREEN, out_path=str(tmp_path / "clip.wfsprite"))
+    stream = app.SpriteStream(("sprite",), app.SpriteFile(path), 1.0)
+    stream.start()
+    assert stream.advance(stream.clock.deadline)
+    image = stream.current_image
+    expected = image.copy()
+    stream.stop()
+    gc.collect()
+    assert image == expected
+
+
+def test_sprite_frame_image_valid_after_close(qapp, green_clip, tmp_path):
+    path = app.bake_sprite(green_clip, GREEN, out_path=str(tmp_path / "clip.wfsprite"))
+    sprite = app.SpriteFile(path)
+    image = sprite.frame_image(3)
+    expected = image.copy()
+    sprite.close()
+    assert image == expected
+
+
+def test_rebind_keeps_sprite_pet_paintable(qapp, green_clip, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "SPRITE_DIR", str(tmp_path / "sprites"))
+    app.bake_sprite(green_clip, GREEN)
+    manager = app.PetManager()
+    # Ekransız testte pet görünmez sayılıp dondurulmasın
+    manager.power.enabled = False
+    pet = manager.start_pet(green_clip, GREEN, 1.0, 1.0)
+    try:
+        assert isinstance(pet.stream, app.SpriteStream)
+        deadline = time.monotonic() + 2
+        while pet.image is None and time.monotonic() < deadline:
+            qapp.processEvents()
+        assert pet.image is not None
+        # Yeni akış henüz kare vermedi; pet eski akışın karesini çizmeye devam eder
+        manager.set_pet_scale(pet.pet_id, 0.75)
+        gc.collect()
+        assert not pet.grab().isNull()
+    finally:
+        manager.shutdown()
+
+
+def test_sprites_keyed_by_preset_and_scale(qapp, green_clip, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "SPRITE_DIR", str(tmp_path / "sprites"))
+    other = dict(GREEN, erode=1)
+    paths = {app.bake_sprite(green_clip, GREEN), app.bake_sprite(green_clip, other),
+             app.bake_sprite(green_clip, GREEN, 0.5)}
+    assert len(paths) == 3
+    for values, scale in ((GREEN, 1.0), (other, 1.0), (GREEN, 0.5)):
+        sprite = app.SpriteFile.open_for(green_clip, values, scale)
+        assert sprite is not None and sprite.scale == scale
+        sprite.close()
+    assert app.SpriteFile.open_for(green_clip, GREEN, 0.75) is None
+
+
+def test_pet_at_unbaked_scale_decodes_video(qapp, green_clip, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "SPRITE_DIR", str(tmp_path / "sprites"))
+    app.bake_sprite(green_clip, GREEN)
+    manager = app.PetManager()
+    try:
+        assert isinstance(manager.acquire_stream(green_clip, GREEN, 1.0), app.SpriteStream)
+        assert isinstance(manager.acquire_stream(green_clip, GREEN, 0.75), app.FrameStream)
+    finally:
+        for stream in list(manager.streams.values()):
+            stream.stop()
+        manager.shutdown()